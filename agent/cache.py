@@ -0,0 +1,296 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from vision.frame import Frame
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "cache.sqlite3"
+)
+
+CONTRACTIONS = (
+    (re.compile(r"\bwhat's\b"), "what is"),
+    (re.compile(r"\bit's\b"), "it is"),
+    (re.compile(r"n't\b"), " not"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"'m\b"), " am"),
+    (re.compile(r"'ll\b"), " will"),
+)
+NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize(text):
+    """
+    Canonical form of a user message for cache keys.
+
+    Lower-cases, expands common contractions, drops punctuation and
+    collapses whitespace, so "What's on my screen?" and "what is on my
+    screen" share an entry.
+    """
+    text = text.lower().replace("’", "'")
+    for pattern, replacement in CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    return " ".join(NON_WORD.sub(" ", text).split())
+
+
+def context_hash(context):
+    """
+    Args:
+        context (str | list[str] | None): Conversation memory the reply depends on.
+
+    Returns:
+        str: 16-char hex digest ("" when there is no context).
+    """
+    if not context:
+        return ""
+    if not isinstance(context, str):
+        context = "\n".join(context)
+    return hashlib.blake2b(context.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def image_hash(image):
+    """
+    Exact content hash of an image's pixels.
+
+    Replies to SCREENSHOT/CAMERA questions depend on details a perceptual
+    hash ignores (a line of on-screen text, a small object), so only a
+    pixel-identical capture may reuse a cached answer.
+
+    Args:
+        image (Frame | PIL.Image.Image | numpy.ndarray | None): BGR array, Frame or PIL.
+
+    Returns:
+        str: Hex digest ("" for no image), the same for every input type.
+    """
+    if image is None:
+        return ""
+    if isinstance(image, np.ndarray):
+        image = Frame.from_bgr(image)
+    elif not isinstance(image, Frame):
+        image = Frame.from_pil(image)
+    return image.hash()
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache for model answers, optionally backed by SQLite.
+
+    Entries are keyed by namespace (e.g. "intent", "gemini"), normalized
+    message text, a hash of the memory context and an exact hash of the
+    attached image's pixels. Each entry expires ``ttl`` seconds after it was stored
+    (per-call override allowed). The in-memory LRU holds ``max_size``
+    entries; with a ``path`` every entry is also written to SQLite, misses
+    fall through to disk, and hits survive restarts. Expired rows are
+    purged on open.
+
+    Expiry uses wall-clock time (time.time()) because it has to be
+    meaningful across processes.
+
+    Attributes:
+        max_size (int): In-memory LRU capacity.
+        ttl (float): Default seconds an entry stays valid.
+        path (str | None): SQLite file, or None for memory only.
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that had to compute.
+        expired (int): Lookups that found only an expired entry.
+        evictions (int): Entries pushed out of the in-memory LRU.
+    """
+
+    def __init__(self, max_size=512, ttl=3600.0, path=None):
+        """
+        Args:
+            max_size (int): LRU capacity.
+            ttl (float): Default time-to-live in seconds.
+            path (str | None): SQLite file (DEFAULT_PATH for the shared one).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        if path:
+            self._open(path)
+
+    # ================= PERSISTENCE =================
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, namespace TEXT, value TEXT, created REAL, expires REAL)"
+        )
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT key, value, expires FROM entries ORDER BY created DESC LIMIT ?", (self.max_size,)
+        ).fetchall()
+        for key, value, expires in reversed(rows):
+            self._entries[key] = (json.loads(value), expires)
+
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _disk_put(self, key, namespace, value, expires):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (key, namespace, json.dumps(value), time.time(), expires),
+        )
+        self._db.commit()
+
+    # ================= LOOKUPS =================
+
+    def key(self, namespace, text, context=None, image=None):
+        """
+        Returns:
+            str: Cache key for the (namespace, text, context, image) tuple.
+        """
+        parts = (namespace, normalize(text), context_hash(context), image_hash(image))
+        return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, namespace, text, context=None, image=None):
+        """
+        Returns:
+            Cached value, or None on a miss or expired entry.
+        """
+        key = self.key(namespace, text, context, image)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._disk_get(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.time():
+                self._entries.pop(key, None)
+                self.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def lookup(self, namespace, text, context=None, image=None):
+        """
+        get() that also updates the hit/miss counters.
+
+        Returns:
+            Cached value, or None.
+        """
+        value = self.get(namespace, text, context, image)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, namespace, text, value, context=None, image=None, ttl=None):
+        key = self.key(namespace, text, context, image)
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, (value, expires))
+            self._disk_put(key, namespace, value, expires)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, namespace, text, compute, context=None, image=None, ttl=None,
+                       cacheable=None):
+        """
+        Return the cached answer or call ``compute()`` and remember it.
+
+        Args:
+            namespace (str): Which model/function the answer belongs to.
+            text (str): User message.
+            compute (callable): Produces the answer on a miss.
+            context (str | list[str] | None): Memory the answer depends on.
+            image: Attached image (Frame, PIL or BGR array), if any.
+            ttl (float | None): Override the default time-to-live.
+            cacheable (callable | None): value -> bool; answers for which it
+                returns False (e.g. error messages) are not stored.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        value = self.lookup(namespace, text, context, image)
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None and (cacheable is None or cacheable(value)):
+            self.put(namespace, text, value, context, image, ttl)
+        return value
+
+    # ================= REPORTING =================
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit_rate, expired, evictions and in-memory size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Repeated turns with a slow model, then a restart: python -m agent.cache
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+
+    def slow_model(text):
+        time.sleep(0.3)
+        return f"answer to {normalize(text)}"
+
+    turns = ["What's on my screen?", "tell me a joke", "what is on my screen", "Tell me a joke!"]
+    for run in ("first run", "after restart"):
+        cache = ResponseCache(path=path)
+        t0 = time.perf_counter()
+        for text in turns:
+            cache.get_or_compute("chat", text, lambda: slow_model(text), context=["U:hi", "A:hello"])
+        print(f"{run:13s}: {time.perf_counter() - t0:.2f}s  {cache.stats()}")
+        cache.close()
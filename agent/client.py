@@ -0,0 +1,294 @@
+import time
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from stats import LatencyStats
+
+OLLAMA_BASE = "http://localhost:11434"
+HF_BASE = "https://router.huggingface.co"
+
+# Transient statuses worth another attempt (rate limit, gateway, model loading)
+RETRY_STATUS = (429, 502, 503, 504)
+
+# Methods that are safe to resend after the server may have seen them
+IDEMPOTENT = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class Endpoint:
+    """
+    Settings and counters for one base URL.
+
+    Attributes:
+        name (str): Label used in reports.
+        prefix (str): URL prefix the endpoint covers.
+        pool_size (int): Keep-alive connections kept open to it.
+        timeout (float | tuple): Default requests timeout.
+        retry_status (tuple[int]): Statuses retried for this endpoint.
+        latency (LatencyStats): Time until the response headers arrived.
+        counts (dict[str, int]): requests, retries, failures.
+    """
+
+    def __init__(self, name, prefix, pool_size, timeout, retry_status=RETRY_STATUS):
+        self.name = name
+        self.prefix = prefix
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retry_status = retry_status
+        self.latency = LatencyStats(name)
+        self.counts = {"requests": 0, "retries": 0, "failures": 0}
+
+
+class HttpClient:
+    """
+    Shared keep-alive session for model calls.
+
+    One requests.Session holds a connection pool per mounted endpoint, so
+    consecutive turns reuse the TCP (and TLS) connection instead of opening
+    a new one. Failed attempts are retried up to ``retries`` times with
+    full-jitter exponential backoff (a random wait in
+    [0, min(max_backoff, backoff * 2**attempt)]), which keeps simultaneous
+    callers from retrying in lock-step. A Retry-After header, when present
+    and shorter than ``max_backoff``, is honoured. If every attempt gets a
+    retryable status the last response is returned for the caller to
+    report; if every attempt fails the last exception is raised.
+
+    What counts as failed depends on the request. The endpoint's
+    ``retry_status`` answers are always retried. Connection errors
+    (including connect timeouts) are retried for every method, since the
+    server never saw the request. A read timeout is retried only for
+    idempotent methods: a POST that timed out may still be generating, and
+    sending it again would double the load on a model that is already slow.
+
+    ``deadline`` bounds the whole call: each attempt's timeouts shrink to
+    the time left, and no backoff is started that would end past it.
+
+    Streaming requests are retried only until the headers arrive; the body
+    is never replayed.
+
+    Attributes:
+        retries (int): Extra attempts after the first.
+        backoff (float): Base backoff in seconds.
+        max_backoff (float): Cap for a single wait.
+        endpoints (dict[str, Endpoint]): Mounted endpoints by name.
+    """
+
+    def __init__(self, retries=2, backoff=0.25, max_backoff=4.0, timeout=(3.05, 120), seed=None):
+        """
+        Args:
+            retries (int): Extra attempts on transient errors.
+            backoff (float): Base backoff in seconds.
+            max_backoff (float): Longest single wait.
+            timeout (float | tuple): Default (connect, read) timeout for
+                URLs outside any mounted endpoint.
+            seed (int | None): Seed for the jitter (benchmarks).
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.endpoints = {}
+        self._session = requests.Session()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._other = Endpoint("other", "", 10, timeout)
+
+    def mount(self, prefix, name, pool_size=4, timeout=None, retry_status=RETRY_STATUS):
+        """
+        Give URLs starting with ``prefix`` their own connection pool.
+
+        Args:
+            prefix (str): e.g. "http://localhost:11434".
+            name (str): Label for reports.
+            pool_size (int): Connections kept alive; size it to the number of
+                concurrent calls (e.g. speculative branches) to that host.
+            timeout (float | tuple | None): Default timeout for the endpoint.
+            retry_status (tuple[int]): Statuses worth retrying there.
+
+        Returns:
+            HttpClient: self.
+        """
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount(prefix, adapter)
+        self.endpoints[name] = Endpoint(name, prefix, pool_size, timeout or self.timeout, retry_status)
+        return self
+
+    def endpoint(self, url):
+        """
+        Returns:
+            Endpoint: The mounted endpoint with the longest matching prefix.
+        """
+        matches = [e for e in self.endpoints.values() if url.startswith(e.prefix)]
+        return max(matches, key=lambda e: len(e.prefix)) if matches else self._other
+
+    def _delay(self, attempt, response=None):
+        delay = self._random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff))
+            except ValueError:
+                pass
+        return delay
+
+    def _count(self, endpoint, key):
+        with self._lock:
+            endpoint.counts[key] += 1
+
+    @staticmethod
+    def _bounded(timeout, remaining):
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def request(self, method, url, retries=None, deadline=None, **kwargs):
+        """
+        Send a request through the pooled session.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Full URL.
+            retries (int | None): Override the client's retry count.
+            deadline (float | None): Seconds allowed for the whole call,
+                retries and backoff included.
+            **kwargs: Passed to requests (json, headers, stream, timeout...).
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.Timeout: The deadline passed before an answer arrived.
+        """
+        endpoint = self.endpoint(url)
+        timeout = kwargs.pop("timeout", None)
+        timeout = endpoint.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        retryable = (requests.ConnectionError, requests.Timeout) if method.upper() in IDEMPOTENT \
+            else requests.ConnectionError
+        end = None if deadline is None else time.monotonic() + deadline
+        self._count(endpoint, "requests")
+        attempt = 0
+        while True:
+            remaining = None if end is None else end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self._count(endpoint, "failures")
+                raise requests.Timeout(f"{method} {url}: deadline of {deadline:.2f}s passed")
+            t0 = time.perf_counter()
+            try:
+                response = self._session.request(
+                    method, url, timeout=timeout if end is None else self._bounded(timeout, remaining), **kwargs
+                )
+            except retryable:
+                if not self._retry(endpoint, attempt, retries, end, self._delay(attempt)):
+                    self._count(endpoint, "failures")
+                    raise
+                attempt += 1
+                continue
+            except requests.RequestException:
+                self._count(endpoint, "failures")
+                raise
+            endpoint.latency.record(time.perf_counter() - t0)
+            if response.status_code not in endpoint.retry_status \
+                    or not self._retry(endpoint, attempt, retries, end, self._delay(attempt, response)):
+                if response.status_code >= 400:
+                    self._count(endpoint, "failures")
+                return response
+            response.close()
+            attempt += 1
+
+    def _retry(self, endpoint, attempt, retries, end, delay):
+        """Sleep ``delay`` and return True if another attempt is allowed and fits the deadline."""
+        if attempt >= retries or (end is not None and time.monotonic() + delay >= end):
+            return False
+        self._count(endpoint, "retries")
+        time.sleep(delay)
+        return True
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def report(self):
+        """
+        Returns:
+            dict: {endpoint: counts + latency summary}.
+        """
+        endpoints = list(self.endpoints.values())
+        if self._other.counts["requests"]:
+            endpoints.append(self._other)
+        return {e.name: {**e.counts, "latency": e.latency.summary()} for e in endpoints}
+
+    def close(self):
+        self._session.close()
+
+
+# Shared by every model call in the process
+CLIENT = HttpClient()
+CLIENT.mount(OLLAMA_BASE, "ollama", pool_size=4, timeout=(3.05, 120))
+# HF answers 503 while a model is loading, with an estimated_time in the
+# body; that is passed straight back so the user is told at once.
+CLIENT.mount(HF_BASE, "hf", pool_size=4, timeout=(5, 120), retry_status=(429, 502, 504))
+
+
+if __name__ == "__main__":
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # Fresh connection per call vs the pooled client against a local
+    # stand-in server, then a flaky endpoint: python -m agent.client
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True
+        failures = {}
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path == "/flaky":
+                count = StandIn.failures.get(self.client_address, 0)
+                StandIn.failures[self.client_address] = count + 1
+                if count % 3 < 2:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            body = json.dumps({"response": "CHAT", "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    payload = {"model": "qwen3:0.6b", "prompt": "hi", "stream": False}
+    n = 300
+
+    fresh = LatencyStats("fresh")
+    for _ in range(n):
+        t0 = time.perf_counter()
+        requests.post(base + "/api/generate", json=payload, timeout=5).json()
+        fresh.record(time.perf_counter() - t0)
+
+    client = HttpClient(backoff=0.01, seed=0).mount(base, "stand-in", pool_size=2)
+    pooled = LatencyStats("pooled")
+    for _ in range(n):
+        t0 = time.perf_counter()
+        client.post(base + "/api/generate", json=payload).json()
+        pooled.record(time.perf_counter() - t0)
+
+    for stats in (fresh, pooled):
+        s = stats.summary()
+        print(f"{stats.name:6s}: mean {s['mean_ms']:.2f} ms, p50 {s['p50_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms")
+
+    for _ in range(10):
+        client.post(base + "/flaky", json=payload)
+    print(client.report())
+    server.shutdown()
@@ -0,0 +1,299 @@
+import os
+import re
+import math
+import time
+from collections import Counter, defaultdict
+
+from stats import LatencyStats
+
+DEFAULT_EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.tsv")
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def load_examples(path=DEFAULT_EXAMPLES):
+    """
+    Read ``INTENT<TAB>message`` lines (``#`` starts a comment line).
+
+    Returns:
+        list[tuple]: (message, intent) pairs.
+    """
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            intent, _, text = line.partition("\t")
+            examples.append((text.strip(), intent.strip().upper()))
+    return examples
+
+
+def features(text):
+    """
+    Word unigrams, word bigrams and character 4-grams of words with 4+ letters.
+
+    Character n-grams let typos and inflections ("screenshots", "webcm")
+    still share features with the training examples; short function words
+    ("is", "the", "my") only contribute as whole words.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    feats = [f"w:{w}" for w in words]
+    feats += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        if len(w) >= 4:
+            padded = f"#{w}#"
+            feats += [f"c:{padded[i:i + 4]}" for i in range(len(padded) - 3)]
+    return feats
+
+
+def normalize(text):
+    """Lower-cased words of ``text`` joined by single spaces."""
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+# ============================================================
+# 1. LOCAL CLASSIFIER
+# ============================================================
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over word and character n-grams.
+
+    Training is a single pass of counting, so it runs at startup straight
+    from the labelled file. Features never seen in training are ignored.
+
+    Naive Bayes posteriors saturate at ~1.0 for anything longer than a few
+    words, so the confidence is the posterior of the *per-feature average*
+    log-likelihood scaled by ``sharpness``: a message where only one or two
+    n-grams point at a class stays uncertain and goes to the fallback.
+    A message that matches a training example word for word is answered
+    with that example's label at confidence 1.0.
+
+    Attributes:
+        intents (tuple[str]): Known labels.
+        alpha (float): Additive smoothing.
+        sharpness (float): Scale applied to the averaged log-likelihoods.
+    """
+
+    def __init__(self, alpha=0.5, sharpness=3.0):
+        self.alpha = alpha
+        self.sharpness = sharpness
+        self.intents = ()
+        self._log_prior = {}
+        self._log_prob = {}
+        self._log_unseen = {}
+        self._vocab = set()
+        self._exact = {}
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_EXAMPLES, **kwargs):
+        return cls(**kwargs).fit(load_examples(path))
+
+    def fit(self, examples):
+        """
+        Args:
+            examples (list[tuple]): (message, intent) pairs.
+
+        Returns:
+            IntentClassifier: self.
+        """
+        counts = defaultdict(Counter)
+        docs = Counter()
+        labels = defaultdict(set)
+        for text, intent in examples:
+            counts[intent].update(features(text))
+            docs[intent] += 1
+            labels[normalize(text)].add(intent)
+
+        self.intents = tuple(sorted(docs))
+        # Messages labelled inconsistently are left to the model.
+        self._exact = {text: next(iter(seen)) for text, seen in labels.items() if text and len(seen) == 1}
+        self._vocab = set().union(*counts.values()) if counts else set()
+        size = len(self._vocab)
+        total_docs = sum(docs.values())
+        for intent in self.intents:
+            total = sum(counts[intent].values()) + self.alpha * size
+            self._log_prior[intent] = math.log(docs[intent] / total_docs)
+            self._log_prob[intent] = {f: math.log((n + self.alpha) / total) for f, n in counts[intent].items()}
+            self._log_unseen[intent] = math.log(self.alpha / total)
+        return self
+
+    def probabilities(self, text):
+        """
+        Args:
+            text (str): User message.
+
+        Returns:
+            dict[str, float]: Confidence per intent (empty when no feature of
+                the message was seen in training).
+        """
+        exact = self._exact.get(normalize(text))
+        if exact is not None:
+            return {intent: float(intent == exact) for intent in self.intents}
+
+        feats = [f for f in features(text) if f in self._vocab]
+        if not feats or not self.intents:
+            return {}
+
+        scores = {}
+        for intent in self.intents:
+            table, unseen = self._log_prob[intent], self._log_unseen[intent]
+            likelihood = sum(table.get(f, unseen) for f in feats) / len(feats)
+            scores[intent] = self.sharpness * likelihood + self._log_prior[intent]
+
+        top = max(scores.values())
+        exp = {intent: math.exp(s - top) for intent, s in scores.items()}
+        norm = sum(exp.values())
+        return {intent: e / norm for intent, e in exp.items()}
+
+    def predict(self, text):
+        """
+        Args:
+            text (str): User message.
+
+        Returns:
+            tuple: (intent, confidence 0-1). Confidence is 0 when no feature
+                of the message was seen in training.
+        """
+        probs = self.probabilities(text)
+        if not probs:
+            return "CHAT", 0.0
+        best = max(probs, key=probs.get)
+        return best, probs[best]
+
+
+# ============================================================
+# 2. TIERED ROUTER
+# ============================================================
+
+class RoutedIntent:
+    """
+    Attributes:
+        intent (str): CHAT / CAMERA / SCREENSHOT / STOP.
+        tier (str): "local" or "fallback".
+        confidence (float): Local classifier confidence.
+    """
+
+    def __init__(self, intent, tier, confidence):
+        self.intent = intent
+        self.tier = tier
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"RoutedIntent({self.intent}, {self.tier}, confidence={self.confidence:.2f})"
+
+
+class IntentRouter:
+    """
+    Local classifier first, the LLM intent call only for uncertain messages.
+
+    Attributes:
+        classifier (IntentClassifier): Tier-0 model.
+        threshold (float): Minimum local confidence to skip the fallback.
+        thresholds (dict[str, float]): Per-intent overrides of ``threshold``.
+        latency (dict[str, LatencyStats]): "local" and "fallback" latency.
+        counts (dict[str, int]): Messages answered per tier.
+    """
+
+    def __init__(self, fallback, classifier=None, threshold=0.85, thresholds=None):
+        """
+        Args:
+            fallback (callable): message -> intent, e.g. the Ollama qwen3 call.
+            classifier (IntentClassifier | None): Defaults to one trained on
+                agent/intents.tsv.
+            threshold (float): Confidence needed to answer locally.
+            thresholds (dict | None): Per-intent confidence overrides.
+                Defaults to {"STOP": 0.97}: a wrong local STOP exits the
+                agent, so only near-certain ones ("exit", "bye") skip the
+                fallback.
+        """
+        self.fallback = fallback
+        self.classifier = classifier or IntentClassifier.from_file()
+        self.threshold = threshold
+        self.thresholds = {"STOP": 0.97} if thresholds is None else dict(thresholds)
+        self.latency = {"local": LatencyStats("local"), "fallback": LatencyStats("fallback")}
+        self.counts = {"local": 0, "fallback": 0}
+
+    def confident(self, intent, confidence):
+        """True when a local ``intent`` at ``confidence`` skips the fallback."""
+        return confidence >= self.thresholds.get(intent, self.threshold)
+
+    def route(self, text):
+        """
+        Returns:
+            RoutedIntent
+        """
+        t0 = time.perf_counter()
+        intent, confidence = self.classifier.predict(text)
+        self.latency["local"].record(time.perf_counter() - t0)
+        if self.confident(intent, confidence):
+            self.counts["local"] += 1
+            return RoutedIntent(intent, "local", confidence)
+
+        self.counts["fallback"] += 1
+        t0 = time.perf_counter()
+        intent = self.fallback(text)
+        self.latency["fallback"].record(time.perf_counter() - t0)
+        return RoutedIntent(intent, "fallback", confidence)
+
+    def report(self):
+        """
+        Returns:
+            dict: local_rate, counts and per-tier latency summaries.
+        """
+        total = sum(self.counts.values())
+        return {
+            "local_rate": self.counts["local"] / total if total else 0.0,
+            "counts": dict(self.counts),
+            "local": self.latency["local"].summary(),
+            "fallback": self.latency["fallback"].summary(),
+        }
+
+
+def evaluate(router, examples):
+    """
+    Route labelled messages and measure accuracy per tier.
+
+    Args:
+        router (IntentRouter): Router under test.
+        examples (list[tuple]): (message, intent) pairs.
+
+    Returns:
+        dict: {tier: {"count", "accuracy"}} plus "overall".
+    """
+    hits = defaultdict(lambda: [0, 0])
+    for text, expected in examples:
+        routed = router.route(text)
+        for key in (routed.tier, "overall"):
+            hits[key][0] += routed.intent == expected
+            hits[key][1] += 1
+    return {key: {"count": n, "accuracy": ok / n} for key, (ok, n) in hits.items()}
+
+
+if __name__ == "__main__":
+    # Leave-one-out on agent/intents.tsv, with a 200 ms keyword stand-in for
+    # the Ollama call: python -m agent.intent
+    examples = load_examples()
+
+    def keyword_fallback(text):
+        time.sleep(0.2)
+        text = text.lower()
+        for intent, words in (("STOP", ("exit", "quit", "bye")), ("SCREENSHOT", ("screen", "window")),
+                              ("CAMERA", ("see", "camera", "webcam", "look"))):
+            if any(w in text for w in words):
+                return intent
+        return "CHAT"
+
+    for threshold in (0.0, 0.7, 0.85, 0.95):
+        router = IntentRouter(keyword_fallback, IntentClassifier(), threshold)
+        hits = defaultdict(lambda: [0, 0])
+        for i, (text, expected) in enumerate(examples):
+            router.classifier.fit(examples[:i] + examples[i + 1:])
+            for tier, stats in evaluate(router, [(text, expected)]).items():
+                hits[tier][0] += stats["accuracy"]
+                hits[tier][1] += 1
+        report = router.report()
+        print(f"threshold {threshold}: " + ", ".join(
+            f"{tier} {ok / n:.0%} of {n}" for tier, (ok, n) in sorted(hits.items())
+        ) + f" | local p50 {report['local']['p50_ms']:.2f} ms, fallback p50 {report['fallback'].get('p50_ms', 0):.0f} ms")
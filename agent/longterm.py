@@ -0,0 +1,482 @@
+import os
+import re
+import json
+import time
+import array
+import hashlib
+import threading
+
+import numpy as np
+
+from stats import LatencyStats
+
+DEFAULT_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "memory"
+)
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an the is are was were be been am i im me my you your we our it its this that these those "
+    "of to in on at for with and or but so as by from about what when where who how why which "
+    "do does did can could would should will s t ll re ve tell please just".split()
+)
+
+
+# ============================================================
+# 1. EMBEDDERS
+# ============================================================
+
+class HashedEmbedder:
+    """
+    Model-free embedding: hashed word/character n-grams.
+
+    Content words (STOPWORDS removed) give unigrams, bigrams and character
+    4-grams of words with 4+ letters; each is hashed to a signed bucket and
+    weighted by log(1 + count). Cosine similarity then measures shared
+    wording, including inflections and typos. Fast and deterministic, but it
+    does not match synonyms the way a trained model does.
+
+    Attributes:
+        name (str): Identifier stored with the index.
+        dim (int): Vector size.
+        min_score (float): Suggested relevance cut-off for this embedding.
+    """
+
+    min_score = 0.2
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashed-{dim}"
+
+    def features(self, text):
+        words = [w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+        feats = [f"w:{w}" for w in words]
+        feats += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            if len(w) >= 4:
+                padded = f"#{w}#"
+                feats += [f"c:{padded[i:i + 4]}" for i in range(len(padded) - 3)]
+        return feats
+
+    def _bucket(self, feature):
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return h % self.dim, 1.0 if h >> 63 else -1.0
+
+    def embed(self, texts):
+        """
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            numpy.ndarray: (len(texts), dim) float32, L2-normalized.
+        """
+        out = np.zeros((len(texts), self.dim), np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self.features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, count in counts.items():
+                index, sign = self._bucket(feature)
+                out[row, index] += sign * np.log1p(count)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+class TransformerEmbedder:
+    """
+    Sentence embeddings from a small local transformer (mean-pooled last
+    hidden state), e.g. all-MiniLM-L6-v2.
+
+    Attributes:
+        name (str): Model name or path.
+        dim (int): Hidden size.
+        min_score (float): Suggested relevance cut-off for this embedding.
+    """
+
+    min_score = 0.35
+
+    def __init__(self, name=DEFAULT_MODEL, local_files_only=True, max_length=256):
+        """
+        Args:
+            name (str): Hugging Face model id or local path.
+            local_files_only (bool): Only use the local cache (no download at startup).
+            max_length (int): Token limit per text.
+        """
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.name = name
+        self.max_length = max_length
+        self._torch = torch
+        self._tokenizer = AutoTokenizer.from_pretrained(name, local_files_only=local_files_only)
+        model = AutoModel.from_pretrained(name, local_files_only=local_files_only)
+        if getattr(model.config, "is_encoder_decoder", False):
+            model = model.get_encoder()
+        self._model = model.eval()
+        self.dim = model.config.hidden_size
+
+    def embed(self, texts):
+        """
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            numpy.ndarray: (len(texts), dim) float32, L2-normalized.
+        """
+        batch = self._tokenizer(list(texts), padding=True, truncation=True,
+                                max_length=self.max_length, return_tensors="pt")
+        with self._torch.inference_mode():
+            hidden = self._model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1)
+        pooled = self._torch.nn.functional.normalize(pooled, dim=-1)
+        return pooled.float().numpy()
+
+
+def load_embedder(name=DEFAULT_MODEL, dim=512):
+    """
+    The local transformer if it is available, otherwise HashedEmbedder.
+
+    Returns:
+        HashedEmbedder | TransformerEmbedder
+    """
+    if name:
+        try:
+            return TransformerEmbedder(name)
+        except Exception as e:
+            print(f"[WARN] Embedding model {name} unavailable ({type(e).__name__}); using hashed n-grams")
+    return HashedEmbedder(dim)
+
+
+# ============================================================
+# 2. VECTOR STORE
+# ============================================================
+
+class VectorStore:
+    """
+    Append-only vectors in a memory-mapped matrix plus a JSONL log.
+
+    ``vectors.f32`` holds one float32 row per entry and grows by doubling,
+    so appends never rewrite it; ``entries.jsonl`` holds the records, one
+    line per entry in the same order. Only byte offsets into the log are
+    kept in RAM (8 bytes per entry), so a million entries cost 8 MB plus the
+    page cache the OS gives the mapping. The log is the source of truth:
+    the row count is taken from it on open, and if the embedder changed
+    (``meta.json``) the vectors are rebuilt from it.
+
+    search() is an exact top-k cosine scan: a matrix-vector product over
+    fixed-size row blocks of the mapping and an argpartition per block, so
+    memory stays bounded however large the store gets.
+
+    Attributes:
+        root (str): Directory of the store.
+        dim (int): Vector size.
+    """
+
+    def __init__(self, root, embedder, block_rows=65536):
+        """
+        Args:
+            root (str): Directory (created if missing).
+            embedder: Object with ``name``, ``dim`` and ``embed(texts)``.
+            block_rows (int): Rows scored per block in search().
+        """
+        self.root = root
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.block_rows = block_rows
+        os.makedirs(root, exist_ok=True)
+        self._vectors_path = os.path.join(root, "vectors.f32")
+        self._log_path = os.path.join(root, "entries.jsonl")
+        self._meta_path = os.path.join(root, "meta.json")
+        self._lock = threading.Lock()
+        self._offsets = array.array("q")
+        self._vectors = None
+        self._capacity = 0
+        self._load()
+
+    # ================= FILES =================
+
+    def _load(self):
+        if os.path.exists(self._log_path):
+            with open(self._log_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    if line.endswith(b"\n"):
+                        self._offsets.append(offset)
+                    offset += len(line)
+
+        meta = {}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        rows = os.path.getsize(self._vectors_path) // (4 * self.dim) if os.path.exists(self._vectors_path) else 0
+        if meta.get("embedder") != self.embedder.name or meta.get("dim") != self.dim or rows < len(self._offsets):
+            self._rebuild()
+        else:
+            self._map(rows)
+
+    def _map(self, rows):
+        self._capacity = rows
+        self._vectors = np.memmap(self._vectors_path, np.float32, "r+", shape=(rows, self.dim)) if rows else None
+
+    def _grow(self, needed):
+        rows = max(1024, self._capacity)
+        while rows < needed:
+            rows *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(rows * 4 * self.dim)
+        self._map(rows)
+
+    def _rebuild(self, batch=256):
+        if self._offsets:
+            print(f"[WARN] Re-embedding {len(self._offsets)} memories with {self.embedder.name}")
+        if os.path.exists(self._vectors_path):
+            os.remove(self._vectors_path)
+        self._capacity = 0
+        self._vectors = None
+        if self._offsets:
+            self._grow(len(self._offsets))
+            for start in range(0, len(self._offsets), batch):
+                records = self.records(range(start, min(start + batch, len(self._offsets))))
+                self._vectors[start:start + len(records)] = self.embedder.embed([r["text"] for r in records])
+            self._vectors.flush()
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"embedder": self.embedder.name, "dim": self.dim}, f)
+
+    # ================= WRITES / READS =================
+
+    def add(self, texts, records=None):
+        """
+        Embed and append entries.
+
+        Args:
+            texts (list[str]): Text embedded for each entry.
+            records (list[dict] | None): Extra fields stored with each entry.
+
+        Returns:
+            list[int]: Entry ids.
+        """
+        vectors = self.embedder.embed(texts)
+        return self.add_vectors(vectors, [{**(r or {}), "text": t} for t, r in zip(texts, records or [None] * len(texts))])
+
+    def add_vectors(self, vectors, records):
+        """Append precomputed unit vectors (rows) with their records."""
+        with self._lock:
+            start = len(self._offsets)
+            if start + len(records) > self._capacity:
+                self._grow(start + len(records))
+            # Vectors first: a crash before the log write leaves unused rows,
+            # never a logged entry without its vector.
+            self._vectors[start:start + len(records)] = vectors
+            with open(self._log_path, "ab") as f:
+                offset = f.tell()
+                for i, record in enumerate(records):
+                    line = (json.dumps({"id": start + i, **record}) + "\n").encode("utf-8")
+                    f.write(line)
+                    self._offsets.append(offset)
+                    offset += len(line)
+            return list(range(start, start + len(records)))
+
+    def records(self, ids):
+        """
+        Returns:
+            list[dict]: Log records for ``ids``.
+        """
+        out = []
+        with open(self._log_path, "rb") as f:
+            for i in ids:
+                f.seek(self._offsets[i])
+                out.append(json.loads(f.readline()))
+        return out
+
+    def search(self, query, k=4, exclude_last=0):
+        """
+        Exact top-k cosine search.
+
+        Args:
+            query (numpy.ndarray): Unit query vector (dim,).
+            k (int): Results wanted.
+            exclude_last (int): Skip the newest entries (already in short-term memory).
+
+        Returns:
+            list[tuple]: (score, id), best first.
+        """
+        with self._lock:
+            n = len(self._offsets) - exclude_last
+            vectors = self._vectors  # stays valid if a concurrent add() remaps
+        if n <= 0 or k <= 0:
+            return []
+        query = np.asarray(query, np.float32)
+        best_scores = []
+        best_ids = []
+        for start in range(0, n, self.block_rows):
+            scores = vectors[start:min(n, start + self.block_rows)] @ query
+            if len(scores) > k:
+                top = np.argpartition(scores, -k)[-k:]
+            else:
+                top = np.arange(len(scores))
+            best_scores.append(scores[top])
+            best_ids.append(top + start)
+        scores = np.concatenate(best_scores)
+        ids = np.concatenate(best_ids)
+        order = np.argsort(-scores)[:k]
+        return [(float(scores[i]), int(ids[i])) for i in order]
+
+    def flush(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+# ============================================================
+# 3. LONG-TERM MEMORY
+# ============================================================
+
+class LongTermMemory:
+    """
+    Every conversation turn, retrievable by meaning.
+
+    Each turn is embedded and appended to a VectorStore under ``root``.
+    context(message) returns only the ``k`` past turns most similar to the
+    message (cosine >= ``min_score``), skipping the newest ``skip_recent``
+    turns that short-term memory already shows, so prompts carry relevant
+    history without growing with the session.
+
+    Attributes:
+        store (VectorStore): Vectors and turn log.
+        k (int): Snippets per prompt.
+        min_score (float): Minimum cosine similarity to include a turn
+            (defaults to the embedder's ``min_score``).
+        latency (dict[str, LatencyStats]): "add" and "recall".
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, embedder=None, k=4, min_score=None, skip_recent=3,
+                 snippet_chars=400):
+        """
+        Args:
+            root (str): Storage directory.
+            embedder: Defaults to load_embedder().
+            k (int): Snippets per prompt.
+            min_score (float | None): Relevance cut-off (None = the embedder's).
+            skip_recent (int): Newest turns never recalled, unless a call
+                passes its own (ConversationMemory.recent_turns()).
+            snippet_chars (int): Each recalled turn is cut to this length.
+        """
+        self.store = VectorStore(root, embedder or load_embedder())
+        self.k = k
+        self.min_score = self.store.embedder.min_score if min_score is None else min_score
+        self.skip_recent = skip_recent
+        self.snippet_chars = snippet_chars
+        self.latency = {"add": LatencyStats("add"), "recall": LatencyStats("recall")}
+
+    def add(self, user, assistant):
+        """Store one turn."""
+        t0 = time.perf_counter()
+        self.store.add([f"{user}\n{assistant}"], [{"time": time.time(), "user": user, "assistant": assistant}])
+        self.latency["add"].record(time.perf_counter() - t0)
+
+    def recall(self, message, k=None, skip_recent=None):
+        """
+        Args:
+            message (str): Query text.
+            k (int | None): Snippets to return (None = ``self.k``).
+            skip_recent (int | None): Newest turns to leave out (None =
+                ``self.skip_recent``).
+
+        Returns:
+            list[tuple]: (score, record) of relevant past turns, best first.
+        """
+        t0 = time.perf_counter()
+        skip_recent = self.skip_recent if skip_recent is None else skip_recent
+        query = self.store.embedder.embed([message])[0]
+        hits = [(s, i) for s, i in self.store.search(query, k or self.k, skip_recent)
+                if s >= self.min_score]
+        records = self.store.records([i for _, i in hits])
+        self.latency["recall"].record(time.perf_counter() - t0)
+        return [(s, r) for (s, _), r in zip(hits, records)]
+
+    def context(self, message, skip_recent=None):
+        """
+        Args:
+            message (str): Current user message.
+            skip_recent (int | None): Newest turns short-term memory already
+                shows, e.g. ConversationMemory.recent_turns().
+
+        Returns:
+            str: Relevant past turns, oldest first ("" if none).
+        """
+        hits = sorted(self.recall(message, skip_recent=skip_recent), key=lambda hit: hit[1]["id"])
+        if not hits:
+            return ""
+        snippets = []
+        for _, record in hits:
+            when = time.strftime("%Y-%m-%d", time.localtime(record.get("time", 0)))
+            text = f"User: {record['user']}\nAssistant: {record['assistant']}"
+            if len(text) > self.snippet_chars:
+                text = text[:self.snippet_chars - 1].rstrip() + "…"
+            snippets.append(f"[{when}] {text}")
+        return "\n".join(snippets)
+
+    def report(self):
+        """
+        Returns:
+            dict: entries, embedder and add/recall latency.
+        """
+        return {
+            "entries": len(self.store),
+            "embedder": self.store.embedder.name,
+            "add": self.latency["add"].summary(),
+            "recall": self.latency["recall"].summary(),
+        }
+
+    def close(self):
+        self.store.flush()
+
+
+if __name__ == "__main__":
+    import sys
+    import shutil
+    import tempfile
+
+    # Recall quality on a small session, then search time as the store
+    # grows to a million rows: python -m agent.longterm [rows]
+    root = tempfile.mkdtemp()
+    memory = LongTermMemory(root, HashedEmbedder(), skip_recent=0)
+    turns = [
+        ("my cat is called Miso", "Nice name! How old is Miso?"),
+        ("I'm building a robot car with a Raspberry Pi", "Great, which motors are you using?"),
+        ("the meeting with Anna is on Friday at 3pm", "Noted, Friday 3pm with Anna."),
+        ("I prefer short answers", "Understood, I'll keep it brief."),
+        ("what's the capital of France", "Paris."),
+    ]
+    for user, assistant in turns:
+        memory.add(user, assistant)
+    for question in ("when is my meeting with anna", "what was my cat's name", "how is the robot going",
+                     "what should i cook tonight"):
+        best = memory.recall(question, k=1)
+        print(f"{question!r:34} -> {best[0][1]['user'] if best else None}")
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    store = VectorStore(os.path.join(root, "bench"), HashedEmbedder(384))
+    rng = np.random.default_rng(0)
+    query = store.embedder.embed(["when is my meeting with anna"])[0]
+    for size in (10_000, 100_000, rows):
+        while len(store) < size:
+            n = min(100_000, size - len(store))
+            vectors = rng.standard_normal((n, store.dim), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            store.add_vectors(vectors, [{"text": ""}] * n)
+        stats = LatencyStats(str(size))
+        for _ in range(10):
+            t0 = time.perf_counter()
+            store.search(query, k=4)
+            stats.record(time.perf_counter() - t0)
+        print(f"{size:>9,} rows: top-4 p50 {stats.summary()['p50_ms']:.1f} ms")
+    shutil.rmtree(root)
@@ -0,0 +1,369 @@
+import re
+import time
+import threading
+
+from agent.client import CLIENT
+from agent.streaming import OLLAMA_URL
+from stats import LatencyStats
+
+THINK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+Update the summary with the new lines. Keep names, facts, preferences, open tasks and decisions;
+drop greetings and filler. Write at most {words} words of plain text, no preamble.
+
+Current summary:
+{summary}
+
+New lines:
+{lines}
+
+Updated summary:"""
+
+
+def estimate_tokens(text):
+    """About four characters per token, the usual rule of thumb for English."""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def clip(text, tokens):
+    """Cut ``text`` to roughly ``tokens`` tokens, marking the cut."""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - 1)].rstrip() + "…"
+
+
+def ollama_summarizer(model="qwen3:0.6b", url=OLLAMA_URL, timeout=60):
+    """
+    Summarizer backed by a small local Ollama model.
+
+    Returns:
+        callable: (summary, lines, max_tokens) -> new summary.
+    """
+    def summarize(summary, lines, max_tokens):
+        prompt = SUMMARY_PROMPT.format(
+            words=max_tokens * 3 // 4, summary=summary or "(empty)", lines="\n".join(lines)
+        )
+        response = CLIENT.post(url, json={
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "think": False,
+            "options": {"num_predict": max_tokens * 2, "temperature": 0.2},
+        }, timeout=timeout)
+        response.raise_for_status()
+        return THINK.sub("", response.json().get("response", "")).strip()
+
+    return summarize
+
+
+def gemini_summarizer(model):
+    """
+    Summarizer backed by a Gemini model, for agents that do not run Ollama.
+
+    Args:
+        model: google.generativeai.GenerativeModel (a flash model is plenty).
+
+    Returns:
+        callable: (summary, lines, max_tokens) -> new summary.
+    """
+    def summarize(summary, lines, max_tokens):
+        prompt = SUMMARY_PROMPT.format(
+            words=max_tokens * 3 // 4, summary=summary or "(empty)", lines="\n".join(lines)
+        )
+        response = model.generate_content(prompt, generation_config={"temperature": 0.2})
+        return response.text.strip()
+
+    return summarize
+
+
+class ConversationMemory:
+    """
+    Short-term memory that fits a token budget.
+
+    Recent turns are kept verbatim. When they no longer fit in
+    ``budget - summary_budget`` tokens the oldest turns are evicted, and a
+    background thread folds them into a running summary with ``summarize``
+    (by default the local qwen3 model), a batch at a time, so a turn never
+    waits for it. Until a batch is folded in, its lines stay in memory and
+    are shown in the context as space allows; if the summarizer fails they
+    are retried with the next batch rather than dropped, after a backoff
+    that doubles per consecutive failure up to ``max_retry_delay``. At most
+    ``max_pending`` lines wait, and after ``max_failures`` failures in a row
+    summarizing is switched off with a single warning. Lines that cannot
+    wait any longer are not lost: they move to ``verbatim``, the newest
+    ``summary_budget`` tokens of them shown after the summary.
+
+    A summary that comes back longer than ``summary_budget`` is sent back
+    once to be compressed; if it is still too long it is kept whole rather
+    than cut mid-sentence.
+
+    context() is what goes into prompts: the summary followed by as many
+    recent lines as fit, never more than ``budget`` tokens, so prompt size
+    (and prefill time) stays flat however long the session runs.
+
+    Attributes:
+        budget (int): Token budget for the whole context.
+        summary_budget (int): Tokens reserved for the summary.
+        summary (str): Running summary of evicted turns.
+        verbatim (str): Evicted lines the summarizer could not take, clipped
+            to the newest ``summary_budget`` tokens.
+        counts (dict[str, int]): turns, evicted, summarized, failures,
+            recompressed, verbatim (lines kept verbatim).
+        latency (LatencyStats): Summarizer call latency.
+    """
+
+    def __init__(self, budget=400, summary_budget=150, summarize=None, labels=("U", "A"),
+                 min_batch=2, max_pending=128, max_failures=5, retry_delay=1.0, max_retry_delay=60.0):
+        """
+        Args:
+            budget (int): Context budget in tokens.
+            summary_budget (int): Part of it reserved for the summary.
+            summarize (callable | None): (summary, lines, max_tokens) -> summary.
+                Defaults to ollama_summarizer(); False disables summarizing.
+            labels (tuple): Prefixes for user and assistant lines.
+            min_batch (int): Evicted lines to collect before summarizing.
+            max_pending (int): Evicted lines kept while waiting for the summarizer.
+            max_failures (int): Failures in a row before summarizing is disabled.
+            retry_delay (float): First wait after a failure, in seconds.
+            max_retry_delay (float): Longest wait between retries.
+        """
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.summarize = ollama_summarizer() if summarize is None else summarize
+        self.labels = labels
+        self.min_batch = min_batch
+        self.max_pending = max_pending
+        self.max_failures = max_failures
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.summary = ""
+        self.verbatim = ""
+        self.counts = {"turns": 0, "evicted": 0, "summarized": 0, "failures": 0,
+                       "recompressed": 0, "verbatim": 0}
+        self.latency = LatencyStats("summarize")
+        self._recent = []
+        self._pending = []
+        self._inflight = 0    # oldest pending lines in the batch being summarized
+        self._overflow = []   # of those, lines add() already pushed out of pending
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._busy = False
+        self._warned = False
+        self._worker = None
+
+    # ================= UPDATES =================
+
+    def add(self, user, assistant):
+        """Record one turn, evicting old ones into the summary queue."""
+        user_label, assistant_label = self.labels
+        with self._lock:
+            self._recent += [f"{user_label}: {user}", f"{assistant_label}: {assistant}"]
+            self.counts["turns"] += 1
+            limit = self.budget - self.summary_budget
+            while len(self._recent) > 2 and sum(map(estimate_tokens, self._recent)) > limit:
+                self._pending.append(self._recent.pop(0))
+                self.counts["evicted"] += 1
+            if len(self._pending) > self.max_pending:
+                over = self._pending[:len(self._pending) - self.max_pending]
+                del self._pending[:len(over)]
+                # Lines of the running batch wait for its outcome.
+                inflight = min(len(over), self._inflight)
+                self._inflight -= inflight
+                self._overflow += over[:inflight]
+                self._keep_verbatim(over[inflight:])
+            if self.summarize and len(self._pending) >= self.min_batch:
+                self._start_worker()
+                self._wake.notify()
+
+    def _keep_verbatim(self, lines):
+        # Caller holds the lock.
+        if not lines:
+            return
+        self.counts["verbatim"] += len(lines)
+        text = " ".join(filter(None, [self.verbatim] + list(lines)))
+        limit = self.summary_budget * 4
+        self.verbatim = text if len(text) <= limit else "…" + text[-(limit - 1):].lstrip()
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="memory-summary", daemon=True)
+            self._worker.start()
+
+    def _fold(self, summary, batch):
+        updated = self.summarize(summary, batch, self.summary_budget)
+        if updated and estimate_tokens(updated) > self.summary_budget:
+            shorter = self.summarize("", [updated], self.summary_budget)
+            with self._lock:
+                self.counts["recompressed"] += 1
+            if shorter and len(shorter) < len(updated):
+                updated = shorter
+        return updated
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._lock:
+                while len(self._pending) < self.min_batch:
+                    self._wake.wait()
+                batch = list(self._pending)
+                self._inflight, self._overflow = len(batch), []
+                summary = self.summary
+                self._busy = True
+
+            t0 = time.perf_counter()
+            try:
+                updated = self._fold(summary, batch)
+            except Exception as e:
+                if not self._warned:
+                    self._warned = True
+                    print("[WARN] Memory summary failed (retrying with backoff):", e)
+                updated = None
+            self.latency.record(time.perf_counter() - t0)
+
+            with self._lock:
+                if updated:
+                    self.summary = updated
+                    del self._pending[:self._inflight]
+                    self.counts["summarized"] += len(batch)
+                    failures = 0
+                else:
+                    self.counts["failures"] += 1
+                    failures += 1
+                    self._keep_verbatim(self._overflow)
+                    if failures >= self.max_failures:
+                        print(f"[WARN] Memory summary disabled after {failures} failures in a row")
+                        self.summarize = False
+                        self._keep_verbatim(self._pending)
+                        self._pending.clear()
+                self._inflight, self._overflow = 0, []
+                self._busy = False
+                self._wake.notify_all()
+                if not self.summarize:
+                    self._worker = None
+                    return
+            if not updated:
+                # back off before retrying with a larger batch
+                time.sleep(min(self.max_retry_delay, self.retry_delay * 2 ** (failures - 1)))
+
+    def wait(self, timeout=None):
+        """
+        Block until queued lines are summarized (or ``timeout`` passes).
+
+        Returns:
+            bool: True if nothing is left pending.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._busy or (self.summarize and len(self._pending) >= self.min_batch):
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._wake.wait(remaining)
+            return not self._pending
+
+    # ================= PROMPT CONTEXT =================
+
+    def context(self):
+        """
+        Returns:
+            str: Summary plus the recent lines that fit in ``budget`` tokens.
+        """
+        header, recent = self._visible()
+        return "\n".join(([header] if header else []) + recent)
+
+    def recent_turns(self):
+        """
+        Returns:
+            int: Newest turns with at least one line shown by context(), e.g.
+                the ``skip_recent`` for LongTermMemory.context.
+        """
+        _, recent = self._visible()
+        return (len(recent) + 1) // 2
+
+    def _visible(self):
+        # Lines always come in (user, assistant) pairs, newest last.
+        with self._lock:
+            summary, verbatim = self.summary, self.verbatim
+            lines = self._pending + self._recent
+
+        header = ""
+        used = 0
+        if summary or verbatim:
+            header = "\n".join(filter(None, [
+                summary and f"Summary of earlier conversation: {summary}",
+                verbatim and f"Earlier lines (not summarized): {verbatim}",
+            ]))
+            used = estimate_tokens(header)
+
+        # Newest lines first; a single oversized line is clipped to what is left.
+        recent = []
+        for line in reversed(lines):
+            left = self.budget - used
+            if left <= 0:
+                break
+            cost = estimate_tokens(line)
+            if cost > left:
+                if recent:
+                    break
+                line, cost = clip(line, left), left
+            recent.append(line)
+            used += cost
+        return header, recent[::-1]
+
+    def tokens(self):
+        return estimate_tokens(self.context())
+
+    def report(self):
+        """
+        Returns:
+            dict: counts, context/summary/verbatim size in tokens, pending
+                lines and summarizer latency.
+        """
+        with self._lock:
+            pending = len(self._pending)
+            summary_tokens = estimate_tokens(self.summary)
+            verbatim_tokens = estimate_tokens(self.verbatim)
+        return {
+            **self.counts,
+            "pending": pending,
+            "summary_tokens": summary_tokens,
+            "verbatim_tokens": verbatim_tokens,
+            "context_tokens": self.tokens(),
+            "summarize": self.latency.summary(),
+        }
+
+
+if __name__ == "__main__":
+    import random
+
+    # Prompt size over a long session: raw history vs the last 6 lines vs the
+    # token-budgeted memory, with a 300 ms stand-in for the qwen3 summary
+    # call: python -m agent.memory
+    def keyword_summary(summary, lines, max_tokens):
+        time.sleep(0.3)
+        facts = summary.split("; ") if summary else []
+        facts += [line.split(": ", 1)[1].split(".")[0] for line in lines if line.startswith("U:")]
+        return clip("; ".join(dict.fromkeys(facts)), max_tokens)
+
+    rng = random.Random(0)
+    topics = ["my cat is called Miso", "I work on a robot car", "the meeting is at 3pm",
+              "I prefer short answers", "the camera is on the left", "my sister lives in Lyon"]
+    memory = ConversationMemory(budget=300, summary_budget=100, summarize=keyword_summary)
+    raw, last_lines = [], []
+    for turn in range(1, 41):
+        user = f"{rng.choice(topics)}. Question {turn}?"
+        answer = "Sure. " + "Here is a fairly long explanation. " * rng.randint(2, 20)
+        raw += [f"U: {user}", f"A: {answer}"]
+        last_lines = raw[-6:]
+        memory.add(user, answer)
+        if turn % 10 == 0:
+            print(f"turn {turn:2d}: raw {estimate_tokens(chr(10).join(raw)):5d} tokens, "
+                  f"last 6 lines {estimate_tokens(chr(10).join(last_lines)):4d}, "
+                  f"budgeted {memory.tokens():3d}")
+    memory.wait(timeout=5)
+    print(memory.context().splitlines()[0])
+    print(memory.report())
@@ -0,0 +1,506 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from agent.streaming import OLLAMA_URL, gemini_deltas, hf_deltas, ollama_deltas
+from stats import LatencyStats
+from vision.encoder import BudgetEncoder
+from vision.frame import Frame
+
+
+class ProviderError(Exception):
+    """
+    Every provider tried for a request failed or the deadline passed.
+
+    Attributes:
+        errors (dict[str, Exception]): Failure per provider name.
+    """
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+class ProviderBusy(Exception):
+    """A provider had no free concurrency slot before the deadline (not a failure)."""
+
+
+class Deadline:
+    """
+    Absolute time limit for one request, handed down to every attempt so
+    retries, queueing and hedges all share the same budget.
+    """
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+# ============================================================
+# 1. PROVIDERS
+# ============================================================
+
+class Reply:
+    """
+    The winning provider's text deltas.
+
+    Iterating yields the first delta (already received) and then the rest
+    of the stream. close() releases the provider's concurrency slot; it runs
+    automatically when iteration ends.
+
+    Attributes:
+        provider (str): Name of the provider that answered.
+    """
+
+    def __init__(self, provider, first, deltas, release):
+        self.provider = provider
+        self._first = first
+        self._deltas = deltas
+        self._release = release
+        self._closed = False
+
+    def __iter__(self):
+        try:
+            yield self._first
+            yield from self._deltas
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        close = getattr(self._deltas, "close", None)
+        if close:
+            close()
+        self._release()
+
+
+class Provider:
+    """
+    One model backend behind a common interface.
+
+    Subclasses implement ``deltas(prompt, image, deadline)``, a blocking
+    iterator of text deltas (see agent.streaming). The async ``open`` runs it
+    in a worker thread under a per-provider semaphore and returns once the
+    first delta arrives, so the router can race providers on
+    time-to-first-token.
+
+    Attributes:
+        name (str): Provider label.
+        concurrency (int): Requests allowed in flight at once.
+        profile (str): vision.encoder profile used for images.
+        latency (dict[str, LatencyStats]): "ttft" of successful attempts.
+        counts (dict[str, int]): started, won, failed, cancelled, busy.
+    """
+
+    profile = None
+    _encoders = {}
+
+    def __init__(self, name, concurrency=2):
+        self.name = name
+        self.concurrency = concurrency
+        self.latency = {"ttft": LatencyStats(f"{name}-ttft")}
+        self.counts = {"started": 0, "won": 0, "failed": 0, "cancelled": 0, "busy": 0}
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def deltas(self, prompt, image=None, deadline=None):
+        raise NotImplementedError
+
+    def encode(self, image):
+        """
+        Fit an image to this provider's upload budget.
+
+        Args:
+            image (Frame | PIL.Image.Image): Screen captures (source "screen")
+                use text mode.
+
+        Returns:
+            vision.encoder.Encoded
+        """
+        if isinstance(image, Image.Image):
+            image = Frame.from_pil(image)
+        key = (self.profile, image.source == "screen")
+        if key not in Provider._encoders:
+            Provider._encoders[key] = BudgetEncoder.for_provider(self.profile, text=key[1])
+        return Provider._encoders[key].encode(image)
+
+    def hedge_delay(self, quantile_key="p95_ms", default=3.0, min_samples=5):
+        """
+        Returns:
+            float: Seconds to wait before hedging this provider: its recent
+                p95 time-to-first-token, or ``default`` until enough samples.
+        """
+        summary = self.latency["ttft"].summary()
+        if summary["count"] < min_samples:
+            return default
+        return summary[quantile_key] / 1000
+
+    def busy(self):
+        """True while every concurrency slot is taken (router loop only)."""
+        return self._semaphore is not None and self._semaphore.locked()
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _first(self, prompt, image, deadline):
+        t0 = time.perf_counter()
+        deltas = iter(self.deltas(prompt, image, deadline))
+        for first in deltas:
+            self.latency["ttft"].record(time.perf_counter() - t0)
+            return first, deltas
+        raise ValueError(f"{self.name} returned an empty reply")
+
+    async def open(self, prompt, image, deadline, pool):
+        """
+        Start a request and wait for its first delta.
+
+        Args:
+            prompt (str): Full prompt.
+            image (Frame | PIL.Image.Image | None): Optional image.
+            deadline (Deadline): Shared request deadline.
+            pool (ThreadPoolExecutor): Runs the blocking backend call.
+
+        Returns:
+            Reply
+
+        Raises:
+            ProviderBusy: No slot freed up before the deadline.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), deadline.remaining())
+        except asyncio.TimeoutError:
+            self._count("busy")
+            raise ProviderBusy(f"{self.name} had no free slot") from None
+
+        loop = asyncio.get_running_loop()
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                loop.call_soon_threadsafe(self._semaphore.release)
+
+        self._count("started")
+        future = pool.submit(self._first, prompt, image, deadline)
+        try:
+            first, deltas = await asyncio.wrap_future(future)
+        except BaseException as e:
+            # A call already running in its thread cannot be interrupted: once
+            # it returns, close the stream and free the slot.
+            def finish(done):
+                if not done.cancelled() and done.exception() is None:
+                    Reply(self.name, *done.result(), release).close()
+                else:
+                    release()
+
+            future.add_done_callback(finish)
+            self._count("cancelled" if isinstance(e, asyncio.CancelledError) else "failed")
+            raise
+        return Reply(self.name, first, deltas, release)
+
+
+class OllamaProvider(Provider):
+    """Local Ollama model (/api/generate)."""
+
+    profile = "ollama"
+
+    def __init__(self, model, url=OLLAMA_URL, name="ollama", concurrency=1, **options):
+        super().__init__(name, concurrency)
+        self.model = model
+        self.url = url
+        self.options = options
+
+    def deltas(self, prompt, image=None, deadline=None):
+        deadline = deadline or Deadline(120)
+        images = [self.encode(image).base64()] if image is not None else None
+        return ollama_deltas(prompt, self.model, images=images, url=self.url,
+                             deadline=deadline.remaining(), **self.options)
+
+
+class GeminiProvider(Provider):
+    """google.generativeai GenerativeModel. PIL images are sent as given."""
+
+    profile = "gemini"
+
+    def __init__(self, model, name="gemini", concurrency=4):
+        super().__init__(name, concurrency)
+        self.model = model
+
+    def deltas(self, prompt, image=None, deadline=None):
+        deadline = deadline or Deadline(120)
+        contents = prompt
+        if image is not None:
+            contents = [prompt, image if isinstance(image, Image.Image) else self.encode(image).pil()]
+        return gemini_deltas(self.model, contents, request_options={"timeout": max(deadline.remaining(), 1)})
+
+
+class HFProvider(Provider):
+    """Hugging Face inference endpoint (text, or text + base64 image)."""
+
+    profile = "hf"
+
+    def __init__(self, url, headers, max_new_tokens=200, name="hf", concurrency=2):
+        super().__init__(name, concurrency)
+        self.url = url
+        self.headers = headers
+        self.max_new_tokens = max_new_tokens
+
+    def deltas(self, prompt, image=None, deadline=None):
+        deadline = deadline or Deadline(120)
+        inputs = prompt
+        if image is not None:
+            inputs = {"text": prompt, "image": self.encode(image).base64()}
+        payload = {"inputs": inputs, "parameters": {"max_new_tokens": self.max_new_tokens}}
+        return hf_deltas(self.url, self.headers, payload, deadline=deadline.remaining())
+
+
+# ============================================================
+# 2. HEDGING ROUTER
+# ============================================================
+
+class ProviderRouter:
+    """
+    Races providers for each request under a shared deadline.
+
+    The first provider in ``order`` starts immediately. If it has not
+    produced a first token after its own recent p95 time-to-first-token
+    (``hedge_delay``), the next provider is started as a hedge and whichever
+    answers first wins; the loser is cancelled (or, if its call is already
+    running, discarded when it returns). When a provider fails (HTTP error,
+    model still loading, network), the next one starts right away and
+    becomes the provider the hedge timer follows. Nothing waits past the
+    deadline: the request then raises ProviderError.
+
+    Health is tracked per provider across requests: after ``max_failures``
+    failures in a row a provider is demoted for ``cooldown`` seconds, i.e.
+    tried only after the healthy ones, so a backend that is down does not
+    cost every request a failed attempt. Its next success restores it.
+    A provider whose concurrency slots are all taken is busy, not failing:
+    an idle provider is started ahead of it, and running out of time while
+    waiting for a slot (ProviderBusy) never counts towards demotion.
+
+    The router owns an asyncio loop on a background thread, so the threaded
+    scripts call the blocking ``deltas()``; async code can await ``open()``
+    on that loop.
+
+    Attributes:
+        providers (dict[str, Provider]): By name.
+        order (list[str]): Default preference order.
+        deadline (float): Default seconds allowed until the first token.
+        hedge (bool): Start hedges (False = fallback only).
+        counts (dict[str, int]): requests, hedges, fallbacks, failures, demotions.
+        latency (LatencyStats): Time until the winning first token.
+    """
+
+    def __init__(self, providers, deadline=30.0, hedge=True, default_hedge_delay=3.0,
+                 min_hedge_delay=0.25, max_failures=2, cooldown=30.0):
+        """
+        Args:
+            providers (list[Provider]): In default preference order.
+            deadline (float): Default per-request deadline in seconds.
+            hedge (bool): Hedge slow primaries.
+            default_hedge_delay (float): Hedge delay until a provider has a p95.
+            min_hedge_delay (float): Never hedge sooner than this.
+            max_failures (int): Failures in a row before a provider is demoted.
+            cooldown (float): Seconds a demoted provider stays at the back.
+        """
+        self.providers = {p.name: p for p in providers}
+        self.order = [p.name for p in providers]
+        self.deadline = deadline
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.counts = {"requests": 0, "hedges": 0, "fallbacks": 0, "failures": 0, "demotions": 0}
+        self._failures = {name: 0 for name in self.order}
+        self._demoted_until = {name: 0.0 for name in self.order}
+        self.latency = LatencyStats("first-token")
+        self._pool = ThreadPoolExecutor(max_workers=sum(p.concurrency for p in providers) + len(providers),
+                                        thread_name_prefix="provider")
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="provider-loop", daemon=True).start()
+
+    # ================= HEALTH =================
+    # Only touched from the router's event loop.
+
+    def demoted(self):
+        """
+        Returns:
+            list[str]: Providers currently demoted.
+        """
+        now = time.monotonic()
+        return [name for name in self.order if self._demoted_until[name] > now]
+
+    def _ordered(self, order):
+        names = order or self.order
+        demoted = set(self.demoted())
+        return [n for n in names if n not in demoted] + [n for n in names if n in demoted]
+
+    def _succeeded(self, name):
+        self._failures[name] = 0
+        self._demoted_until[name] = 0.0
+
+    def _failed(self, name):
+        self._failures[name] += 1
+        if self._failures[name] >= self.max_failures and self._demoted_until[name] <= time.monotonic():
+            self._demoted_until[name] = time.monotonic() + self.cooldown
+            self.counts["demotions"] += 1
+
+    async def open(self, prompt, image=None, deadline=None, order=None):
+        """
+        Args:
+            prompt (str): Full prompt.
+            image (Frame | PIL.Image.Image | None): Optional image.
+            deadline (Deadline | float | None): Shared deadline (default ``self.deadline``).
+            order (list[str] | None): Providers to try, overriding the default
+                (demoted ones still move to the back).
+
+        Returns:
+            Reply: Stream of the provider that answered first.
+
+        Raises:
+            ProviderError: All providers failed or the deadline passed.
+        """
+        if not isinstance(deadline, Deadline):
+            deadline = Deadline(self.deadline if deadline is None else deadline)
+        t0 = time.perf_counter()
+        self.counts["requests"] += 1
+        waiting = [self.providers[name] for name in self._ordered(order)]
+        running = {}
+        errors = {}
+        hedged = False
+        # The provider the hedge timer follows and when it started.
+        primary, started = None, None
+
+        def launch():
+            # Saturated providers are skipped while an idle one is waiting.
+            nonlocal primary, started
+            provider = next((p for p in waiting if not p.busy()), waiting[0])
+            waiting.remove(provider)
+            task = asyncio.ensure_future(provider.open(prompt, image, deadline, self._pool))
+            running[task] = provider
+            primary, started = provider, time.perf_counter()
+
+        launch()
+        try:
+            while running and not deadline.expired:
+                timeout = deadline.remaining()
+                if self.hedge and not hedged and waiting:
+                    delay = max(self.min_hedge_delay, primary.hedge_delay(default=self.default_hedge_delay))
+                    timeout = min(timeout, max(0.0, delay - (time.perf_counter() - started)))
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if self.hedge and not hedged and waiting and not deadline.expired:
+                        hedged = True
+                        self.counts["hedges"] += 1
+                        launch()
+                    continue
+
+                winner = None
+                for task in done:
+                    provider = running.pop(task)
+                    if task.exception() is not None:
+                        errors[provider.name] = task.exception()
+                        if not isinstance(task.exception(), ProviderBusy):
+                            self._failed(provider.name)
+                    elif winner is None:
+                        winner = task.result()
+                        provider._count("won")
+                        self._succeeded(provider.name)
+                    else:
+                        task.result().close()
+                if winner is not None:
+                    self.latency.record(time.perf_counter() - t0)
+                    return winner
+                if not running and waiting:
+                    self.counts["fallbacks"] += 1
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        self.counts["failures"] += 1
+        if not errors:
+            raise ProviderError("deadline passed before any provider answered", errors)
+        raise ProviderError("; ".join(f"{name}: {e!r}" for name, e in errors.items()), errors)
+
+    def deltas(self, prompt, image=None, deadline=None, order=None):
+        """
+        Blocking generator over the winning reply; usable as the ``start``
+        of agent.streaming.cached_stream.
+
+        Yields:
+            str: Text deltas.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.open(prompt, image, deadline, order), self._loop)
+        yield from future.result()
+
+    def report(self):
+        """
+        Returns:
+            dict: router counts, first-token latency, demoted providers and
+                per-provider counts/ttft.
+        """
+        return {
+            **self.counts,
+            "first_token": self.latency.summary(),
+            "demoted": self.demoted(),
+            "providers": {
+                name: {**p.counts, "ttft": p.latency["ttft"].summary()} for name, p in self.providers.items()
+            },
+        }
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import random
+
+    # A primary that stalls 10% of the time and fails 5% of the time,
+    # backed by a slower but steady secondary: python -m agent.providers
+    class Simulated(Provider):
+        def __init__(self, name, ttft, stall=0.0, fail=0.0, seed=0):
+            super().__init__(name, concurrency=4)
+            self.ttft, self.stall, self.fail = ttft, stall, fail
+            self.random = random.Random(seed)
+
+        def deltas(self, prompt, image=None, deadline=None):
+            roll = self.random.random()
+            if roll < self.fail:
+                time.sleep(0.05)
+                raise ConnectionError(f"{self.name} unavailable")
+            time.sleep(3.0 if roll < self.fail + self.stall else self.ttft * self.random.uniform(0.8, 1.2))
+            for word in f"answer from {self.name}".split():
+                yield word + " "
+
+    for hedge in (False, True):
+        router = ProviderRouter(
+            [Simulated("primary", 0.15, stall=0.10, fail=0.05), Simulated("secondary", 0.4, seed=1)],
+            deadline=5.0, hedge=hedge,
+        )
+        for i in range(60):
+            "".join(router.deltas(f"question {i}"))
+        report = router.report()
+        first = report["first_token"]
+        print(f"hedge={hedge!s:5s}: p50 {first['p50_ms']:.0f} ms, p95 {first['p95_ms']:.0f} ms, "
+              f"max {first['max_ms']:.0f} ms | hedges {report['hedges']}, fallbacks {report['fallbacks']}, "
+              f"wins {({n: p['won'] for n, p in report['providers'].items()})}")
+        router.close()
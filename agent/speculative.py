@@ -0,0 +1,267 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from stats import LatencyStats
+
+
+def _discard(future):
+    # Drop queued work; results that support close() (e.g. a prefetching
+    # agent.streaming.Stream) are closed so they stop consuming the backend.
+    if future.cancel():
+        return
+
+    def close(done):
+        if not done.cancelled() and done.exception() is None:
+            close_result = getattr(done.result(), "close", None)
+            if close_result:
+                close_result()
+
+    future.add_done_callback(close)
+
+
+class SpeculationPolicy:
+    """
+    Decides what to start before the intent is known.
+
+    * Captures are local (no API cost), so they are prefetched whenever the
+      classifier gives their intent at least ``min_capture_probability``.
+    * The CHAT call costs a remote request, so it is only speculated when
+      CHAT has at least ``min_chat_probability`` and the recent waste rate
+      is within ``max_waste_rate``. The waste rate is the share of recent
+      eligible turns (CHAT probability above the bar) that did *not* turn
+      out to be CHAT, tracked over the last ``window`` such turns whether
+      or not they were speculated, so a policy that backed off can recover.
+
+    Attributes:
+        min_chat_probability (float): CHAT probability needed to speculate.
+        max_waste_rate (float): Highest tolerated share of wasted CHAT calls.
+        min_capture_probability (float): Probability needed to prefetch a capture.
+    """
+
+    def __init__(self, min_chat_probability=0.3, max_waste_rate=0.3, window=20,
+                 min_capture_probability=0.05):
+        self.min_chat_probability = min_chat_probability
+        self.max_waste_rate = max_waste_rate
+        self.min_capture_probability = min_capture_probability
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @property
+    def waste_rate(self):
+        with self._lock:
+            return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def chat(self, probabilities):
+        """
+        Returns:
+            bool: True to start the CHAT call speculatively.
+        """
+        return (probabilities.get("CHAT", 0.0) >= self.min_chat_probability
+                and self.waste_rate <= self.max_waste_rate)
+
+    def capture(self, intent, probabilities):
+        """
+        Returns:
+            bool: True to prefetch the capture for ``intent``.
+        """
+        return probabilities.get(intent, 0.0) >= self.min_capture_probability
+
+    def record(self, probabilities, intent):
+        """Feed back the resolved intent of a turn the policy was asked about."""
+        if probabilities.get("CHAT", 0.0) >= self.min_chat_probability:
+            with self._lock:
+                self._outcomes.append(intent == "CHAT")
+
+
+class SpeculativeTurn:
+    """
+    Result of SpeculativeExecutor.run.
+
+    Attributes:
+        intent (str): Resolved intent.
+        routed (RoutedIntent): Router result (tier, confidence).
+        speculated (bool): Whether any branch was started before the intent.
+    """
+
+    def __init__(self, intent, routed, speculated, chat, captures):
+        self.intent = intent
+        self.routed = routed
+        self.speculated = speculated
+        self._chat = chat
+        self._captures = captures
+
+    def capture(self):
+        """
+        Returns:
+            The prefetched capture for this intent, or a fresh one.
+        """
+        return self._captures()
+
+    def chat(self):
+        """
+        Returns:
+            The CHAT reply: the speculative call's result, or a fresh call.
+        """
+        return self._chat()
+
+
+class SpeculativeExecutor:
+    """
+    Overlaps intent classification with the branches it might select.
+
+    When the local classifier is confident the intent is known in
+    microseconds and nothing is speculated. Otherwise, while the router's
+    fallback (the Ollama call) runs, the executor prefetches camera/screen
+    captures and, if the policy allows, starts the CHAT reply. Once the
+    intent resolves, the matching branch is committed and the others are
+    cancelled. Queued work is dropped; a request already in flight cannot
+    be aborted, so its result is discarded and counted as wasted.
+
+    Attributes:
+        router (IntentRouter): Intent tiers.
+        policy (SpeculationPolicy): What to start early.
+        counts (dict[str, int]): turns, speculative turns, chat calls
+            started/used/wasted, captures started/used/wasted.
+        latency (dict[str, LatencyStats]): "intent" (until the intent is known)
+            and "branch" (until the committed reply or capture is ready).
+    """
+
+    def __init__(self, router, chat, captures, policy=None, max_workers=4):
+        """
+        Args:
+            router (IntentRouter): Local classifier + fallback.
+            chat (callable): text -> reply for CHAT turns.
+            captures (dict[str, callable]): intent -> () -> capture (e.g. a Frame).
+            policy (SpeculationPolicy | None): Defaults to SpeculationPolicy().
+            max_workers (int): Thread pool size.
+        """
+        self.router = router
+        self._chat = chat
+        self._captures = dict(captures)
+        self.policy = policy or SpeculationPolicy()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self.counts = {key: 0 for key in ("turns", "speculative_turns", "chat_started", "chat_used",
+                                          "chat_wasted", "capture_started", "capture_used",
+                                          "capture_wasted")}
+        self.latency = {"intent": LatencyStats("intent"), "branch": LatencyStats("branch")}
+
+    def run(self, text):
+        """
+        Classify ``text`` while speculatively starting its likely branches.
+
+        Returns:
+            SpeculativeTurn
+        """
+        t0 = time.perf_counter()
+        self.counts["turns"] += 1
+        intent, confidence = self.router.classifier.predict(text)
+        if self.router.confident(intent, confidence):
+            routed = self.router.route(text)
+            self.latency["intent"].record(time.perf_counter() - t0)
+            return self._commit(text, routed, None, {}, t0)
+
+        probs = self.router.classifier.probabilities(text)
+        intent_future = self._pool.submit(self.router.route, text)
+        captures = {
+            intent: self._pool.submit(capture)
+            for intent, capture in self._captures.items() if self.policy.capture(intent, probs)
+        }
+        chat_future = self._pool.submit(self._chat, text) if self.policy.chat(probs) else None
+        self.counts["speculative_turns"] += bool(captures or chat_future)
+        self.counts["capture_started"] += len(captures)
+        self.counts["chat_started"] += chat_future is not None
+
+        routed = intent_future.result()
+        self.latency["intent"].record(time.perf_counter() - t0)
+        self.policy.record(probs, routed.intent)
+        return self._commit(text, routed, chat_future, captures, t0)
+
+    def _commit(self, text, routed, chat_future, captures, t0):
+        intent = routed.intent
+        for name, future in captures.items():
+            if name != intent:
+                _discard(future)
+                self.counts["capture_wasted"] += 1
+        if chat_future is not None and intent != "CHAT":
+            _discard(chat_future)
+            self.counts["chat_wasted"] += 1
+
+        def chat():
+            if chat_future is not None:
+                self.counts["chat_used"] += 1
+                reply = chat_future.result()
+            else:
+                reply = self._chat(text)
+            self.latency["branch"].record(time.perf_counter() - t0)
+            return reply
+
+        def capture():
+            future = captures.get(intent)
+            if future is not None:
+                self.counts["capture_used"] += 1
+                result = future.result()
+            else:
+                result = self._captures[intent]()
+            self.latency["branch"].record(time.perf_counter() - t0)
+            return result
+
+        return SpeculativeTurn(intent, routed, bool(captures or chat_future), chat, capture)
+
+    def report(self):
+        """
+        Returns:
+            dict: counters, CHAT waste rate and intent/branch latency summaries.
+        """
+        return {
+            **self.counts,
+            "chat_waste_rate": self.policy.waste_rate,
+            "intent": self.latency["intent"].summary(),
+            "branch": self.latency["branch"].summary(),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import random
+
+    from agent.intent import IntentRouter
+
+    # Sequential vs speculative turns with a 1 s intent fallback, a 300 ms
+    # capture and a 1.5 s chat call: python -m agent.speculative
+    def fallback(text):
+        time.sleep(1.0)
+        return "SCREENSHOT" if "screen" in text else "CAMERA" if "see" in text else "CHAT"
+
+    def chat(text):
+        time.sleep(1.5)
+        return f"reply to {text}"
+
+    def capture():
+        time.sleep(0.3)
+        return "frame"
+
+    rng = random.Random(0)
+    turns = [rng.choice(["hmm what about the screen thing", "so what would you see here",
+                         "ok so about yesterday", "anything else interesting"]) for _ in range(8)]
+
+    router = IntentRouter(fallback)
+    t0 = time.perf_counter()
+    for text in turns:
+        intent = router.route(text).intent
+        capture() if intent in ("CAMERA", "SCREENSHOT") else chat(text)
+    sequential = time.perf_counter() - t0
+
+    executor = SpeculativeExecutor(IntentRouter(fallback), chat, {"CAMERA": capture, "SCREENSHOT": capture})
+    t0 = time.perf_counter()
+    for text in turns:
+        turn = executor.run(text)
+        turn.capture() if turn.intent in ("CAMERA", "SCREENSHOT") else turn.chat()
+    speculative = time.perf_counter() - t0
+    executor.close()
+
+    print(f"sequential {sequential:.1f}s, speculative {speculative:.1f}s")
+    print(executor.report())
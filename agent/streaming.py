@@ -0,0 +1,288 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+from agent.client import CLIENT, OLLAMA_BASE
+from stats import LatencyStats
+
+OLLAMA_URL = OLLAMA_BASE + "/api/generate"
+
+# name -> {"ttft": LatencyStats, "total": LatencyStats}
+STATS = defaultdict(lambda: {"ttft": LatencyStats("ttft"), "total": LatencyStats("total")})
+
+
+# ============================================================
+# 1. BACKEND DELTA ITERATORS
+# ============================================================
+
+def ollama_deltas(prompt, model, images=None, url=OLLAMA_URL, timeout=None, deadline=None, **options):
+    """
+    Stream an Ollama /api/generate call.
+
+    Ollama answers with one JSON object per line; each carries the next
+    piece of text in ``response`` until ``done`` is true. ``timeout`` and
+    ``deadline`` go to CLIENT.request (None: the endpoint default, no deadline).
+
+    Yields:
+        str: Text deltas.
+    """
+    payload = {"model": model, "prompt": prompt, "stream": True, **options}
+    if images:
+        payload["images"] = images
+    with CLIENT.post(url, json=payload, stream=True, timeout=timeout, deadline=deadline) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                return
+
+
+def gemini_deltas(model, contents, **kwargs):
+    """
+    Stream a google.generativeai GenerativeModel call.
+
+    ``chunk.text`` raises ValueError for a chunk that was blocked or has no
+    text parts; such chunks are skipped. A stream that yields no text at all
+    raises ValueError with the finish reason, so callers can fall back.
+
+    Yields:
+        str: Text deltas.
+    """
+    reason = None
+    answered = False
+    for chunk in model.generate_content(contents, stream=True, **kwargs):
+        try:
+            text = chunk.text
+        except ValueError:
+            reason = _finish_reason(chunk)
+            continue
+        if text:
+            answered = True
+            yield text
+    if not answered and reason:
+        raise ValueError(f"Gemini returned no text (finish reason: {reason})")
+    if reason not in (None, "STOP"):
+        print(f"[WARN] Gemini stopped early (finish reason: {reason})")
+
+
+def _finish_reason(chunk):
+    try:
+        reason = chunk.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        reason = getattr(getattr(chunk, "prompt_feedback", None), "block_reason", None)
+    return getattr(reason, "name", None) or str(reason or "unknown")
+
+
+def hf_deltas(url, headers, payload, timeout=None, deadline=None):
+    """
+    Stream a Hugging Face inference call.
+
+    Text-generation endpoints stream server-sent events (``data: {...}``)
+    carrying either ``token.text`` (TGI) or ``choices[0].delta.content``
+    (OpenAI-style). Endpoints that ignore ``stream`` answer with one JSON
+    body; its ``generated_text`` is yielded as a single delta. HTTP errors
+    raise requests.HTTPError (with the response attached), any other body
+    raises ValueError. ``timeout`` and ``deadline`` are as for ollama_deltas.
+
+    Yields:
+        str: Text deltas.
+    """
+    payload = {**payload, "stream": True}
+    with CLIENT.post(url, headers=headers, json=payload, stream=True, timeout=timeout,
+                     deadline=deadline) as response:
+        if response.status_code != 200:
+            raise requests.HTTPError(f"HTTP {response.status_code}: {response.text}", response=response)
+        if "text/event-stream" not in response.headers.get("Content-Type", ""):
+            result = response.json()
+            if not (isinstance(result, list) and result and "generated_text" in result[0]):
+                raise ValueError(f"Unexpected response: {result}")
+            yield result[0]["generated_text"]
+            return
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            event = json.loads(data)
+            if event.get("token", {}).get("special"):
+                continue
+            text = event.get("token", {}).get("text")
+            if text is None and event.get("choices"):
+                text = event["choices"][0].get("delta", {}).get("content")
+            if text:
+                yield text
+
+
+# ============================================================
+# 2. TIMED STREAM
+# ============================================================
+
+_END = object()
+
+
+class Stream:
+    """
+    Iterator of text deltas that measures time-to-first-token.
+
+    Wraps any delta iterator. Iterating yields the deltas and accumulates
+    ``text``; when the first delta arrives ``ttft`` is recorded, and when
+    the iterator ends both are added to STATS[name] and logged.
+
+    With ``prefetch=True`` a thread starts consuming the backend right away
+    and buffers deltas, so generation runs ahead of the consumer (used to
+    start a reply speculatively). close() stops a prefetching stream.
+
+    Attributes:
+        name (str): Backend label for stats and logs.
+        text (str): Everything received so far.
+        ttft (float | None): Seconds until the first delta.
+        total (float | None): Seconds until the stream ended.
+    """
+
+    def __init__(self, deltas, name="model", prefetch=False, log=True):
+        self.name = name
+        self.text = ""
+        self.ttft = None
+        self.total = None
+        self.log = log
+        self._start = time.perf_counter()
+        self._deltas = iter(deltas)
+        self._queue = None
+        self._closed = threading.Event()
+        if prefetch:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._pump, name=f"stream-{name}", daemon=True).start()
+
+    @classmethod
+    def of(cls, text, name="cache"):
+        """A finished stream holding ``text`` (e.g. a cache hit)."""
+        return cls([text], name=name, log=False)
+
+    def _pump(self):
+        try:
+            for delta in self._deltas:
+                if self._closed.is_set():
+                    break
+                self._queue.put(delta)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            close = getattr(self._deltas, "close", None)
+            if close:
+                close()
+            self._queue.put(_END)
+
+    def _next_delta(self):
+        if self._queue is None:
+            return next(self._deltas, _END)
+        item = self._queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def __iter__(self):
+        while True:
+            delta = self._next_delta()
+            if delta is _END:
+                break
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - self._start
+                STATS[self.name]["ttft"].record(self.ttft)
+            self.text += delta
+            yield delta
+        self.total = time.perf_counter() - self._start
+        STATS[self.name]["total"].record(self.total)
+        if self.log and self.ttft is not None:
+            print(f"\n[stream] {self.name}: first token {self.ttft * 1000:.0f} ms, "
+                  f"done in {self.total:.2f}s")
+
+    def read(self):
+        """Consume the rest of the stream and return the full text."""
+        for _ in self:
+            pass
+        return self.text
+
+    def close(self):
+        self._closed.set()
+
+
+def print_stream(stream, prefix="Agent: "):
+    """
+    Print deltas as they arrive.
+
+    Returns:
+        str: The full, stripped text.
+    """
+    print(prefix, end="", flush=True)
+    for delta in stream:
+        print(delta, end="", flush=True)
+    print()
+    return stream.text.strip()
+
+
+def cached_stream(cache, namespace, text, start, name, prefetch=False, **key):
+    """
+    Stream through a ResponseCache: hits come back as a finished stream,
+    misses stream live and are stored once complete.
+
+    Args:
+        cache (agent.cache.ResponseCache | None): Cache, or None to always stream.
+        namespace (str): Cache namespace.
+        text (str): User message.
+        start (callable): () -> delta iterator for a miss.
+        name (str): Backend label.
+        prefetch (bool): Start consuming the backend immediately (see Stream).
+        **key: context/image/ttl/cacheable, as for ResponseCache.get_or_compute.
+
+    Returns:
+        Stream
+    """
+    ttl = key.pop("ttl", None)
+    cacheable = key.pop("cacheable", None)
+    if cache is not None:
+        value = cache.lookup(namespace, text, **key)
+        if value is not None:
+            return Stream.of(value)
+
+    def deltas():
+        parts = []
+        for delta in start():
+            parts.append(delta)
+            yield delta
+        reply = "".join(parts).strip()
+        if cache is not None and reply and (cacheable is None or cacheable(reply)):
+            cache.put(namespace, text, reply, ttl=ttl, **key)
+
+    return Stream(deltas(), name=name, prefetch=prefetch)
+
+
+def stream_report():
+    """
+    Returns:
+        dict: {backend: {"ttft": summary, "total": summary}}.
+    """
+    return {name: {k: s.summary() for k, s in stats.items()} for name, stats in STATS.items()}
+
+
+if __name__ == "__main__":
+    # Blocking vs streamed reply from a simulated backend: python -m agent.streaming
+    def backend():
+        time.sleep(0.4)  # prompt processing
+        for word in "Streaming shows the first words while the rest is still generated .".split():
+            time.sleep(0.12)
+            yield word + " "
+
+    t0 = time.perf_counter()
+    text = "".join(backend())
+    print(f"blocking: first text after {time.perf_counter() - t0:.2f}s")
+    reply = print_stream(Stream(backend(), name="simulated"))
+    print(stream_report())
@@ -0,0 +1,160 @@
+import re
+import time
+
+import cv2
+import numpy as np
+
+DIRECTIONS = ("forward", "left", "right", "stop")
+
+
+# ============================================================
+# 1. SAMPLING WINDOW
+# ============================================================
+
+class FrameWindow:
+    """
+    Samples ``size`` frames evenly over ``span`` seconds.
+
+    offer() keeps a frame only if at least span / size seconds passed since
+    the previous sample, so a 30 fps feed becomes e.g. 4 frames over 2 s.
+    Once full, take() hands the window over and starts a fresh one.
+
+    Attributes:
+        size (int): Frames per window.
+        span (float): Seconds a window covers.
+    """
+
+    def __init__(self, size=4, span=2.0):
+        self.size = size
+        self.span = span
+        self._frames = []
+
+    @property
+    def interval(self):
+        return self.span / self.size
+
+    def offer(self, frame, now=None):
+        """
+        Returns:
+            bool: True if the frame was sampled into the window.
+        """
+        now = time.monotonic() if now is None else now
+        if self._frames and now - self._frames[-1][0] < self.interval:
+            return False
+        if len(self._frames) >= self.size:
+            self._frames.pop(0)
+        self._frames.append((now, frame))
+        return True
+
+    def ready(self):
+        return len(self._frames) >= self.size
+
+    def take(self):
+        """
+        Returns:
+            list[tuple]: (timestamp, frame) pairs, oldest first.
+        """
+        frames, self._frames = self._frames, []
+        return frames
+
+
+def tile_frames(frames, cols=2, width=512):
+    """
+    Put frames side by side in one mosaic, each labelled with its order.
+
+    Args:
+        frames (list[numpy.ndarray]): BGR frames, oldest first.
+        cols (int): Mosaic columns.
+        width (int): Width of each tile.
+
+    Returns:
+        numpy.ndarray: BGR mosaic.
+    """
+    h, w = frames[0].shape[:2]
+    tile_h = round(h * width / w)
+    rows = -(-len(frames) // cols)
+    mosaic = np.zeros((rows * tile_h, cols * width, 3), np.uint8)
+    for i, frame in enumerate(frames):
+        r, c = divmod(i, cols)
+        tile = cv2.resize(frame, (width, tile_h), interpolation=cv2.INTER_AREA)
+        cv2.putText(tile, f"t{i + 1}", (8, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 255), 2)
+        mosaic[r * tile_h:(r + 1) * tile_h, c * width:(c + 1) * width] = tile
+    return mosaic
+
+
+# ============================================================
+# 2. SHORT-HORIZON PLAN
+# ============================================================
+
+def parse_plan(text, horizon=4):
+    """
+    Pull the decision and plan out of a model reply.
+
+    Expects lines like ``Direction: left`` and ``Plan: left, forward, forward``.
+    Falls back to the first direction word anywhere in the text.
+
+    Returns:
+        tuple: (direction, list of up to ``horizon`` steps starting with it).
+    """
+    text = text.lower()
+    words = "|".join(DIRECTIONS)
+
+    direction = None
+    match = re.search(rf"direction\s*:\s*({words})", text)
+    if match:
+        direction = match.group(1)
+
+    plan = []
+    match = re.search(r"plan\s*:\s*(.+)", text)
+    if match:
+        plan = re.findall(words, match.group(1))[:horizon]
+
+    if direction is None:
+        found = re.search(words, text)
+        direction = plan[0] if plan else (found.group(0) if found else "stop")
+    if not plan or plan[0] != direction:
+        plan = [direction] + plan[:horizon - 1]
+    return direction, plan
+
+
+class Plan:
+    """
+    Steps to follow until the next model call, one per ``step_seconds``.
+
+    A "stop" step ends the plan: later steps are never executed.
+    """
+
+    def __init__(self, steps, step_seconds, start=None):
+        self.steps = list(steps)
+        if "stop" in self.steps:
+            self.steps = self.steps[:self.steps.index("stop") + 1]
+        self.step_seconds = step_seconds
+        self.start = time.monotonic() if start is None else start
+
+    def current(self, now=None):
+        """
+        Returns:
+            str: Step for ``now``; the last step once the plan runs out.
+        """
+        now = time.monotonic() if now is None else now
+        index = int((now - self.start) / self.step_seconds)
+        return self.steps[min(index, len(self.steps) - 1)]
+
+
+if __name__ == "__main__":
+    # python -m robot.batching
+    fps, seconds, call_interval = 30, 2.0, 1.0
+    window = FrameWindow(size=4, span=2.0)
+    frames = [np.full((480, 640, 3), i * 4, np.uint8) for i in range(int(fps * seconds))]
+    calls, per_frame_calls, last_call = 0, 0, None
+    for i, frame in enumerate(frames):
+        now = i / fps
+        if last_call is None or now - last_call >= call_interval:
+            per_frame_calls, last_call = per_frame_calls + 1, now
+        window.offer(frame, now=now)
+        if window.ready():
+            mosaic = tile_frames([f for _, f in window.take()])
+            calls += 1
+    print(f"{seconds:g} s at {fps} fps | per-frame mode (1 call/{call_interval:g} s): {per_frame_calls} call(s); "
+          f"batch mode: {calls} call(s), mosaic {mosaic.shape[1]}x{mosaic.shape[0]}")
+    print(parse_plan("Objects: door, chair\nDirection: left\nPlan: left, forward, forward, stop"))
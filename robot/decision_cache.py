@@ -0,0 +1,162 @@
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class DecisionCache:
+    """
+    LRU cache of robot decisions keyed on quantized zone features + task.
+
+    Features are bucketed as floor(value / step), so scenes whose zone
+    readings differ by less than one step share a key and reuse the model's
+    earlier answer. ``step`` may be a scalar or one value per feature (e.g.
+    coarse on brightness, fine on edge density). The task string is
+    whitespace/case-normalized.
+
+    With a ``ttl`` an entry is only reused for that many seconds
+    (time.monotonic()), so a scene that looks the same but has changed in
+    ways the features miss is sent to the model again now and then.
+
+    Attributes:
+        step (float | numpy.ndarray): Quantization granularity.
+        max_size (int): Entries kept before the least recently used is evicted.
+        ttl (float | None): Seconds an entry stays valid (None = until evicted).
+        hits (int): Lookups served from the cache.
+        misses (int): Lookups that had to compute.
+        evictions (int): Entries dropped by the LRU policy.
+        expired (int): Lookups that found only an expired entry.
+    """
+
+    def __init__(self, step=16.0, max_size=1024, ttl=None):
+        """
+        Args:
+            step (float | sequence): Bucket width(s) in feature units.
+            max_size (int): LRU capacity.
+            ttl (float | None): Entry lifetime in seconds.
+        """
+        self.step = np.asarray(step, dtype=np.float64)
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+
+    def key(self, features, task):
+        """
+        Args:
+            features (array-like): Zone features (any shape).
+            task (str): User task.
+
+        Returns:
+            tuple: Hashable cache key.
+        """
+        buckets = np.floor(np.asarray(features, dtype=np.float64).ravel() / self.step)
+        return " ".join(task.lower().split()), tuple(buckets.astype(np.int64).tolist())
+
+    def get(self, features, task):
+        """
+        Returns:
+            str | None: Cached decision (refreshed as most recently used).
+        """
+        key = self.key(features, task)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            decision, expires = self._entries[key]
+            if expires is not None and time.monotonic() >= expires:
+                del self._entries[key]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            return decision
+
+    def put(self, features, task, decision):
+        key = self.key(features, task)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (decision, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, features, task, compute):
+        """
+        Return the cached decision or call ``compute()`` and remember it.
+
+        Args:
+            features (array-like): Zone features.
+            task (str): User task.
+            compute (callable): Produces the decision on a miss.
+
+        Returns:
+            str
+        """
+        t0 = time.perf_counter()
+        decision = self.get(features, task)
+        if decision is not None:
+            self.hits += 1
+            self.hit_time += time.perf_counter() - t0
+            return decision
+
+        decision = compute()
+        self.put(features, task, decision)
+        self.misses += 1
+        self.miss_time += time.perf_counter() - t0
+        return decision
+
+    # ================= REPORTING =================
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit_rate, evictions, expired, size and mean
+                hit/miss latency (s).
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "size": len(self._entries),
+            "avg_hit_s": self.hit_time / self.hits if self.hits else 0.0,
+            "avg_miss_s": self.miss_time / self.misses if self.misses else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+if __name__ == "__main__":
+    # Simulated slow model on a jittery scene: python -m robot.decision_cache
+    rng = np.random.default_rng(0)
+    cache = DecisionCache(step=16)
+
+    def slow_model():
+        time.sleep(0.2)
+        return "forward"
+
+    scene = np.array([120.0, 180.0, 90.0])
+    for _ in range(50):
+        cache.get_or_compute(scene + rng.normal(0, 2, 3), "go to open area", slow_model)
+
+    stats = cache.stats()
+    print(f"hit rate {stats['hit_rate']:.0%}  hit {stats['avg_hit_s'] * 1e6:.1f} us  "
+          f"miss {stats['avg_miss_s'] * 1000:.0f} ms  size {stats['size']}")
@@ -0,0 +1,139 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class FlowTTC:
+    """
+    Per-zone looming (expansion) and time-to-collision from sparse optical flow.
+
+    Each update tracks a fixed grid of points from the previous frame into
+    the current one with pyramidal Lucas-Kanade on a downsampled gray image.
+    For every zone the tracked points are fitted with a pure scale change
+    about their centroid; a scale s > 1 means the surface in that zone is
+    getting closer. With dt between frames:
+
+        expansion = (s - 1) / dt         [1/s]
+        ttc       = dt / (s - 1)         [s]   (inf when not approaching)
+
+    Expansion is smoothed with an EMA (``smoothing``) to damp per-frame
+    tracking noise. All per-zone statistics are computed with np.bincount
+    over zone ids, so the cost is the LK call plus a handful of vector ops
+    (about 10 ms per frame at 320 px on one core).
+
+    Attributes:
+        rows (int): Vertical zones.
+        cols (int): Horizontal zones.
+        work_width (int): Width frames are downsampled to.
+        grid_step (int): Spacing of tracked points in work pixels.
+    """
+
+    def __init__(self, rows=1, cols=3, work_width=320, grid_step=12, min_points=6, smoothing=0.5):
+        """
+        Args:
+            rows (int): Grid rows.
+            cols (int): Grid columns.
+            work_width (int): Downsample target width.
+            grid_step (int): Point spacing.
+            min_points (int): Zones with fewer tracked points report no motion.
+            smoothing (float): Weight of the new measurement (1 = no smoothing).
+        """
+        self.rows = rows
+        self.cols = cols
+        self.work_width = work_width
+        self.grid_step = grid_step
+        self.min_points = min_points
+        self.smoothing = smoothing
+        self._expansion = None
+        self._prev = None
+        self._prev_time = None
+        self._grid = None
+        self._lk = dict(winSize=(15, 15), maxLevel=3,
+                        criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+    def _gray(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        h, w = frame.shape
+        if w > self.work_width:
+            frame = cv2.resize(frame, (self.work_width, round(h * self.work_width / w)),
+                               interpolation=cv2.INTER_AREA)
+        return frame
+
+    def _points(self, shape):
+        if self._grid is None or self._grid[0] != shape:
+            h, w = shape
+            half = self.grid_step // 2
+            ys, xs = np.mgrid[half:h:self.grid_step, half:w:self.grid_step]
+            pts = np.stack([xs.ravel(), ys.ravel()], axis=1).astype(np.float32)
+            zone = (np.minimum(pts[:, 1] * self.rows // h, self.rows - 1) * self.cols
+                    + np.minimum(pts[:, 0] * self.cols // w, self.cols - 1)).astype(np.intp)
+            self._grid = (shape, pts, zone)
+        return self._grid[1:]
+
+    def update(self, frame, now=None):
+        """
+        Args:
+            frame (numpy.ndarray): BGR or gray frame.
+            now (float | None): Capture time (defaults to time.monotonic()).
+
+        Returns:
+            numpy.ndarray: (rows, cols, 2) float32 of [expansion 1/s, ttc s].
+                The first call returns zero expansion and infinite TTC.
+        """
+        now = time.monotonic() if now is None else now
+        gray = self._gray(frame)
+        n_zones = self.rows * self.cols
+        result = np.zeros((n_zones, 2), np.float32)
+        result[:, 1] = np.inf
+
+        prev, prev_time = self._prev, self._prev_time
+        self._prev, self._prev_time = gray, now
+        if prev is None or prev.shape != gray.shape or now <= prev_time:
+            return result.reshape(self.rows, self.cols, 2)
+
+        pts, zone = self._points(gray.shape)
+        nxt, status, _ = cv2.calcOpticalFlowPyrLK(prev, gray, pts.reshape(-1, 1, 2), None, **self._lk)
+        ok = status.ravel() == 1
+        p, q, z = pts[ok], nxt.reshape(-1, 2)[ok], zone[ok]
+
+        count = np.bincount(z, minlength=n_zones).astype(np.float64)
+        safe = np.maximum(count, 1)
+        cp = np.stack([np.bincount(z, p[:, i], n_zones) for i in (0, 1)], axis=1) / safe[:, None]
+        cq = np.stack([np.bincount(z, q[:, i], n_zones) for i in (0, 1)], axis=1) / safe[:, None]
+        dp, dq = p - cp[z], q - cq[z]
+        num = np.bincount(z, (dp * dq).sum(axis=1), n_zones)
+        den = np.bincount(z, (dp * dp).sum(axis=1), n_zones)
+
+        valid = (count >= self.min_points) & (den > 0)
+        scale = np.where(valid, num / np.where(den > 0, den, 1), 1.0)
+        dt = now - prev_time
+        expansion = (scale - 1.0) / dt
+        if self._expansion is not None:
+            expansion = self.smoothing * expansion + (1 - self.smoothing) * self._expansion
+        self._expansion = expansion
+        result[:, 0] = expansion
+        approaching = expansion > 1e-3
+        result[approaching, 1] = 1.0 / expansion[approaching]
+        return result.reshape(self.rows, self.cols, 2)
+
+
+if __name__ == "__main__":
+    # Synthetic approach to a textured wall at 30 fps: python -m robot.flow
+    rng = np.random.default_rng(0)
+    wall = cv2.GaussianBlur(rng.integers(0, 255, (960, 1280), np.uint8), (0, 0), 2)
+    flow = FlowTTC()
+    fps, distance, speed = 30.0, 3.0, 1.0  # metres, metres/second
+    for i in range(10):
+        zoom = 3.0 / distance
+        h, w = wall.shape
+        crop_w, crop_h = int(640 / zoom), int(480 / zoom)
+        x0, y0 = (w - crop_w) // 2, (h - crop_h) // 2
+        frame = cv2.resize(wall[y0:y0 + crop_h, x0:x0 + crop_w], (640, 480))
+        t0 = time.perf_counter()
+        out = flow.update(frame, now=i / fps)
+        ms = (time.perf_counter() - t0) * 1000
+        if i:
+            print(f"true ttc {distance:4.2f}s  estimated {np.round(out[0, :, 1], 2)}  ({ms:.1f} ms)")
+        distance -= speed / fps
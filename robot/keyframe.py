@@ -0,0 +1,204 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class KeyframeSelector:
+    """
+    Decides which frames are different enough to be worth a model call.
+
+    Each frame is shrunk to a small gray thumbnail and compared with the last
+    keyframe using two cheap signals:
+
+    * histogram distance (Bhattacharyya) - global lighting/content shifts
+    * 1 - SSIM on the thumbnail - structural changes (something moved)
+
+    The larger of the two is the frame's difference score. The threshold
+    adapts to the camera: an exponential moving mean/variance of the scores
+    of rejected frames tracks sensor noise and camera shake, and the
+    threshold is ``mean + k * std`` (never below ``min_threshold``). A frame
+    is also accepted when the last keyframe is older than ``max_staleness``
+    seconds, so the decision never goes stale indefinitely.
+
+    Attributes:
+        calls_made (int): Frames accepted as keyframes.
+        calls_avoided (int): Frames rejected (previous decision reused).
+        threshold (float): Current adaptive threshold.
+    """
+
+    def __init__(self, size=(64, 48), bins=32, k=4.0, min_threshold=0.08,
+                 max_staleness=5.0, alpha=0.05):
+        """
+        Args:
+            size (tuple): Thumbnail (width, height).
+            bins (int): Histogram bins.
+            k (float): Standard deviations above the noise floor.
+            min_threshold (float): Lower bound on the threshold.
+            max_staleness (float | None): Force a keyframe after this many seconds.
+            alpha (float): EMA rate for the noise statistics.
+        """
+        self.size = size
+        self.bins = bins
+        self.k = k
+        self.min_threshold = min_threshold
+        self.max_staleness = max_staleness
+        self.alpha = alpha
+
+        self._ref = None
+        self._ref_hist = None
+        self._ref_time = None
+        self._noise_mean = 0.0
+        self._noise_var = 0.0
+        self.calls_made = 0
+        self.calls_avoided = 0
+        self.last_score = 0.0
+
+    @property
+    def threshold(self):
+        return max(self.min_threshold, self._noise_mean + self.k * np.sqrt(self._noise_var))
+
+    # ================= SIGNALS =================
+
+    def _thumbnail(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+    def _hist(self, thumb):
+        hist = cv2.calcHist([thumb], [0], None, [self.bins], [0, 256])
+        return cv2.normalize(hist, hist).astype(np.float32)
+
+    @staticmethod
+    def ssim(a, b):
+        """Mean SSIM of two gray thumbnails (Gaussian 7x7 windows)."""
+        a = a.astype(np.float32)
+        b = b.astype(np.float32)
+        c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+        blur = lambda x: cv2.GaussianBlur(x, (7, 7), 1.5)
+
+        mu_a, mu_b = blur(a), blur(b)
+        var_a = blur(a * a) - mu_a * mu_a
+        var_b = blur(b * b) - mu_b * mu_b
+        cov = blur(a * b) - mu_a * mu_b
+        ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / (
+            (mu_a * mu_a + mu_b * mu_b + c1) * (var_a + var_b + c2)
+        )
+        return float(ssim_map.mean())
+
+    def _difference(self, thumb):
+        if self._ref is None:
+            return 1.0
+        hist_d = cv2.compareHist(self._ref_hist, self._hist(thumb), cv2.HISTCMP_BHATTACHARYYA)
+        return max(hist_d, 1.0 - self.ssim(self._ref, thumb))
+
+    def score(self, frame):
+        """
+        Difference between ``frame`` and the current keyframe (0 = identical).
+
+        Returns:
+            float
+        """
+        return self._difference(self._thumbnail(frame))
+
+    # ================= SELECTION =================
+
+    def update(self, frame, now=None):
+        """
+        Score ``frame`` and decide whether it is a new keyframe.
+
+        Args:
+            frame (numpy.ndarray): BGR or gray frame.
+            now (float | None): Timestamp (defaults to time.monotonic()).
+
+        Returns:
+            bool: True when the model should be called for this frame.
+        """
+        now = time.monotonic() if now is None else now
+        thumb = self._thumbnail(frame)
+
+        score = self._difference(thumb)
+        if self._ref is None:
+            accept = True
+        else:
+            stale = self.max_staleness is not None and now - self._ref_time >= self.max_staleness
+            accept = score > self.threshold or stale
+        self.last_score = score
+
+        if accept:
+            self._ref, self._ref_hist, self._ref_time = thumb, self._hist(thumb), now
+            self.calls_made += 1
+        else:
+            # Rejected frames describe the noise floor.
+            delta = score - self._noise_mean
+            self._noise_mean += self.alpha * delta
+            self._noise_var = (1 - self.alpha) * (self._noise_var + self.alpha * delta * delta)
+            self.calls_avoided += 1
+        return accept
+
+    def stats(self):
+        """
+        Returns:
+            dict: calls_made, calls_avoided, avoided_rate, threshold.
+        """
+        total = self.calls_made + self.calls_avoided
+        return {
+            "calls_made": self.calls_made,
+            "calls_avoided": self.calls_avoided,
+            "avoided_rate": self.calls_avoided / total if total else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+def evaluate_clip(path, selector=None, sample_fps=None):
+    """
+    Replay a recorded clip through a selector using the clip's own timestamps.
+
+    Args:
+        path (str): Video file.
+        selector (KeyframeSelector | None): Defaults to KeyframeSelector().
+        sample_fps (float | None): Only offer this many frames per second
+            (e.g. 1 to mimic the robot's old once-per-second calls).
+
+    Returns:
+        tuple: (selector stats dict, list of keyframe timestamps in seconds).
+    """
+    selector = selector or KeyframeSelector()
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(fps / sample_fps)) if sample_fps else 1
+    keyframes = []
+    index = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % step == 0:
+            t = index / fps
+            if selector.update(frame, now=t):
+                keyframes.append(t)
+        index += 1
+    cap.release()
+    return selector.stats(), keyframes
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m robot.keyframe [clip.mp4]
+    if len(sys.argv) > 1:
+        stats, keys = evaluate_clip(sys.argv[1], sample_fps=1)
+    else:
+        rng = np.random.default_rng(0)
+        scene = cv2.GaussianBlur(rng.integers(0, 255, (480, 640, 3), np.uint8), (0, 0), 4)
+        selector = KeyframeSelector()
+        keys = []
+        for second in range(60):
+            if second in (18, 37):
+                scene = np.roll(scene, 120, axis=1)  # the robot turned
+            frame = cv2.add(scene, rng.integers(0, 6, scene.shape, np.uint8))  # sensor noise
+            if selector.update(frame, now=float(second)):
+                keys.append(second)
+        stats = selector.stats()
+    print("keyframes at:", keys)
+    print(stats)
@@ -0,0 +1,270 @@
+import os
+import time
+import threading
+
+import torch
+
+from robot.scoring import DIRECTIONS, DirectionScorer, generate
+from stats import LatencyStats
+
+WARMUP_PROMPT = """
+Task: go to open area
+
+Camera info:
+Left zone brightness: 40.0
+Center zone brightness: 180.0
+Right zone brightness: 95.0
+
+Answer ONLY one word:
+forward, left, right, stop
+"""
+
+
+# torch's own choice (physical cores it may use), read before anything
+# calls torch.set_num_threads.
+TORCH_THREADS = torch.get_num_threads()
+
+
+def default_threads():
+    """
+    Intra-op threads: torch's default, capped at the CPUs this process is
+    allowed to run on (taskset, containers), at least 1. os.cpu_count()
+    counts every CPU in the machine, including ones the process cannot use.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        available = len(os.sched_getaffinity(0))
+    else:
+        available = os.cpu_count() or 1
+    return max(1, min(available, TORCH_THREADS))
+
+
+def quantize_int8(model):
+    """
+    Dynamic int8 quantization of every nn.Linear.
+
+    Uses torchao when it is installed. Otherwise falls back to
+    torch.ao.quantization.quantize_dynamic, which is deprecated; if that
+    is missing or fails, the float model is returned with a warning.
+
+    Returns:
+        torch.nn.Module: The quantized model (or ``model`` unchanged).
+    """
+    try:
+        from torchao.quantization import Int8DynamicActivationInt8WeightConfig, quantize_
+    except ImportError:
+        quantize_ = None
+    if quantize_ is not None:
+        quantize_(model, Int8DynamicActivationInt8WeightConfig())
+        return model
+
+    legacy = getattr(getattr(torch.ao, "quantization", None), "quantize_dynamic", None)
+    if legacy is None:
+        print("[WARN] int8 quantization unavailable (install torchao); running in float")
+        return model
+    try:
+        return legacy(model, {torch.nn.Linear}, dtype=torch.qint8)
+    except (RuntimeError, NotImplementedError) as e:
+        print("[WARN] int8 quantization failed, running in float:", e)
+        return model
+
+
+def optimize_for_cpu(model, quantize=True, threads=None):
+    """
+    Prepare a transformers model for CPU inference.
+
+    Sets torch's intra-op thread count and, with ``quantize``, replaces every
+    nn.Linear by a dynamically quantized int8 version (weights int8,
+    activations quantized on the fly; see quantize_int8). For flan-t5 that is nearly all of the
+    compute, and it cuts the weight memory about 4x.
+
+    Args:
+        model (torch.nn.Module): Model in eval mode.
+        quantize (bool): Apply dynamic int8 quantization.
+        threads (int | None): Intra-op threads; default_threads() when None.
+
+    Returns:
+        torch.nn.Module: The optimized model (a new module when quantized).
+    """
+    torch.set_num_threads(threads or default_threads())
+    model = model.eval()
+    if quantize:
+        model = quantize_int8(model)
+    return model
+
+
+class LocalLLM:
+    """
+    Lazily loaded flan-t5 with a background warm-up.
+
+    start() returns immediately. Loading, CPU optimization and one warm-up
+    call of each entry point (generate and score) run on a daemon thread,
+    so the first real decision does not pay for weight loading, lazy
+    kernel initialisation or allocator growth. Calls made before the model
+    is ready block until it is (or raise the load error).
+
+    Every call runs under torch.inference_mode and is timed.
+
+    Attributes:
+        name (str): Model name or local path.
+        device (str): "cpu" or a torch device string.
+        quantize (bool): Dynamic int8 quantization (CPU only).
+        threads (int | None): Intra-op threads for CPU.
+        load_seconds (float | None): Time to load and optimize the weights.
+        warmup_seconds (float | None): Time spent on the warm-up calls.
+        latency (dict[str, LatencyStats]): "generate" and "score" call latency.
+    """
+
+    def __init__(self, name="google/flan-t5-base", device="cpu",
+                 quantize=True, threads=None, choices=DIRECTIONS, warmup_prompt=WARMUP_PROMPT):
+        """
+        Args:
+            name (str): Model name or local path.
+            device (str): Device to run on.
+            quantize (bool): Quantize Linear layers to int8 (ignored off CPU).
+            threads (int | None): Intra-op threads (CPU).
+            choices (tuple[str]): Answers for score().
+            warmup_prompt (str | None): Prompt for the warm-up calls; None skips warm-up.
+        """
+        self.name = name
+        self.device = device
+        self.quantize = quantize and device == "cpu"
+        self.threads = threads
+        self.choices = choices
+        self.warmup_prompt = warmup_prompt
+
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.latency = {"generate": LatencyStats("generate"), "score": LatencyStats("score")}
+        self._model = None
+        self._tokenizer = None
+        self._scorer = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    # ================= LOADING =================
+
+    def start(self):
+        """
+        Start loading in the background.
+
+        Returns:
+            LocalLLM: self, for chaining.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name="llm-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def _load(self):
+        try:
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+            t0 = time.perf_counter()
+            tokenizer = AutoTokenizer.from_pretrained(self.name)
+            model = AutoModelForSeq2SeqLM.from_pretrained(self.name)
+            if self.device == "cpu":
+                model = optimize_for_cpu(model, self.quantize, self.threads)
+            else:
+                model = model.to(self.device).eval()
+            self._model, self._tokenizer = model, tokenizer
+            self._scorer = DirectionScorer(model, tokenizer, self.choices)
+            self.load_seconds = time.perf_counter() - t0
+
+            if self.warmup_prompt:
+                t0 = time.perf_counter()
+                generate(model, tokenizer, self.warmup_prompt, max_new_tokens=2)
+                self._scorer.score(self.warmup_prompt)
+                self.warmup_seconds = time.perf_counter() - t0
+        except Exception as e:
+            self._error = e
+            print(f"[WARN] Loading {self.name} failed: {e}")
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self._error is None
+
+    def wait(self, timeout=None):
+        """
+        Block until loading (and warm-up) finished.
+
+        Returns:
+            bool: True when the model is usable.
+
+        Raises:
+            RuntimeError: If loading failed.
+        """
+        self.start()
+        if not self._ready.wait(timeout):
+            return False
+        if self._error is not None:
+            raise RuntimeError(f"{self.name} failed to load") from self._error
+        return True
+
+    # ================= CALLS =================
+
+    def generate(self, prompt, **kwargs):
+        """
+        Free-form generation of the answer alone (see robot.scoring.generate).
+
+        Returns:
+            str
+        """
+        self.wait()
+        t0 = time.perf_counter()
+        text = generate(self._model, self._tokenizer, prompt, **kwargs)
+        self.latency["generate"].record(time.perf_counter() - t0)
+        return text
+
+    def __call__(self, prompt, **kwargs):
+        # Same call shape as a transformers pipeline.
+        return [{"generated_text": self.generate(prompt, **kwargs)}]
+
+    def score(self, prompt):
+        """
+        Rank ``choices`` in one batched pass; see DirectionScorer.score.
+
+        Returns:
+            tuple: (best choice, confidence, {choice: log-likelihood}).
+        """
+        self.wait()
+        t0 = time.perf_counter()
+        result = self._scorer.score(prompt)
+        self.latency["score"].record(time.perf_counter() - t0)
+        return result
+
+    def report(self):
+        """
+        Returns:
+            dict: load/warm-up seconds, threads, quantization and per-call
+                latency summaries.
+        """
+        return {
+            "load_s": self.load_seconds,
+            "warmup_s": self.warmup_seconds,
+            "quantized": self.quantize,
+            "threads": torch.get_num_threads(),
+            "generate": self.latency["generate"].summary(),
+            "score": self.latency["score"].summary(),
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Startup and step time, default vs CPU mode: python -m robot.llm [model]
+    name = sys.argv[1] if len(sys.argv) > 1 else "google/flan-t5-base"
+    for label, options in (("default", dict(quantize=False, threads=os.cpu_count(), warmup_prompt=None)),
+                           ("cpu mode", dict(quantize=True))):
+        created = time.perf_counter()
+        llm = LocalLLM(name, **options).start()
+        time.sleep(1.0)  # stands in for the camera opening / user typing the task
+        llm.score(WARMUP_PROMPT)
+        first = time.perf_counter() - created
+        for _ in range(10):
+            llm.score(WARMUP_PROMPT)
+        steady = llm.latency["score"].summary()
+        print(f"{label:8s}: first decision after {first:.2f}s, load {llm.load_seconds:.2f}s, "
+              f"steady-state score p50 {steady['p50_ms']:.1f} ms")
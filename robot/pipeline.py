@@ -0,0 +1,255 @@
+import time
+import queue
+import threading
+
+from stats import LatencyStats
+
+
+# ============================================================
+# 1. LATEST-ONLY MAILBOX
+# ============================================================
+
+class LatestQueue:
+    """
+    Bounded queue that drops the oldest item instead of blocking the producer.
+
+    With maxsize=1 it is a mailbox: consumers always get the freshest item
+    and anything they were too slow for is counted in ``dropped``.
+    """
+
+    def __init__(self, maxsize=1):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+
+class Decision:
+    """
+    One inference result travelling to the actuator.
+
+    Attributes:
+        value: What the inference function returned (e.g. "left").
+        frame_time (float): time.monotonic() when the frame was captured.
+        decided_time (float): time.monotonic() when inference finished.
+        source (str): "model" (inference stage) or "reflex" (capture stage).
+    """
+
+    def __init__(self, value, frame_time, decided_time, source="model"):
+        self.value = value
+        self.frame_time = frame_time
+        self.decided_time = decided_time
+        self.source = source
+
+    @property
+    def age(self):
+        """Seconds between capture and now."""
+        return time.monotonic() - self.frame_time
+
+    @property
+    def waited(self):
+        """Seconds the decision has been queued since inference finished."""
+        return time.monotonic() - self.decided_time
+
+
+# ============================================================
+# 2. STAGED PIPELINE
+# ============================================================
+
+class RobotPipeline:
+    """
+    Capture -> inference -> actuation on three threads.
+
+    * Capture reads the camera as fast as it delivers and posts every frame
+      to a one-slot mailbox, so it never waits on the model.
+    * Inference takes whatever frame is newest when it becomes free; frames
+      that arrived while the model was busy are dropped (``frames_dropped``).
+      ``min_infer_interval`` rate-limits model calls (e.g. paid APIs); the
+      wait happens before a frame is taken, so it never makes frames stale.
+    * Actuation consumes decisions from a small bounded queue. Decisions that
+      sat in the queue longer than ``max_decision_wait`` (because actuation
+      was busy) are discarded in favour of newer ones instead of replayed.
+    * ``reflex`` (optional) runs in the capture stage on every frame with its
+      capture timestamp, e.g. optical-flow collision checks. A non-None
+      result goes straight to actuation without waiting for the model, and
+      model decisions for frames captured before it are discarded as stale.
+
+    Each stage records its own latency (capture read, reflex, inference
+    call, actuation call) plus end-to-end frame-to-action latency.
+
+    Attributes:
+        stats (dict[str, LatencyStats]): Keyed by "capture", "reflex",
+            "inference", "actuation" and "end_to_end".
+        reflexes (int): Decisions taken by ``reflex``.
+    """
+
+    def __init__(self, read_frame, infer, actuate, max_decision_wait=0.5, decision_queue=2,
+                 min_infer_interval=0.0, reflex=None):
+        """
+        Args:
+            read_frame (callable): () -> (ok, frame), e.g. cap.read.
+            infer (callable): frame -> decision value.
+            actuate (callable): Decision -> bool. Return False to stop the pipeline.
+            max_decision_wait (float | None): Drop decisions queued longer than this (seconds).
+            decision_queue (int): Decisions buffered before the oldest is dropped.
+            min_infer_interval (float): Minimum seconds between inference starts.
+            reflex (callable | None): (frame, stamp) -> decision value or None,
+                run on every captured frame.
+        """
+        self._read_frame = read_frame
+        self._infer = infer
+        self._actuate = actuate
+        self.max_decision_wait = max_decision_wait
+        self.min_infer_interval = min_infer_interval
+        self._reflex = reflex
+
+        self._frames = LatestQueue(1)
+        self._decisions = LatestQueue(decision_queue)
+        self._stop = threading.Event()
+        self._threads = []
+        self.latest_frame = None
+        self.stale_decisions = 0
+        self.reflexes = 0
+        self._reflex_time = float("-inf")
+        self.stats = {name: LatencyStats(name)
+                      for name in ("capture", "reflex", "inference", "actuation", "end_to_end")}
+
+    @property
+    def frames_dropped(self):
+        return self._frames.dropped
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    # ================= STAGES =================
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            ok, frame = self._read_frame()
+            if not ok:
+                time.sleep(0.01)
+                continue
+            stamp = time.monotonic()
+            self.stats["capture"].record(stamp - t0)
+            self.latest_frame = frame
+            if self._reflex is not None:
+                value = self._reflex(frame, stamp)
+                done = time.monotonic()
+                self.stats["reflex"].record(done - stamp)
+                if value is not None:
+                    self.reflexes += 1
+                    self._decisions.put(Decision(value, stamp, done, "reflex"))
+                    continue
+            self._frames.put((stamp, frame))
+
+    def _inference_loop(self):
+        last_start = 0.0
+        while not self._stop.is_set():
+            wait = last_start + self.min_infer_interval - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            try:
+                stamp, frame = self._frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            t0 = last_start = time.monotonic()
+            value = self._infer(frame)
+            done = time.monotonic()
+            self.stats["inference"].record(done - t0)
+            self._decisions.put(Decision(value, stamp, done))
+
+    def _actuation_loop(self):
+        while not self._stop.is_set():
+            try:
+                decision = self._decisions.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if (self.max_decision_wait is not None and decision.waited > self.max_decision_wait) \
+                    or decision.frame_time < self._reflex_time:
+                self.stale_decisions += 1
+                continue
+            if decision.source == "reflex":
+                self._reflex_time = decision.frame_time
+            t0 = time.monotonic()
+            keep_going = self._actuate(decision)
+            done = time.monotonic()
+            self.stats["actuation"].record(done - t0)
+            self.stats["end_to_end"].record(done - decision.frame_time)
+            if keep_going is False:
+                self._stop.set()
+
+    # ================= LIFECYCLE =================
+
+    def start(self):
+        """
+        Returns:
+            RobotPipeline: self, for chaining.
+        """
+        self._stop.clear()
+        for name, target in (("capture", self._capture_loop),
+                             ("inference", self._inference_loop),
+                             ("actuation", self._actuation_loop)):
+            thread = threading.Thread(target=target, name=f"robot-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+    def wait(self, timeout=None):
+        """Block until actuation asks to stop (or ``timeout`` elapses)."""
+        return self._stop.wait(timeout)
+
+    def report(self):
+        """
+        Returns:
+            dict: Per-stage latency summaries plus drop counters.
+        """
+        report = {name: s.summary() for name, s in self.stats.items()}
+        report["frames_dropped"] = self.frames_dropped
+        report["stale_decisions"] = self.stale_decisions
+        report["reflexes"] = self.reflexes
+        return report
+
+
+if __name__ == "__main__":
+    import itertools
+
+    # 30 fps camera, 400 ms model: python -m robot.pipeline
+    counter = itertools.count()
+
+    def read_frame():
+        time.sleep(1 / 30)
+        return True, next(counter)
+
+    def infer(frame):
+        time.sleep(0.4)
+        return "forward"
+
+    actions = []
+    pipe = RobotPipeline(read_frame, infer, lambda d: actions.append(d.value) or len(actions) < 8)
+    pipe.start()
+    pipe.wait(timeout=10)
+    pipe.stop()
+    for key, value in pipe.report().items():
+        print(f"{key:16s} {value}")
@@ -0,0 +1,149 @@
+import time
+
+import torch
+
+DIRECTIONS = ("forward", "left", "right", "stop")
+
+
+def generate(model, tokenizer, prompt, max_new_tokens=5, **kwargs):
+    """
+    Free-form seq2seq generation straight through model.generate.
+
+    transformers 5 dropped the text2text-generation pipeline, and its
+    text-generation pipeline returns the prompt along with the answer for
+    encoder-decoder models, so the decoder output is decoded directly.
+
+    Returns:
+        str: The generated answer only.
+    """
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    with torch.inference_mode():
+        ids = model.generate(**inputs, max_new_tokens=max_new_tokens, **kwargs)
+    return tokenizer.decode(ids[0], skip_special_tokens=True)
+
+
+class DirectionScorer:
+    """
+    Picks a direction by scoring fixed answers instead of generating text.
+
+    The prompt goes through the seq2seq encoder once. The decoder then
+    scores all candidate answers in one batched forward pass (teacher
+    forcing, encoder states shared across the batch), summing each
+    answer's token log-probabilities including the end-of-sequence token.
+    The argmax is the decision; a softmax over the candidates' scores is
+    the confidence.
+
+    Compared with ``generate(model, tokenizer, prompt)`` this removes
+    autoregressive decoding and substring parsing: there is no answer that
+    fails to parse, and the cost is two forward passes per decision.
+
+    Attributes:
+        choices (tuple[str]): Candidate answers.
+        model: Seq2seq model (e.g. T5ForConditionalGeneration).
+        tokenizer: Matching tokenizer.
+    """
+
+    def __init__(self, model, tokenizer, choices=DIRECTIONS):
+        """
+        Args:
+            model: Encoder-decoder transformers model.
+            tokenizer: Its tokenizer.
+            choices (tuple[str]): Candidate answers.
+        """
+        if not getattr(model.config, "is_encoder_decoder", False):
+            raise ValueError("DirectionScorer needs an encoder-decoder (seq2seq) model")
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        self.choices = tuple(choices)
+
+        # Candidate labels never change: tokenize and pad them once.
+        labels = tokenizer(list(self.choices), padding=True, return_tensors="pt")
+        self._labels = labels.input_ids.masked_fill(labels.attention_mask == 0, -100)
+        self._label_mask = labels.attention_mask.bool()
+
+    @classmethod
+    def from_pipeline(cls, pipe, choices=DIRECTIONS):
+        """
+        Reuse the model and tokenizer of an existing transformers pipeline.
+
+        Args:
+            pipe: transformers pipeline (e.g. the robot's flan-t5 ``llm``).
+
+        Returns:
+            DirectionScorer
+        """
+        return cls(pipe.model, pipe.tokenizer, choices)
+
+    @classmethod
+    def from_pretrained(cls, name="google/flan-t5-base", choices=DIRECTIONS):
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        return cls(AutoModelForSeq2SeqLM.from_pretrained(name), AutoTokenizer.from_pretrained(name), choices)
+
+    def _log_likelihoods(self, prompt):
+        device = self.model.device
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(device)
+        n = len(self.choices)
+
+        encoder_out = self.model.get_encoder()(**inputs)
+        hidden = encoder_out.last_hidden_state.expand(n, -1, -1)
+        mask = inputs.attention_mask.expand(n, -1)
+        labels = self._labels.to(device)
+
+        logits = self.model(encoder_outputs=(hidden,), attention_mask=mask, labels=labels).logits
+        logprobs = torch.log_softmax(logits.float(), dim=-1)
+        token_lp = logprobs.gather(-1, labels.clamp(min=0).unsqueeze(-1)).squeeze(-1)
+        return (token_lp * self._label_mask.to(device)).sum(dim=-1)
+
+    def score(self, prompt):
+        """
+        Args:
+            prompt (str): Full robot prompt.
+
+        Returns:
+            tuple: (best choice, confidence 0-1, {choice: log-likelihood}).
+        """
+        with torch.inference_mode():
+            ll = self._log_likelihoods(prompt)
+        probs = torch.softmax(ll, dim=0)
+        best = int(torch.argmax(ll))
+        return self.choices[best], float(probs[best]), dict(zip(self.choices, ll.tolist()))
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Decisions per second on CPU: python -m robot.scoring [model]
+    name = sys.argv[1] if len(sys.argv) > 1 else "google/flan-t5-base"
+    scorer = DirectionScorer.from_pretrained(name)
+    model, tokenizer = scorer.model, scorer.tokenizer
+
+    prompt = """
+Task: go to open area
+
+Camera info:
+Left zone brightness: 40.2
+Center zone brightness: 180.5
+Right zone brightness: 95.0
+
+Rule:
+- Dark = obstacle
+- Bright = free
+
+Answer ONLY one word:
+forward, left, right, stop
+"""
+    runs = 10
+    generate(model, tokenizer, prompt)
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        text = generate(model, tokenizer, prompt)
+    gen = runs / (time.perf_counter() - t0)
+
+    scorer.score(prompt)
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        choice, confidence, _ = scorer.score(prompt)
+    scored = runs / (time.perf_counter() - t0)
+
+    print(f"generate: {gen:.1f} decisions/s ({text.strip()!r})")
+    print(f"score:    {scored:.1f} decisions/s ({choice}, confidence {confidence:.2f})")
@@ -0,0 +1,245 @@
+import re
+import time
+
+from stats import LatencyStats
+
+# Tasks mentioning things brightness cannot see have to go to a model.
+SEMANTIC_PATTERN = re.compile(
+    r"\b(until|see|seen|find|look(ing)? for|search|door|person|people|chair|table|"
+    r"object|sign|colou?r|red|green|blue|read|follow|identify|recogni[sz]e)\b",
+    re.IGNORECASE,
+)
+
+
+def needs_semantics(task):
+    """
+    Args:
+        task (str): User task.
+
+    Returns:
+        bool: True when the task depends on what is in the picture.
+    """
+    return bool(SEMANTIC_PATTERN.search(task or ""))
+
+
+# ============================================================
+# 1. LOCAL RULE POLICY (TIER 0)
+# ============================================================
+
+class RulePolicy:
+    """
+    Deterministic "dark = obstacle, bright = free" over left/center/right.
+
+    Returns a direction only when the answer is clear-cut:
+
+    * every zone darker than ``blocked_level`` -> stop
+    * center at least ``free_level`` and no darker than the best side by
+      more than ``min_margin`` -> forward
+    * otherwise the brightest side, if it is free and beats the runner-up
+      by ``min_margin`` -> left/right
+
+    Anything else returns None (ambiguous) together with the margin, so the
+    caller can escalate.
+
+    When per-zone time-to-collision is available (robot/flow.py), collision()
+    overrides brightness: a center TTC under ``stop_ttc`` turns toward a
+    side that is neither looming nor dark, or stops.
+
+    Attributes:
+        free_level (float): Brightness treated as open space.
+        blocked_level (float): Brightness treated as an obstacle.
+        min_margin (float): Brightness gap that counts as a clear preference.
+        stop_ttc (float): Seconds to impact that trigger a local avoid/stop.
+    """
+
+    def __init__(self, free_level=110, blocked_level=60, min_margin=25, stop_ttc=1.0):
+        self.free_level = free_level
+        self.blocked_level = blocked_level
+        self.min_margin = min_margin
+        self.stop_ttc = stop_ttc
+
+    def collision(self, zones, ttc):
+        """
+        Args:
+            zones (sequence): (left, center, right) brightness.
+            ttc (sequence): (left, center, right) time-to-collision in seconds.
+
+        Returns:
+            str | None: "left"/"right"/"stop" when the center is about to be hit.
+        """
+        left, center, right = (float(z) for z in zones)
+        left_ttc, center_ttc, right_ttc = (float(t) for t in ttc)
+        if center_ttc >= self.stop_ttc:
+            return None
+        sides = [
+            (name, level) for name, level, t in (("left", left, left_ttc), ("right", right, right_ttc))
+            if t >= self.stop_ttc and level >= self.free_level
+        ]
+        if sides:
+            return max(sides, key=lambda side: side[1])[0]
+        return "stop"
+
+    def decide(self, zones):
+        """
+        Args:
+            zones (sequence): (left, center, right) brightness, 0-255.
+
+        Returns:
+            tuple: (direction or None, margin).
+        """
+        left, center, right = (float(z) for z in zones)
+
+        if max(left, center, right) < self.blocked_level:
+            return "stop", self.blocked_level - max(left, center, right)
+
+        side = max(left, right)
+        if center >= self.free_level and center >= side - self.min_margin:
+            return "forward", center - self.free_level
+
+        ranked = sorted((("left", left), ("forward", center), ("right", right)), key=lambda x: -x[1])
+        (best, best_v), (_, second_v) = ranked[0], ranked[1]
+        margin = best_v - second_v
+        if best != "forward" and best_v >= self.free_level and margin >= self.min_margin:
+            return best, margin
+        return None, margin
+
+
+# ============================================================
+# 2. TIERED ENGINE
+# ============================================================
+
+class TieredDecision:
+    """
+    Attributes:
+        direction (str): forward / left / right / stop.
+        tier (str): "local" or "model".
+        reason (str): "collision", "rule", "ambiguous" or "semantic".
+        margin (float): Rule margin (how clear-cut the local answer was).
+    """
+
+    def __init__(self, direction, tier, reason, margin):
+        self.direction = direction
+        self.tier = tier
+        self.reason = reason
+        self.margin = margin
+
+    def __repr__(self):
+        return f"TieredDecision({self.direction}, {self.tier}/{self.reason}, margin={self.margin:.1f})"
+
+
+class TieredController:
+    """
+    Local rules first, model only when needed.
+
+    Clear-cut scenes are answered by ``policy`` in microseconds. The model
+    callback runs only when the rule is ambiguous or the task needs
+    semantics (see needs_semantics). If time-to-collision is passed in, an
+    imminent collision is handled locally first, whatever the task; use
+    collision() to run that check alone on every captured frame (e.g. as
+    a RobotPipeline reflex) rather than only on frames that reach decide().
+    Escalation rate and per-tier latency are tracked so the thresholds can
+    be tuned against model spend.
+
+    Attributes:
+        policy (RulePolicy): Tier-0 rules.
+        latency (dict[str, LatencyStats]): "local" and "model" call latency.
+        counts (dict[str, int]): Decisions per reason.
+    """
+
+    def __init__(self, escalate, policy=None):
+        """
+        Args:
+            escalate (callable): (zones, task, frame) -> direction. The model tier.
+            policy (RulePolicy | None): Local rules; defaults to RulePolicy().
+        """
+        self.escalate = escalate
+        self.policy = policy or RulePolicy()
+        self.latency = {"local": LatencyStats("local"), "model": LatencyStats("model")}
+        self.counts = {"collision": 0, "rule": 0, "ambiguous": 0, "semantic": 0}
+
+    def collision(self, zones, ttc):
+        """
+        Collision check only, for the per-frame fast path.
+
+        Args:
+            zones (sequence): (left, center, right) brightness.
+            ttc (sequence): (left, center, right) time-to-collision.
+
+        Returns:
+            TieredDecision | None: None when nothing is about to be hit.
+        """
+        t0 = time.perf_counter()
+        direction = self.policy.collision(zones, ttc)
+        self.latency["local"].record(time.perf_counter() - t0)
+        if direction is None:
+            return None
+        self.counts["collision"] += 1
+        return TieredDecision(direction, "local", "collision", 0.0)
+
+    def decide(self, zones, task, frame=None, ttc=None):
+        """
+        Args:
+            zones (sequence): (left, center, right) brightness.
+            task (str): User task.
+            frame (numpy.ndarray | None): Passed through to the model tier.
+            ttc (sequence | None): (left, center, right) time-to-collision.
+
+        Returns:
+            TieredDecision
+        """
+        t0 = time.perf_counter()
+        semantic = needs_semantics(task)
+        direction, margin, local_reason = None, 0.0, "rule"
+        if ttc is not None:
+            direction = self.policy.collision(zones, ttc)
+            local_reason = "collision"
+        if direction is None and not semantic:
+            direction, margin = self.policy.decide(zones)
+            local_reason = "rule"
+        self.latency["local"].record(time.perf_counter() - t0)
+
+        if direction is not None:
+            self.counts[local_reason] += 1
+            return TieredDecision(direction, "local", local_reason, margin)
+
+        reason = "semantic" if semantic else "ambiguous"
+        self.counts[reason] += 1
+        t0 = time.perf_counter()
+        direction = self.escalate(zones, task, frame)
+        self.latency["model"].record(time.perf_counter() - t0)
+        return TieredDecision(direction, "model", reason, margin)
+
+    @property
+    def escalation_rate(self):
+        total = sum(self.counts.values())
+        return (self.counts["ambiguous"] + self.counts["semantic"]) / total if total else 0.0
+
+    def report(self):
+        """
+        Returns:
+            dict: escalation_rate, counts per reason and per-tier latency summaries.
+        """
+        return {
+            "escalation_rate": self.escalation_rate,
+            "counts": dict(self.counts),
+            "local": self.latency["local"].summary(),
+            "model": self.latency["model"].summary(),
+        }
+
+
+if __name__ == "__main__":
+    import random
+
+    # python -m robot.tiered
+    def slow_model(zones, task, frame):
+        time.sleep(0.3)
+        return "left"
+
+    controller = TieredController(slow_model)
+    rng = random.Random(0)
+    for _ in range(40):
+        zones = [rng.uniform(20, 230) for _ in range(3)]
+        controller.decide(zones, "go to open area")
+    controller.decide((120, 130, 90), "move until you see a door")
+    for key, value in controller.report().items():
+        print(f"{key:16s} {value}")
@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Rolling latency samples for one stage or call site (pipeline stages,
+    model calls, HTTP endpoints), shared by robot/, agent/ and vision/.
+
+    Attributes:
+        name (str): Label used in reports.
+        count (int): Total samples recorded.
+    """
+
+    def __init__(self, name, window=256):
+        self.name = name
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, mean/p50/p95/max in milliseconds over the window.
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": 0}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+        return {
+            "count": self.count,
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "max_ms": samples[-1] * 1000,
+        }
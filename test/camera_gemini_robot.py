@@ -1,29 +1,52 @@
 import cv2
 import os
+import sys
 import time
 from dotenv import load_dotenv
 from PIL import Image
 import google.generativeai as genai
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.batching import FrameWindow, Plan, parse_plan, tile_frames
+from robot.flow import FlowTTC
+from robot.keyframe import KeyframeSelector
+from robot.pipeline import RobotPipeline
+from robot.tiered import TieredController
+from robot.zones import ZoneAnalyzer
+from vision.mjpeg import MJPEGStream
+from vision.replay import MockModel, open_capture
+
 # Load environment variables
 load_dotenv()
 
 # Configure Gemini
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-pro")
+# JARVIS_MOCK_MODEL=1 swaps Gemini for a fixed-latency offline stand-in.
+if os.getenv("JARVIS_MOCK_MODEL"):
+    model = MockModel(latency=float(os.getenv("JARVIS_MOCK_LATENCY", "1.5")))
+else:
+    model = genai.GenerativeModel("gemini-2.5-pro")
 
 # User task
 task = input("Enter robot task (example: move until you see a door): ")
 
 # Open camera
-cap = cv2.VideoCapture("http://192.168.1.3:8080/video")
+# Native MJPEG reader: keeps only the newest JPEG, decodes on read(), reconnects.
+# JARVIS_RECORD=<dir> records the stream, JARVIS_REPLAY=<dir> replays it.
+cap = open_capture(lambda: MJPEGStream("http://192.168.1.3:8080/video"))
+
+# "frame": one Gemini call per (key)frame.
+# "batch": 4 frames sampled over 2 s go out in one call that returns a decision
+#          plus a short plan followed until the next window is ready.
+MODE = "frame"
+BATCH_TILED = True  # one 2x2 mosaic image instead of four separate images
 
-def send_frame_to_gemini(frame, task):
+def send_frame_to_gemini(frame, task, prompt=None):
     # Convert OpenCV image to PIL
     rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     image = Image.fromarray(rgb)
 
-    prompt = f"""
+    prompt = prompt or f"""
 You are a robot vision and navigation system.
 
 Task: {task}
@@ -41,14 +64,45 @@ Direction: forward / left / right / stop
     response = model.generate_content([prompt, image])
     return response.text.lower()
 
-print("\nRobot with vision started. Press Q to quit.\n")
+def send_window_to_gemini(frames, task):
+    prompt = f"""
+You are a robot vision and navigation system.
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
+Task: {task}
+
+You get {len(frames)} camera frames taken over the last 2 seconds, oldest first
+(labelled t1..t{len(frames)} when tiled). Use the motion between them.
+
+Instructions:
+1. Identify objects visible in the latest frame.
+2. Decide the movement direction now based on task.
+3. Plan the next {len(frames)} half-second steps.
+4. Avoid obstacles.
+
+Respond ONLY in this format:
+Objects: <comma separated>
+Direction: forward / left / right / stop
+Plan: <{len(frames)} comma separated steps from forward / left / right / stop>
+"""
+    if BATCH_TILED:
+        return send_frame_to_gemini(tile_frames(frames), task, prompt)
+
+    images = [Image.fromarray(cv2.cvtColor(f, cv2.COLOR_BGR2RGB)) for f in frames]
+    response = model.generate_content([prompt, *images])
+    return response.text.lower()
+
+GEMINI_MIN_INTERVAL = 1.0  # avoid API spam
+last_call = {"time": 0.0, "direction": "stop"}
+# Only views that changed meaningfully (or after 5 s) trigger a Gemini call.
+keyframes = KeyframeSelector(max_staleness=5.0)
+
+def ask_gemini(zones, task, frame):
+    # Inside the rate limit, or when the view has not changed, the previous
+    # Gemini answer stands.
+    if time.monotonic() - last_call["time"] < GEMINI_MIN_INTERVAL or not keyframes.update(frame):
+        return last_call["direction"]
+    last_call["time"] = time.monotonic()
 
-    # Send frame to Gemini every 1 second (avoid API spam)
     decision_text = send_frame_to_gemini(frame, task)
     print("\nGemini Response:\n", decision_text)
 
@@ -58,19 +112,76 @@ while True:
         if d in decision_text:
             direction = d
             break
+    last_call["direction"] = direction
+    return direction
+
+window = FrameWindow(size=4, span=2.0)
+current_plan = {"plan": None}
+
+def ask_gemini_batch(zones, task, frame):
+    # decide() fills the window with every frame, so it always covers the
+    # last window.span seconds even after a run of local decisions.
+    if window.ready():
+        decision_text = send_window_to_gemini([f for _, f in window.take()], task)
+        print("\nGemini Response:\n", decision_text)
+        _, steps = parse_plan(decision_text, horizon=window.size)
+        current_plan["plan"] = Plan(steps, window.interval)
+    # None until the first window has been answered: keep still, don't stop.
+    plan = current_plan["plan"]
+    return plan.current() if plan else None
+
+# Brightness rules handle clear-cut scenes; Gemini gets ambiguous scenes and
+# semantic tasks ("until you see a door").
+zones = ZoneAnalyzer(rows=1, cols=3)
+# Time-to-collision from optical flow overrides everything when something looms.
+flow = FlowTTC(rows=1, cols=3)
+controller = TieredController(ask_gemini_batch if MODE == "batch" else ask_gemini)
+
+def avoid_collision(frame, stamp):
+    # Runs on every captured frame in the capture thread, timed by capture.
+    ttc = flow.update(frame, now=stamp)[0, :, 1]
+    decision = controller.collision(zones.brightness(frame)[0], ttc)
+    return decision.direction if decision else None
+
+def decide(frame):
+    if MODE == "batch":
+        window.offer(frame)
+    decision = controller.decide(zones.brightness(frame)[0], task, frame)
+    if decision.tier == "local":
+        current_plan["plan"] = None  # the old plan no longer matches the scene
+    return decision.direction
+
+def act(decision):
+    if decision.value is None:
+        return True
+    if decision.source == "reflex":
+        # A collision "stop" only halts the motors; optical flow can misfire,
+        # so it never ends the run and the next decision moves on.
+        print(f"Collision reflex: {decision.value} (frame age {decision.age:.2f}s)")
+        return True
+    print(f"Movement Decision: {decision.value} (frame age {decision.age:.2f}s)")
+    if decision.value == "stop":
+        print("Task completed or unsafe to proceed.")
+        return False
+    return True
 
-    print("Movement Decision:", direction)
+print("\nRobot with vision started. Press Q to quit.\n")
 
-    cv2.imshow("Camera Feed", frame)
+# Capture, decisions and actuation run on separate threads; inference always
+# gets the newest frame.
+robot_loop = RobotPipeline(cap.read, decide, act, reflex=avoid_collision).start()
 
-    if direction == "stop":
-        print("Task completed or unsafe to proceed.")
-        break
+while robot_loop.running:
+    if robot_loop.latest_frame is not None:
+        cv2.imshow("Camera Feed", robot_loop.latest_frame)
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    if cv2.waitKey(30) & 0xFF == ord('q'):
         break
 
-    time.sleep(1)  # limit API calls
+robot_loop.stop()
+print("Pipeline stats:", robot_loop.report())
+print("Tiers:", controller.report())
+print("Keyframes:", keyframes.stats())
 
 cap.release()
 cv2.destroyAllWindows()
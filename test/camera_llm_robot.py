@@ -1,26 +1,53 @@
+import os
+import sys
 import cv2
-from transformers import pipeline
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.decision_cache import DecisionCache
+from robot.flow import FlowTTC
+from robot.llm import LocalLLM
+from robot.pipeline import RobotPipeline
+from vision.mjpeg import MJPEGStream
+from vision.replay import MockModel, open_capture
+from robot.tiered import TieredController
+from robot.zones import ZoneAnalyzer
 
 # Load Hugging Face model
-llm = pipeline(
-    "text-generation",
-    model="google/flan-t5-base"
-)
+# JARVIS_MOCK_MODEL=1 swaps flan-t5 for a fixed-latency offline stand-in.
+MOCK_MODEL = bool(os.getenv("JARVIS_MOCK_MODEL"))
+if MOCK_MODEL:
+    llm = MockModel(reply="forward", latency=float(os.getenv("JARVIS_MOCK_LATENCY", "0.3")))
+else:
+    # Loads, int8-quantizes and warms up flan-t5 on a background thread while
+    # the task is typed and the camera opens; see robot/llm.py.
+    llm = LocalLLM("google/flan-t5-base").start()
+
+# "score": rank the four answers in one batched forward pass (no decoding).
+# "generate": original free-form generation + substring match.
+DECISION_MODE = "generate" if MOCK_MODEL else "score"
+scorer = None if MOCK_MODEL else llm
 
 # Get user task
 task = input("Enter robot task (example: go to open area): ")
 
 # Open camera
-cap = cv2.VideoCapture("http://192.168.1.3:8080/video")
+# Native MJPEG reader: keeps only the newest JPEG, decodes on read(), reconnects.
+# JARVIS_RECORD=<dir> records the stream, JARVIS_REPLAY=<dir> replays it.
+cap = open_capture(lambda: MJPEGStream("http://192.168.1.3:8080/video"))
 
-def get_zone_brightness(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    h, w = gray.shape
+# 1x3 grid (left/center/right) on a 160 px wide sample; see robot/zones.py.
+zones = ZoneAnalyzer(rows=1, cols=3)
+
+# Looming from optical flow: a fast-approaching obstacle stops/turns the robot
+# locally within one frame, before any model call.
+flow = FlowTTC(rows=1, cols=3)
 
-    left = gray[:, :w//3].mean()
-    center = gray[:, w//3:2*w//3].mean()
-    right = gray[:, 2*w//3:].mean()
+# Scenes within one 16-level brightness bucket per zone reuse the last answer
+# for up to 5 s.
+decisions = DecisionCache(step=16, max_size=512, ttl=5.0)
 
+def get_zone_brightness(frame):
+    left, center, right = zones.brightness(frame)[0]
     return left, center, right
 
 def ask_llm(left, center, right, task):
@@ -39,6 +66,10 @@ Rule:
 Answer ONLY one word:
 forward, left, right, stop
 """
+    if DECISION_MODE == "score":
+        direction, confidence, _ = scorer.score(prompt)
+        return direction
+
     response = llm(prompt, max_new_tokens=5)[0]["generated_text"].lower()
 
     for d in ["forward", "left", "right", "stop"]:
@@ -46,26 +77,54 @@ forward, left, right, stop
             return d
     return "stop"
 
-print("Robot started. Press Q to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
+def escalate(zones, task, frame):
+    left, center, right = zones
+    return decisions.get_or_compute(
+        zones, task, lambda: ask_llm(left, center, right, task)
+    )
+
+# Clear-cut brightness patterns are decided locally; flan-t5 only sees the rest.
+controller = TieredController(escalate)
+
+def avoid_collision(frame, stamp):
+    # Runs on every captured frame in the capture thread, timed by capture.
+    ttc = flow.update(frame, now=stamp)[0, :, 1]
+    decision = controller.collision(get_zone_brightness(frame), ttc)
+    return decision.direction if decision else None
+
+def decide(frame):
+    return controller.decide(get_zone_brightness(frame), task).direction
+
+def act(decision):
+    if decision.source == "reflex":
+        # A collision "stop" only halts the motors; optical flow can misfire,
+        # so it never ends the run and the next decision moves on.
+        print("Collision reflex:", decision.value)
+        return True
+    print("Decision:", decision.value)
+    if decision.value == "stop":
+        print("Task completed or no safe path.")
+        return False
+    return True
 
-    left, center, right = get_zone_brightness(frame)
-    decision = ask_llm(left, center, right, task)
+print("Robot started. Press Q to quit.")
 
-    print("Decision:", decision)
+# Capture never waits on flan-t5; inference always takes the newest frame.
+robot_loop = RobotPipeline(cap.read, decide, act, reflex=avoid_collision).start()
 
-    cv2.imshow("Camera Feed", frame)
+while robot_loop.running:
+    if robot_loop.latest_frame is not None:
+        cv2.imshow("Camera Feed", robot_loop.latest_frame)
 
-    if decision == "stop":
-        print("Task completed or no safe path.")
+    if cv2.waitKey(30) & 0xFF == ord('q'):
         break
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+robot_loop.stop()
+print("Pipeline stats:", robot_loop.report())
+print("Decision cache:", decisions.stats())
+print("Tiers:", controller.report())
+if not MOCK_MODEL:
+    print("Model:", llm.report())
 
 cap.release()
 cv2.destroyAllWindows()
@@ -1,12 +1,22 @@
 import os
-import cv2
-import pyautogui
+import sys
+import tempfile
 from dotenv import load_dotenv
 from PIL import Image
 import google.generativeai as genai
 import json
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.longterm import DEFAULT_ROOT, LongTermMemory
+from agent.memory import ConversationMemory, gemini_summarizer
+from agent.providers import GeminiProvider, OllamaProvider, ProviderRouter
+from agent.streaming import Stream, print_stream
+from vision.camera import CameraGrabber
+from vision.encoder import BudgetEncoder
+from vision.frame import Frame
+from vision.replay import mock_model, open_input, open_screen
+
 
 
 
@@ -14,10 +24,26 @@ from datetime import datetime
 # LOAD ENV & CONFIGURE GEMINI
 # =========================
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-model = genai.GenerativeModel(
-    model_name="gemini-2.5-pro"
+# JARVIS_MOCK_MODEL=1 runs the loop offline: a fixed-latency stand-in
+# answers instead of Gemini and gemma3. JARVIS_RECORD=<dir> records the
+# camera, the screen and the typed messages; JARVIS_REPLAY=<dir> plays them
+# back (see vision/replay.py).
+mock = mock_model(reply='{"action": "CHAT", "reason": "mock reply"}')
+
+if mock:
+    model = mock
+else:
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+    model = genai.GenerativeModel(
+        model_name="gemini-2.5-pro"
+    )
+
+# Replies race Gemini against local gemma3 (hedged after Gemini's p95
+# time-to-first-token, or immediately if Gemini fails).
+providers = ProviderRouter(
+    [GeminiProvider(model)] + ([] if mock else [OllamaProvider("gemma3:4b")]), deadline=60
 )
 
 
@@ -50,32 +76,46 @@ def log_tokens(action, prompt_text, response_text):
 # =========================
 # CAMERA SETUP
 # =========================
-cap = cv2.VideoCapture(0)
+camera = CameraGrabber(0).start()
+grab_screen = open_screen()
+read_input = open_input()
 
 # =========================
 # MEMORY
 # =========================
-chat_history = []
-MAX_HISTORY = 10
+# Recent turns verbatim within a token budget; older turns are folded into
+# a running summary by Gemini Flash in the background (this agent does not
+# need Ollama for anything else).
+chat_history = ConversationMemory(
+    budget=600, summary_budget=200, labels=("User", "Assistant"),
+    summarize=False if mock else gemini_summarizer(genai.GenerativeModel(model_name="gemini-2.5-flash")),
+)
+
+# Every turn is also kept in database/memory/; replies get only the past
+# turns most similar to the current message. Mock runs use a throwaway
+# directory so their turns never reach a live session.
+long_term = LongTermMemory(tempfile.mkdtemp() if mock else DEFAULT_ROOT)
 
 # =========================
 # IMAGE TOOLS
 # =========================
+camera_encoder = BudgetEncoder.for_provider("gemini")
+screen_encoder = BudgetEncoder.for_provider("gemini", text=True)
+
 def capture_camera():
-    ret, frame = cap.read()
-    if not ret:
+    _, frame = camera.latest()
+    if frame is None:
         return None
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    return Image.fromarray(rgb)
+    return camera_encoder.encode(Frame(frame, source="camera")).pil()
 
 def capture_screenshot():
-    return pyautogui.screenshot()
+    return screen_encoder.encode(Frame.from_pil(grab_screen(), source="screen")).pil()
 
 # =========================
 # ASK GEMINI WHAT TO DO
 # =========================
 def decide_action(user_input):
-    history_text = "\n".join(chat_history)
+    history_text = chat_history.context()
 
     prompt = f"""
 You are an AI agent controller.
@@ -122,11 +162,15 @@ Respond in EXACTLY this JSON format:
 # SEND RESULT BACK TO GEMINI
 # =========================
 def respond_with_result(user_input, action, action_result=None):
-    history_text = "\n".join(chat_history)
+    history_text = chat_history.context()
+    recalled = long_term.context(user_input, skip_recent=chat_history.recent_turns()) or "(none)"
 
     prompt = f"""
 You are an intelligent assistant.
 
+Relevant earlier conversation:
+{recalled}
+
 Conversation history:
 {history_text}
 
@@ -141,12 +185,10 @@ Action result:
 
 Provide a helpful response to the user.
 """
-    if isinstance(action_result, Image.Image):
-        response = model.generate_content([prompt, action_result])
-    else:
-        response = model.generate_content(prompt)
+    image = action_result if isinstance(action_result, Image.Image) else None
 
-    reply_text = response.text.strip()
+    # Printed token by token; gemma3 answers if Gemini fails or stalls
+    reply_text = print_stream(Stream(providers.deltas(prompt, image), name="gemini"))
 
     log_tokens(
         action=action,
@@ -164,7 +206,10 @@ print("Gemini decides actions dynamically")
 print("Type 'exit' to stop\n")
 
 while True:
-    user_input = input("You: ")
+    try:
+        user_input = read_input("You: ")
+    except EOFError:
+        break
 
     action, decision_raw = decide_action(user_input)
     print(f"\n[Decision] {decision_raw}")
@@ -179,6 +224,7 @@ while True:
         image = capture_camera()
         if image is None:
             reply = "Camera could not be accessed."
+            print("Agent:", reply)
         else:
             reply = respond_with_result(user_input, action, image)
 
@@ -191,13 +237,13 @@ while True:
     else:
         reply = respond_with_result(user_input, action)
 
-    print("Agent:", reply)
-
     # -------- UPDATE MEMORY --------
-    chat_history.append(f"User: {user_input}")
-    chat_history.append(f"Assistant: {reply}")
-
-    if len(chat_history) > MAX_HISTORY:
-        chat_history = chat_history[-MAX_HISTORY:]
-
-cap.release()
+    chat_history.add(user_input, reply)
+    long_term.add(user_input, reply)
+
+print("Memory:", chat_history.report())
+print("Long-term memory:", long_term.report())
+long_term.close()
+print("Providers:", providers.report())
+providers.close()
+camera.stop()
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.batching import FrameWindow, Plan, parse_plan, tile_frames
+
+
+def feed(window, fps, seconds, start=0.0):
+    """Offer ``seconds`` of frames at ``fps``; frame value is its index."""
+    sampled = []
+    for i in range(int(fps * seconds)):
+        if window.offer(np.full((48, 64, 3), i % 256, np.uint8), now=start + i / fps):
+            sampled.append(i)
+    return sampled
+
+
+def test_window_samples_evenly_and_fills():
+    window = FrameWindow(size=4, span=2.0)
+    sampled = feed(window, fps=30, seconds=2.0)
+    assert sampled == [0, 15, 30, 45]  # one frame per span / size = 0.5 s
+    assert window.ready()
+    frames = window.take()
+    assert [round(t, 2) for t, _ in frames] == [0.0, 0.5, 1.0, 1.5]
+    assert not window.ready() and window.take() == []
+
+
+def test_full_window_slides_to_the_newest_frames():
+    window = FrameWindow(size=4, span=2.0)
+    feed(window, fps=30, seconds=4.0)  # never taken: keeps the last 2 s
+    stamps = [round(t, 2) for t, _ in window.take()]
+    assert stamps == [2.0, 2.5, 3.0, 3.5]
+
+
+def test_tile_frames_keeps_order():
+    frames = [np.full((48, 64, 3), v, np.uint8) for v in (10, 60, 110, 160)]
+    mosaic = tile_frames(frames, cols=2, width=64)
+    assert mosaic.shape == (96, 128, 3)
+    # Bottom-right corners are untouched by the labels.
+    assert [int(mosaic[r * 48 + 47, c * 64 + 63, 0]) for r in (0, 1) for c in (0, 1)] == [10, 60, 110, 160]
+
+
+def test_parse_plan():
+    reply = "Objects: door, chair\nDirection: Left\nPlan: left, forward, forward, right, left"
+    assert parse_plan(reply) == ("left", ["left", "forward", "forward", "right"])
+    # A plan that does not start with the decision gets it prepended.
+    assert parse_plan("Direction: right\nPlan: forward, forward", horizon=3) == (
+        "right", ["right", "forward", "forward"])
+    # No labelled lines: the first direction word anywhere, else stop.
+    assert parse_plan("I would go forward then left") == ("forward", ["forward"])
+    assert parse_plan("no idea") == ("stop", ["stop"])
+
+
+def test_plan_steps_and_stop():
+    plan = Plan(["left", "forward", "stop", "right"], step_seconds=0.5, start=10.0)
+    assert plan.steps == ["left", "forward", "stop"]
+    assert [plan.current(10.0 + t) for t in (0.0, 0.6, 1.1, 5.0)] == ["left", "forward", "stop", "stop"]
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.cache import ResponseCache, image_hash
+from vision.frame import Frame
+from vision.screen import dhash
+
+
+def screen(text):
+    image = np.full((480, 640, 3), 255, np.uint8)
+    cv2.putText(image, text, (20, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
+    return image
+
+
+def test_small_on_screen_change_misses_the_cache():
+    cache = ResponseCache()
+    before, after = screen("Build passed: 41 tests"), screen("Build passed: 47 tests")
+    gray = lambda image: cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    assert dhash(gray(before), 16) == dhash(gray(after), 16)  # perceptually the same
+
+    cache.put("gemini", "what is on my screen", "41 tests", image=before)
+    assert cache.get("gemini", "what is on my screen", image=before) == "41 tests"
+    assert cache.get("gemini", "what is on my screen", image=after) is None
+
+
+def test_image_hash_is_the_same_for_every_input_type():
+    bgr = screen("hello")
+    pil = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+    assert image_hash(bgr) == image_hash(Frame.from_bgr(bgr)) == image_hash(pil)
+    assert image_hash(None) == ""
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.camera import CameraGrabber, FileCamera
+
+FPS = 50
+
+
+@pytest.fixture
+def frames_dir(tmp_path):
+    # Frame i is filled with value i, so a frame tells where it came from.
+    for i in range(20):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), np.full((24, 32, 3), i * 10, np.uint8))
+    return str(tmp_path)
+
+
+def value(frame):
+    return int(frame[0, 0, 0]) // 10
+
+
+def test_latest_is_the_newest_frame(frames_dir):
+    grabber = CameraGrabber(device=FileCamera(frames_dir, fps=FPS), buffer_size=3).start()
+    try:
+        assert grabber.wait_newer_than(0, timeout=2)[1] is not None
+        time.sleep(0.2)
+        seen = []
+        for _ in range(5):
+            stamp, frame = grabber.latest()
+            assert time.monotonic() - stamp < 3 / FPS
+            seen.append(value(frame))
+            time.sleep(2 / FPS)
+        # Two periods between lookups: every lookup sees a later frame.
+        assert all(b != a for a, b in zip(seen, seen[1:]))
+        buffered = grabber.frames()
+        assert len(buffered) == 3
+        assert buffered[-1][0] >= grabber.latest()[0] - 1 / FPS
+        assert [s for s, _ in buffered] == sorted(s for s, _ in buffered)
+    finally:
+        grabber.stop()
+
+
+def test_wait_newer_than(frames_dir):
+    grabber = CameraGrabber(device=FileCamera(frames_dir, fps=FPS)).start()
+    try:
+        first, frame = grabber.wait_newer_than(0, timeout=2)
+        t0 = time.monotonic()
+        stamp, newer = grabber.wait_newer_than(first, timeout=1)
+        assert stamp > first
+        assert time.monotonic() - t0 < 3 / FPS
+        assert grabber.newer_than(time.monotonic()) == (None, None)
+    finally:
+        grabber.stop()
+
+
+def test_wait_newer_than_times_out_when_source_runs_dry(frames_dir):
+    grabber = CameraGrabber(device=FileCamera(frames_dir, fps=0, loop=False)).start()
+    try:
+        assert grabber.wait_newer_than(0, timeout=2)[1] is not None
+        time.sleep(0.05)  # 20 frames at full speed are long gone
+        last, _ = grabber.latest()
+        t0 = time.monotonic()
+        assert grabber.wait_newer_than(last, timeout=0.2) == (None, None)
+        assert 0.15 < time.monotonic() - t0 < 1.0
+        assert grabber.frames_read == 20 and grabber.read_failures > 0
+    finally:
+        grabber.stop()
+
+
+def test_stop_and_restart_over_file_camera(frames_dir):
+    device = FileCamera(frames_dir, fps=FPS)
+    grabber = CameraGrabber(device=device).start()
+    assert grabber.wait_newer_than(0, timeout=2)[1] is not None
+    grabber.stop()
+    stopped = time.monotonic()
+    read = grabber.frames_read
+
+    assert not grabber.running
+    assert grabber.latest() == (None, None)  # nothing stale survives a stop
+    assert grabber.wait_newer_than(0, timeout=0.1) == (None, None)
+    time.sleep(0.1)
+    assert grabber.frames_read == read
+
+    grabber.start()
+    try:
+        stamp, frame = grabber.wait_newer_than(0, timeout=2)
+        assert frame is not None and stamp > stopped
+        assert grabber.is_opened()
+        time.sleep(0.1)
+        assert grabber.frames_read > read + 2
+    finally:
+        grabber.stop()
+    device.release()
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import agent.client
+from agent.client import HttpClient
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """/ok answers at once, /busy/<n> answers 503 n times, /slow sleeps 1 s."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.ports.append(self.client_address[1])
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        if self.path.startswith("/busy/") and hits <= int(self.path.rsplit("/", 1)[1]):
+            self.send_response(503)
+            if server.retry_after:
+                self.send_header("Retry-After", server.retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/slow":
+            time.sleep(1.0)
+        body = json.dumps({"response": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.lock = threading.Lock()
+    server.ports, server.hits, server.retry_after = [], {}, None
+    server.base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waits = []
+    monkeypatch.setattr(agent.client.time, "sleep", waits.append)
+    return waits
+
+
+def test_consecutive_calls_reuse_one_connection(server):
+    client = HttpClient().mount(server.base, "stand-in", pool_size=2)
+    for _ in range(20):
+        assert client.post(server.base + "/ok", json={}).json() == {"response": "ok"}
+    assert len(server.ports) == 20
+    assert len(set(server.ports)) == 1
+    client.close()
+
+
+def test_retryable_status_is_retried_with_bounded_backoff(server, sleeps):
+    client = HttpClient(retries=3, backoff=0.5, max_backoff=1.5, seed=0).mount(server.base, "stand-in")
+    response = client.post(server.base + "/busy/2", json={})
+    assert response.status_code == 200
+    assert server.hits["/busy/2"] == 3
+    assert client.endpoints["stand-in"].counts == {"requests": 1, "retries": 2, "failures": 0}
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+
+    response = client.post(server.base + "/busy/9", json={})
+    assert response.status_code == 503
+    assert server.hits["/busy/9"] == 4
+    assert sleeps[-1] <= 1.5  # capped at max_backoff
+    assert client.endpoints["stand-in"].counts == {"requests": 2, "retries": 5, "failures": 1}
+
+
+def test_retry_after_is_honoured(server, sleeps):
+    server.retry_after = "1"
+    client = HttpClient(retries=1, backoff=0.01, seed=0).mount(server.base, "stand-in")
+    assert client.post(server.base + "/busy/1", json={}).status_code == 200
+    assert sleeps == [1.0]
+
+
+def test_status_outside_endpoint_retry_status_is_returned_at_once(server, sleeps):
+    client = HttpClient(retries=3).mount(server.base, "stand-in", retry_status=(429, 502, 504))
+    assert client.post(server.base + "/busy/1", json={}).status_code == 503
+    assert server.hits["/busy/1"] == 1
+    assert sleeps == []
+
+
+def test_post_read_timeout_is_not_resent(server):
+    client = HttpClient(retries=3, backoff=0.01).mount(server.base, "stand-in")
+    with pytest.raises(requests.ReadTimeout):
+        client.post(server.base + "/slow", json={}, timeout=(1, 0.2))
+    assert server.hits["/slow"] == 1
+    assert client.endpoints["stand-in"].counts["retries"] == 0
+
+
+def test_connection_errors_are_retried_for_post(sleeps):
+    client = HttpClient(retries=2, backoff=0.01)
+    with pytest.raises(requests.ConnectionError):
+        client.post("http://127.0.0.1:9/closed", json={}, timeout=1)
+    assert client.report()["other"]["retries"] == 2
+    assert len(sleeps) == 2
+
+
+def test_deadline_bounds_retries_and_timeouts(server):
+    client = HttpClient(retries=10, backoff=0.2, max_backoff=0.2, seed=0).mount(server.base, "stand-in")
+    t0 = time.monotonic()
+    response = client.post(server.base + "/busy/99", json={}, deadline=0.5)
+    assert response.status_code == 503
+    assert time.monotonic() - t0 < 0.6
+    assert server.hits["/busy/99"] < 10
+
+    t0 = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.post(server.base + "/slow", json={}, deadline=0.3)
+    assert time.monotonic() - t0 < 0.6
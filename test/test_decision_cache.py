@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.decision_cache import DecisionCache
+
+
+class Model:
+    """Counts calls; answers with a fixed direction."""
+
+    def __init__(self, answer="forward"):
+        self.answer = answer
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.answer
+
+
+def test_nearby_features_share_a_bucket():
+    cache, model = DecisionCache(step=16), Model()
+    assert cache.get_or_compute((120, 180, 90), "go to the door", model) == "forward"
+    # Same buckets (112-127, 176-191, 80-95) and the same task up to case/spaces.
+    assert cache.get_or_compute((127.9, 176.0, 81.5), "  Go to the DOOR ", model) == "forward"
+    assert model.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.hit_rate == 0.5
+
+
+def test_changed_features_or_task_miss():
+    cache, model = DecisionCache(step=16), Model()
+    cache.get_or_compute((120, 180, 90), "go to the door", model)
+    cache.get_or_compute((128, 180, 90), "go to the door", model)  # left zone changed bucket
+    cache.get_or_compute((120, 180, 90), "find the chair", model)
+    assert model.calls == 3 and cache.misses == 3 and len(cache) == 3
+
+
+def test_per_feature_step():
+    cache, model = DecisionCache(step=(64, 64, 64, 0.05)), Model()
+    cache.get_or_compute((120, 180, 90, 0.10), "explore", model)
+    assert cache.get((100, 150, 70, 0.12), "explore") == "forward"
+    assert cache.get((120, 180, 90, 0.16), "explore") is None  # edge density moved
+
+
+def test_entries_expire_after_ttl():
+    cache, model = DecisionCache(step=16, ttl=0.1), Model()
+    cache.get_or_compute((120, 180, 90), "explore", model)
+    assert cache.get((120, 180, 90), "explore") == "forward"
+    time.sleep(0.15)
+    assert cache.get((120, 180, 90), "explore") is None
+    assert cache.expired == 1 and len(cache) == 0
+    cache.get_or_compute((120, 180, 90), "explore", model)
+    assert model.calls == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = DecisionCache(step=1, max_size=2)
+    cache.put((1,), "t", "left")
+    cache.put((2,), "t", "right")
+    assert cache.get((1,), "t") == "left"  # (1,) is now the most recent
+    cache.put((3,), "t", "stop")
+    assert cache.get((2,), "t") is None
+    assert cache.get((1,), "t") == "left" and cache.evictions == 1
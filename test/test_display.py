@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.display import DisplayWorker
+
+
+@pytest.fixture
+def slow_gui(monkeypatch):
+    """Stand-in HighGUI where every draw and event pump takes 50 ms."""
+    gui = {"drawn": [], "destroyed": [], "threads": set()}
+
+    def imshow(title, frame):
+        gui["threads"].add(threading.current_thread().name)
+        time.sleep(0.05)
+        gui["drawn"].append((title, int(frame[0, 0, 0])))
+
+    def wait_key(delay):
+        time.sleep(0.05)
+        return -1
+
+    monkeypatch.setattr(cv2, "imshow", imshow)
+    monkeypatch.setattr(cv2, "waitKey", wait_key)
+    monkeypatch.setattr(cv2, "destroyWindow", gui["destroyed"].append)
+    return gui
+
+
+def test_capture_loop_is_not_stalled_by_previews(slow_gui):
+    worker = DisplayWorker(hold=0.2, headless=False).start()
+    period, frames = 0.01, 60
+    show_times = []
+
+    t0 = time.perf_counter()
+    for i in range(frames):
+        time.sleep(period)  # camera read
+        frame = np.full((48, 64, 3), i, np.uint8)
+        s0 = time.perf_counter()
+        worker.show("camera", frame)
+        show_times.append(time.perf_counter() - s0)
+    elapsed = time.perf_counter() - t0
+    time.sleep(0.2)
+    worker.stop()
+
+    # Drawing inline would take >= 0.1 s per frame (6 s in total).
+    assert max(show_times) < 0.01
+    assert elapsed < frames * period * 1.5
+    assert worker.dropped > 0
+
+    drawn = [value for _, value in slow_gui["drawn"]]
+    assert drawn == sorted(drawn) and len(drawn) < frames
+    assert drawn[-1] >= frames - 3  # the newest frames made it to screen
+    assert slow_gui["threads"] == {"display-worker"}
+
+
+def test_windows_close_after_hold(slow_gui):
+    worker = DisplayWorker(hold=0.1, headless=False).start()
+    worker.show("camera", np.zeros((8, 8, 3), np.uint8))
+    deadline = time.monotonic() + 2
+    while "camera" not in slow_gui["destroyed"] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    worker.stop()
+    assert slow_gui["destroyed"] == ["camera"]
+
+
+def test_headless_show_is_a_no_op(slow_gui):
+    worker = DisplayWorker(headless=True)
+    worker.show("camera", np.zeros((8, 8, 3), np.uint8))
+    assert worker._thread is None
+    assert slow_gui["drawn"] == []
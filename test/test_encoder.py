@@ -0,0 +1,50 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.encoder import PROVIDERS, BudgetEncoder
+from vision.frame import Frame
+
+
+def camera_frame():
+    rng = np.random.default_rng(0)
+    return cv2.GaussianBlur(rng.integers(0, 255, (1080, 1920, 3), np.uint8), (5, 5), 0)
+
+
+def screen_frame():
+    desk = np.full((1080, 1920, 3), 245, np.uint8)
+    for row in range(40, 1080, 28):
+        cv2.putText(desk, "def capture_screenshot(): return frame" * 2, (10, row),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (20, 20, 20), 1)
+    return desk
+
+
+@pytest.mark.parametrize("provider", sorted(PROVIDERS))
+@pytest.mark.parametrize("source, text", [("camera", False), ("screen", True)])
+def test_encoded_image_fits_the_provider_budget(provider, source, text):
+    pixels = camera_frame() if source == "camera" else screen_frame()
+    encoder = BudgetEncoder.for_provider(provider, text=text)
+    result = encoder.encode(Frame(pixels, source=source))
+
+    profile = PROVIDERS[provider]
+    assert len(result) <= profile["max_bytes"]
+    assert max(result.size) <= profile["max_side"]
+    if profile["max_tokens"]:
+        assert result.tokens <= profile["max_tokens"]
+    assert abs(result.size[0] / result.size[1] - 1920 / 1080) < 0.01
+    decoded = cv2.imdecode(np.frombuffer(result.data, np.uint8), cv2.IMREAD_COLOR)
+    assert (decoded.shape[1], decoded.shape[0]) == result.size
+    assert result.attempts <= 8
+
+
+def test_text_mode_gives_up_quality_before_resolution():
+    budget = {"max_bytes": 120_000, "max_tokens": None, "max_side": 1920}
+    screen = BudgetEncoder.for_provider("gemini", text=True, **budget).encode(Frame(screen_frame()))
+    photo = BudgetEncoder.for_provider("gemini", **budget).encode(Frame(screen_frame()))
+    assert len(screen) <= 120_000 and len(photo) <= 120_000
+    assert max(screen.size) >= 1024 and max(screen.size) > max(photo.size)
+    assert screen.quality < photo.quality
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.intent import IntentRouter
+from agent.speculative import SpeculativeExecutor
+
+
+class Fallback:
+    """Stand-in for the Ollama intent call; records what reached it."""
+
+    def __init__(self, intent="CHAT"):
+        self.intent = intent
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return self.intent
+
+
+def test_training_examples_are_answered_locally():
+    fallback = Fallback()
+    router = IntentRouter(fallback)
+    for text, intent in (("what do you see", "CAMERA"), ("What do you see?", "CAMERA"), ("exit", "STOP")):
+        routed = router.route(text)
+        assert (routed.intent, routed.tier, routed.confidence) == (intent, "local", 1.0)
+    assert fallback.calls == []
+
+
+def test_uncertain_stop_goes_to_the_fallback():
+    fallback = Fallback()
+    router = IntentRouter(fallback)
+    intent, confidence = router.classifier.predict("stop the music")
+    assert intent == "STOP" and router.threshold > confidence
+    routed = router.route("stop the music")
+    assert (routed.intent, routed.tier) == ("CHAT", "fallback")
+
+    # A STOP above the general threshold still needs the STOP threshold.
+    router = IntentRouter(fallback, threshold=0.5)
+    assert router.route("stop the music").tier == "fallback"
+    assert not router.confident("STOP", 0.9) and router.confident("CAMERA", 0.9)
+    assert fallback.calls == ["stop the music", "stop the music"]
+
+
+def test_speculative_executor_uses_the_stop_threshold():
+    fallback = Fallback()
+    executor = SpeculativeExecutor(IntentRouter(fallback, threshold=0.5), lambda text: "reply", {})
+    try:
+        turn = executor.run("stop the music")
+        assert turn.routed.tier == "fallback" and turn.intent == "CHAT"
+        assert turn.chat() == "reply"
+        assert executor.run("goodbye").routed.tier == "local"
+        assert fallback.calls == ["stop the music"]
+    finally:
+        executor.close()
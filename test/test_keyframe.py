@@ -0,0 +1,57 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.keyframe import KeyframeSelector, evaluate_clip
+
+FPS = 10
+
+
+def write_clip(path, events, seconds=6, seed=0):
+    """
+    Noisy static scene at FPS; ``events`` maps a frame index to a change
+    applied to the scene from that frame on.
+    """
+    rng = np.random.default_rng(seed)
+    scene = cv2.GaussianBlur(rng.integers(0, 255, (240, 320, 3), np.uint8), (0, 0), 4)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (320, 240))
+    assert writer.isOpened()
+    for index in range(seconds * FPS):
+        if index in events:
+            scene = events[index](scene)
+        writer.write(cv2.add(scene, rng.integers(0, 6, scene.shape, np.uint8)))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def clip(tmp_path):
+    return write_clip(str(tmp_path / "clip.avi"), {
+        20: lambda scene: np.roll(scene, 80, axis=1),  # the robot turned
+        40: lambda scene: scene // 3,                  # lights dimmed
+    })
+
+
+def test_replayed_clip_selects_only_scene_changes(clip):
+    stats, keys = evaluate_clip(clip)
+    assert keys == [0.0, 2.0, 4.0]
+    assert stats["calls_made"] == 3
+    assert stats["calls_avoided"] == 6 * FPS - 3
+
+
+def test_sampled_clip_keeps_the_same_changes(clip):
+    stats, keys = evaluate_clip(clip, sample_fps=1)
+    assert keys == [0.0, 2.0, 4.0]
+    assert stats["calls_made"] + stats["calls_avoided"] == 6
+
+
+def test_static_clip_is_refreshed_after_max_staleness(tmp_path):
+    clip = write_clip(str(tmp_path / "static.avi"), {})
+    _, keys = evaluate_clip(clip, KeyframeSelector(max_staleness=2.0))
+    assert keys == [0.0, 2.0, 4.0]
+    _, keys = evaluate_clip(clip, KeyframeSelector(max_staleness=None))
+    assert keys == [0.0]
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import robot.llm
+from robot.llm import default_threads, quantize_int8
+
+
+def test_default_threads_respects_cpu_affinity(monkeypatch):
+    if not hasattr(os, "sched_getaffinity"):
+        pytest.skip("no CPU affinity on this platform")
+    monkeypatch.setattr(os, "cpu_count", lambda: 64)
+    monkeypatch.setattr(robot.llm, "TORCH_THREADS", 32)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1})
+    assert default_threads() == 2
+    monkeypatch.setattr(robot.llm, "TORCH_THREADS", 1)
+    assert default_threads() == 1
+
+
+def test_quantize_int8_keeps_outputs_close():
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(torch.nn.Linear(32, 32), torch.nn.ReLU(), torch.nn.Linear(32, 4)).eval()
+    x = torch.randn(8, 32)
+    expected = model(x)
+    quantized = quantize_int8(model)
+    with torch.inference_mode():
+        assert torch.allclose(quantized(x), expected, atol=0.05)
+
+
+def test_quantize_int8_falls_back_to_float(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "torchao", None)
+    monkeypatch.delattr(torch.ao.quantization, "quantize_dynamic")
+    model = torch.nn.Linear(4, 4)
+    assert quantize_int8(model) is model
+    assert "running in float" in capsys.readouterr().out
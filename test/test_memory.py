@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.longterm import HashedEmbedder, LongTermMemory
+from agent.memory import ConversationMemory, estimate_tokens
+
+
+def long_turns(memory, n):
+    for turn in range(n):
+        memory.add(f"question {turn} " + "x" * 80, f"answer {turn} " + "y" * 200)
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_failing_summarizer_backs_off_warns_once_and_disables(capsys):
+    calls = []
+
+    def broken(summary, lines, max_tokens):
+        calls.append(time.monotonic())
+        raise ConnectionError("ollama is not running")
+
+    memory = ConversationMemory(budget=200, summary_budget=50, summarize=broken,
+                                max_failures=4, retry_delay=0.02, max_retry_delay=0.05)
+    long_turns(memory, 6)
+    assert wait_for(lambda: memory.summarize is False)
+
+    gaps = [b - a for a, b in zip(calls, calls[1:])]
+    assert len(calls) == 4
+    assert gaps[1] > gaps[0] * 1.5 and gaps[2] < 0.1  # doubles, then capped
+    out = capsys.readouterr().out
+    assert out.count("Memory summary failed") == 1
+    assert "disabled after 4 failures" in out
+
+    long_turns(memory, 100)
+    assert memory.report()["pending"] <= memory.max_pending
+    assert len(calls) == 4
+    assert memory.tokens() <= memory.budget
+
+
+def test_lines_the_summarizer_cannot_take_are_kept_verbatim():
+    def broken(summary, lines, max_tokens):
+        raise ConnectionError("ollama is not running")
+
+    memory = ConversationMemory(budget=400, summary_budget=100, summarize=broken,
+                                max_failures=1, retry_delay=0.01, max_pending=4)
+    for turn in range(4):
+        memory.add(f"my fact {turn}", f"noted {turn}")
+    memory.add("question 4 " + "x" * 600, "answer 4 " + "y" * 600)  # evicts the facts
+    assert wait_for(lambda: memory.summarize is False)
+
+    assert memory.report()["pending"] == 0
+    assert "my fact 0" in memory.verbatim and "noted 3" in memory.verbatim
+    assert "Earlier lines (not summarized): " in memory.context()
+    assert "noted 3" in memory.context()
+
+    # Bounded: later evictions push the oldest verbatim text out.
+    for turn in range(5, 60):
+        memory.add(f"my fact {turn}", f"noted {turn}")
+    memory.add("question 60 " + "x" * 1200, "answer 60")
+    assert estimate_tokens(memory.verbatim) <= memory.summary_budget
+    assert memory.verbatim.startswith("…") and "my fact 0" not in memory.verbatim
+    assert memory.verbatim.endswith("noted 57")  # 58 onwards still wait in pending
+    assert memory.report()["pending"] == 4
+    assert memory.tokens() <= memory.budget
+
+
+def test_pending_lines_are_bounded_while_summarizer_is_slow():
+    def slow(summary, lines, max_tokens):
+        time.sleep(0.2)
+        return "short summary"
+
+    memory = ConversationMemory(budget=200, summary_budget=50, summarize=slow, max_pending=8)
+    long_turns(memory, 50)
+    report = memory.report()
+    assert report["pending"] <= 8
+    assert report["verbatim"] > 0
+    assert memory.wait(timeout=5)
+    # Lines that overflowed while the summarizer was busy are in the summary
+    # or still visible verbatim; the newest of them is never lost.
+    assert "answer 49 " in memory.context()
+
+
+def test_long_summary_is_recompressed_not_clipped():
+    requests = []
+
+    def verbose(summary, lines, max_tokens):
+        requests.append(lines)
+        if len(requests) == 1:
+            return "the user likes cats. " * 40
+        return "the user likes cats."
+
+    memory = ConversationMemory(budget=200, summary_budget=30, summarize=verbose)
+    long_turns(memory, 3)
+    assert memory.wait(timeout=5)
+    assert memory.summary == "the user likes cats."
+    assert requests[1] == ["the user likes cats. " * 40]
+    assert memory.counts["recompressed"] == 1
+
+
+def test_summary_that_stays_long_is_kept_whole():
+    text = "fact number %d is kept. "
+    long_summary = "".join(text % i for i in range(30))
+
+    memory = ConversationMemory(budget=400, summary_budget=30,
+                                summarize=lambda summary, lines, max_tokens: long_summary)
+    long_turns(memory, 8)
+    assert memory.wait(timeout=5)
+    assert memory.summary == long_summary
+    assert estimate_tokens(memory.summary) > memory.summary_budget
+    assert not memory.summary.endswith("…")
+
+
+def test_long_term_skips_exactly_the_turns_short_term_shows(tmp_path):
+    memory = ConversationMemory(budget=200, summary_budget=50, summarize=False)
+    long_term = LongTermMemory(str(tmp_path), HashedEmbedder(), k=20, min_score=-1.0)
+    long_turns(memory, 8)
+    long_turns(long_term, 8)
+
+    shown = memory.recent_turns()
+    context = memory.context()
+    assert 0 < shown < 8
+    assert f"answer {8 - shown} " in context and f"answer {7 - shown} " not in context
+
+    recalled = {record["user"].split()[1] for _, record in
+                long_term.recall("question", skip_recent=shown)}
+    assert recalled == {str(turn) for turn in range(8 - shown)}
+    long_term.close()
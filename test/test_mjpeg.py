@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import struct
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.mjpeg import MJPEGStream, MJPEGTestServer
+
+
+def encode(size, value):
+    frame = np.full((size, size, 3), value, np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def with_exif_thumbnail(jpeg, thumbnail):
+    # APP1 "Exif" segment right after SOI, carrying a complete JPEG (its own SOI/EOI)
+    payload = b"Exif\x00\x00" + thumbnail
+    segment = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    return jpeg[:2] + segment + jpeg[2:]
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_reconnects_after_stalled_stream():
+    server = MJPEGTestServer([encode(32, v) for v in (0, 128, 255)], fps=50, stall_after=3)
+    stream = MJPEGStream(server.url, timeout=0.5, backoff=0.05, max_backoff=0.1)
+    try:
+        assert wait_for(lambda: stream.reconnects >= 1 and stream.frames_received > 3)
+        assert server.connections >= 2
+        assert stream.last_error is not None
+        ok, frame = stream.read(timeout=2)
+        assert ok and frame.shape == (32, 32, 3)
+    finally:
+        stream.release()
+        server.close()
+
+
+def test_exif_thumbnail_does_not_split_frame():
+    jpeg = with_exif_thumbnail(encode(64, 200), encode(8, 10))
+    assert cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR) is not None
+
+    server = MJPEGTestServer([jpeg], fps=50)
+    stream = MJPEGStream(server.url, timeout=2)
+    try:
+        ok, frame = stream.read(timeout=2)
+        assert ok and frame.shape == (64, 64, 3)
+        assert stream.latest_jpeg()[1] == jpeg
+    finally:
+        stream.release()
+        server.close()
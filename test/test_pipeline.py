@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.pipeline import RobotPipeline
+from robot.tiered import TieredController
+
+
+def run(pipe, timeout=5.0):
+    pipe.start()
+    pipe.wait(timeout=timeout)
+    pipe.stop()
+
+
+def test_reflex_acts_on_every_frame_while_model_is_busy():
+    counter = itertools.count()
+    stamps, actions = [], []
+
+    def read_frame():
+        time.sleep(0.01)
+        return True, next(counter)
+
+    def infer(frame):
+        time.sleep(1.0)
+        return "forward"
+
+    def reflex(frame, stamp):
+        stamps.append(stamp)
+        return "left" if frame == 20 else None
+
+    def act(decision):
+        actions.append(decision)
+        return decision.source != "reflex"
+
+    pipe = RobotPipeline(read_frame, infer, act, reflex=reflex)
+    run(pipe)
+
+    # Checked on consecutive frames with their own capture time, and acted on
+    # long before the 1 s model call could have returned.
+    assert len(stamps) >= 20 and stamps == sorted(stamps)
+    assert [(d.value, d.source) for d in actions] == [("left", "reflex")]
+    assert actions[0].decided_time - actions[0].frame_time < 0.1
+    assert pipe.reflexes == 1
+
+
+def test_model_decisions_older_than_a_reflex_are_dropped():
+    counter = itertools.count()
+    actions = []
+
+    def read_frame():
+        time.sleep(0.01)
+        return True, next(counter)
+
+    def infer(frame):
+        time.sleep(0.3)  # started on an early frame, finishes after the reflex
+        return "forward"
+
+    def act(decision):
+        actions.append((decision.value, decision.source))
+        return len(actions) < 2
+
+    pipe = RobotPipeline(read_frame, infer, act, reflex=lambda frame, stamp: "stop" if frame == 5 else None)
+    run(pipe)
+
+    assert actions[0] == ("stop", "reflex")
+    assert actions[1] == ("forward", "model")
+    assert pipe.stale_decisions >= 1
+
+
+def test_controller_collision_counts_only_hits():
+    controller = TieredController(lambda zones, task, frame: "forward")
+    inf = float("inf")
+    assert controller.collision((120, 120, 120), (inf, inf, inf)) is None
+    decision = controller.collision((200, 40, 90), (inf, 0.4, inf))
+    assert (decision.direction, decision.reason) == ("left", "collision")
+    assert controller.counts["collision"] == 1
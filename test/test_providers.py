@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.providers import Provider, ProviderBusy, ProviderError, ProviderRouter
+
+
+class Scripted(Provider):
+    """Answers after ``ttft`` seconds, or fails fast while ``down``."""
+
+    def __init__(self, name, ttft=0.01, down=False, hedge_after=3.0, concurrency=4):
+        super().__init__(name, concurrency=concurrency)
+        self.ttft, self.down, self.hedge_after = ttft, down, hedge_after
+
+    def hedge_delay(self, **kwargs):
+        return self.hedge_after
+
+    def deltas(self, prompt, image=None, deadline=None):
+        if self.down:
+            raise ConnectionError(f"{self.name} is down")
+        time.sleep(self.ttft)
+        yield self.name
+
+
+@pytest.fixture
+def routers():
+    made = []
+    yield lambda *args, **kwargs: made.append(ProviderRouter(*args, **kwargs)) or made[-1]
+    for router in made:
+        router.close()
+
+
+def ask(router):
+    return "".join(router.deltas("hi"))
+
+
+def test_failing_provider_is_demoted_then_restored(routers):
+    primary, secondary = Scripted("primary", down=True), Scripted("secondary")
+    router = routers([primary, secondary], deadline=2.0, max_failures=2, cooldown=0.3)
+
+    assert [ask(router) for _ in range(2)] == ["secondary", "secondary"]
+    assert router.demoted() == ["primary"]
+    assert router.counts["fallbacks"] == 2
+
+    # While demoted, requests go straight to the healthy provider.
+    for _ in range(3):
+        assert ask(router) == "secondary"
+    assert primary.counts["started"] == 2
+    assert router.counts["fallbacks"] == 2
+
+    # After the cooldown it is tried first again; one success restores it.
+    primary.down = False
+    time.sleep(0.35)
+    assert router.demoted() == []
+    assert ask(router) == "primary"
+    assert router.report()["demoted"] == []
+    assert router.counts["demotions"] == 1
+
+
+def test_demoted_provider_is_still_a_last_resort(routers):
+    primary, secondary = Scripted("primary", down=True), Scripted("secondary")
+    router = routers([primary, secondary], deadline=2.0, max_failures=1, cooldown=60)
+    assert ask(router) == "secondary"
+    assert router.demoted() == ["primary"]
+
+    secondary.down, primary.down = True, False
+    assert ask(router) == "primary"
+    assert router.demoted() == ["secondary"]
+
+
+def test_hedge_after_failover_follows_the_fallback_provider(routers):
+    # The primary fails at once and its own hedge delay is long; the
+    # fallback stalls, and its short hedge delay must start the third.
+    first = Scripted("first", down=True, hedge_after=10.0)
+    stalled = Scripted("stalled", ttft=1.5, hedge_after=0.25)
+    fast = Scripted("fast", ttft=0.01)
+    router = routers([first, stalled, fast], deadline=3.0, min_hedge_delay=0.05)
+
+    t0 = time.monotonic()
+    assert ask(router) == "fast"
+    assert time.monotonic() - t0 < 0.8
+    assert router.counts["hedges"] == 1 and router.counts["fallbacks"] == 1
+
+
+def test_all_providers_down_raises(routers):
+    router = routers([Scripted("a", down=True), Scripted("b", down=True)], deadline=1.0)
+    with pytest.raises(ProviderError) as error:
+        ask(router)
+    assert set(error.value.errors) == {"a", "b"}
+
+
+def test_busy_provider_is_skipped_not_demoted(routers):
+    primary = Scripted("primary", ttft=0.6, concurrency=1)
+    secondary = Scripted("secondary")
+    router = routers([primary, secondary], deadline=2.0, max_failures=1)
+
+    # Holds primary's only slot for 0.6 s.
+    holder = threading.Thread(target=ask, args=(router,))
+    holder.start()
+    time.sleep(0.1)
+    try:
+        t0 = time.monotonic()
+        assert ask(router) == "secondary"
+        assert time.monotonic() - t0 < 0.2  # started at once, no hedge wait
+        assert router.counts["hedges"] == 0 and router.counts["fallbacks"] == 0
+
+        # With nothing else to try, running out of time waiting is "busy".
+        with pytest.raises(ProviderError) as error:
+            "".join(router.deltas("hi", deadline=0.2, order=["primary"]))
+        assert all(isinstance(e, ProviderBusy) for e in error.value.errors.values())
+        assert router.demoted() == []
+        assert primary.counts["failed"] == 0
+    finally:
+        holder.join()
+    assert router.demoted() == [] and primary.counts["won"] == 1
@@ -0,0 +1,86 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.replay import MockModel, Recorder, ReplayCamera, open_input, open_screen
+from vision.screen import ScreenCapture
+
+
+def record(path, values):
+    with Recorder(path, ext=".png") as recorder:
+        for i, value in enumerate(values):
+            recorder.write(np.full((24, 32, 3), value, np.uint8), timestamp=i * 0.5)
+
+
+def test_exhausted_screenshot_replay_raises(tmp_path):
+    path = str(tmp_path / "screen.rec")
+    record(path, [10, 20])
+    replay = ReplayCamera(path, speed=0)
+    assert replay.screenshot().getpixel((0, 0)) == (10, 10, 10)
+    assert replay.screenshot().getpixel((0, 0)) == (20, 20, 20)
+    with pytest.raises(EOFError):
+        replay.screenshot()
+
+
+def test_screen_replay_loops_and_feeds_screen_capture(tmp_path, monkeypatch):
+    record(str(tmp_path / "screen.rec"), [10, 200])
+    monkeypatch.setenv("JARVIS_REPLAY", str(tmp_path))
+
+    grab = open_screen()
+    values = [grab().getpixel((0, 0))[0] for _ in range(5)]
+    assert values == [10, 200, 10, 200, 10]
+
+    screen = ScreenCapture()  # defaults to open_screen(), so replays too
+    assert screen.capture().frame.shape == (24, 32, 3)
+    assert not screen.capture().unchanged
+
+
+def test_screen_record_then_replay(tmp_path, monkeypatch):
+    shots = iter([Image.new("RGB", (32, 24), (30, 60, 90)), Image.new("RGB", (32, 24), (0, 0, 0))])
+    monkeypatch.setenv("JARVIS_RECORD", str(tmp_path))
+    grab = open_screen(lambda: next(shots))
+    grab(), grab()
+    grab.recorder.close()
+
+    monkeypatch.delenv("JARVIS_RECORD")
+    monkeypatch.setenv("JARVIS_REPLAY", str(tmp_path))
+    replay = open_screen()
+    assert replay().getpixel((5, 5)) == (30, 60, 90)
+    assert replay().getpixel((5, 5)) == (0, 0, 0)
+
+
+def test_pyautogui_is_only_imported_for_the_live_screen(tmp_path, monkeypatch):
+    record(str(tmp_path / "screen.rec"), [10])
+    monkeypatch.setenv("JARVIS_REPLAY", str(tmp_path))
+    monkeypatch.delitem(sys.modules, "pyautogui", raising=False)
+    open_screen()()
+    assert "pyautogui" not in sys.modules
+
+
+def test_typed_input_record_then_replay(tmp_path, monkeypatch, capsys):
+    typed = iter(["hello", "what is on my screen"])
+    monkeypatch.setenv("JARVIS_RECORD", str(tmp_path))
+    read = open_input(lambda prompt: next(typed))
+    assert [read("You: "), read("You: ")] == ["hello", "what is on my screen"]
+    read._file.close()
+
+    monkeypatch.delenv("JARVIS_RECORD")
+    monkeypatch.setenv("JARVIS_REPLAY", str(tmp_path))
+    read = open_input()
+    assert read("You: ") == "hello"
+    assert read("You: ") == "what is on my screen"
+    with pytest.raises(EOFError):
+        read("You: ")
+    assert "You: hello" in capsys.readouterr().out
+
+
+def test_mock_model_streams_like_gemini():
+    model = MockModel(reply="left", latency=0)
+    chunks = model.generate_content(["go", Image.new("RGB", (4, 4))], stream=True)
+    assert [chunk.text for chunk in chunks] == ["left"]
+    assert model.generate_content("go").text == "left"
+    assert model.calls == 2
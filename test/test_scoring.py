@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.scoring import DIRECTIONS, DirectionScorer
+
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+PROMPT = "Task: go to open area. Left zone brightness: 40. Answer one word: forward, left, right, stop"
+
+
+def tiny_t5():
+    """Randomly initialised two-layer T5 with a word-level tokenizer, built offline."""
+    words = ["<pad>", "</s>", "<unk>", *DIRECTIONS, *PROMPT.replace(":", " ").replace(".", " ").replace(",", " ").split()]
+    vocab = {word: i for i, word in enumerate(dict.fromkeys(words))}
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Sequence([
+        tokenizers.pre_tokenizers.Whitespace(), tokenizers.pre_tokenizers.Punctuation()])
+    backend.post_processor = tokenizers.processors.TemplateProcessing(
+        single="$A </s>", special_tokens=[("</s>", vocab["</s>"])])
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, pad_token="<pad>", eos_token="</s>", unk_token="<unk>")
+
+    torch.manual_seed(0)
+    config = transformers.T5Config(
+        vocab_size=len(vocab), d_model=16, d_kv=8, d_ff=32, num_layers=2, num_heads=2,
+        pad_token_id=vocab["<pad>"], eos_token_id=vocab["</s>"], decoder_start_token_id=vocab["<pad>"])
+    return transformers.T5ForConditionalGeneration(config), tokenizer
+
+
+def test_scores_all_directions_in_one_batch():
+    model, tokenizer = tiny_t5()
+    scorer = DirectionScorer(model, tokenizer)
+
+    batches = []
+    hook = model.decoder.register_forward_pre_hook(
+        lambda module, args, kwargs: batches.append(kwargs["input_ids"].shape[0]), with_kwargs=True)
+    try:
+        choice, confidence, scores = scorer.score(PROMPT)
+    finally:
+        hook.remove()
+
+    assert batches == [len(DIRECTIONS)]  # one decoder pass covers every candidate
+    assert set(scores) == set(DIRECTIONS)
+    assert choice == max(scores, key=scores.get)
+    probs = torch.softmax(torch.tensor([scores[d] for d in DIRECTIONS]), dim=0)
+    assert confidence == pytest.approx(float(probs.max()), abs=1e-5)
+
+    # Padding the batch does not change any candidate's score.
+    inputs = tokenizer(PROMPT, return_tensors="pt")
+    with torch.inference_mode():
+        for direction in DIRECTIONS:
+            labels = tokenizer(direction, return_tensors="pt").input_ids
+            loss = model(**inputs, labels=labels).loss
+            assert scores[direction] == pytest.approx(-float(loss) * labels.shape[1], abs=1e-4)
+
+
+def test_rejects_decoder_only_models():
+    config = transformers.GPT2Config(vocab_size=8, n_embd=8, n_layer=1, n_head=1)
+    with pytest.raises(ValueError):
+        DirectionScorer(transformers.GPT2LMHeadModel(config), None)
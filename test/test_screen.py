@@ -0,0 +1,105 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.frame import Frame
+from vision.screen import FULL, REGIONS, UNCHANGED, ChangeDetector, ScreenTurns, dhash, hamming
+
+
+def desktop():
+    rng = np.random.default_rng(0)
+    desk = np.full((720, 1280, 3), 235, np.uint8)
+    for _ in range(12):  # a few windows, so the hash has structure
+        x, y = rng.integers(0, 1100), rng.integers(0, 600)
+        cv2.rectangle(desk, (int(x), int(y)), (int(x) + 180, int(y) + 120), rng.integers(0, 200, 3).tolist(), -1)
+    return desk
+
+
+def typed(desk, text="hello", at=(400, 300)):
+    edited = desk.copy()
+    cv2.putText(edited, text, at, cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    return edited
+
+
+def test_first_and_identical_frames():
+    detector = ChangeDetector()
+    desk = desktop()
+    assert detector.update(desk).kind == FULL
+    change = detector.update(desk.copy())
+    assert change.kind == UNCHANGED and change.crops() == []
+    # Sensor-level noise below pixel_threshold is not a change.
+    noisy = cv2.add(desk, np.full_like(desk, 5))
+    assert detector.update(noisy).kind == UNCHANGED
+    assert detector.stats == {UNCHANGED: 2, REGIONS: 0, FULL: 1}
+
+
+def test_small_edit_reports_the_dirty_region():
+    detector = ChangeDetector(tile=32)
+    desk = desktop()
+    detector.update(desk)
+    change = detector.update(typed(desk))
+    assert change.kind == REGIONS
+    assert len(change.regions) == 1
+    x, y, w, h = change.regions[0]
+    assert x <= 400 and y <= 300 - 25 and x + w >= 480 and y + h >= 300
+    assert w * h < 0.05 * 1280 * 720
+    assert change.bounds() == change.regions[0]
+    assert change.crops()[0].size == (w, h)
+
+    # Two distant edits give two boxes and bounds() covers both.
+    detector.update(desk)
+    change = detector.update(typed(typed(desk), "bye", (1000, 600)))
+    assert change.kind == REGIONS and len(change.regions) == 2
+    x, y, w, h = change.bounds()
+    assert x <= 400 and x + w >= 1050 and y + h >= 600
+
+
+def test_large_change_reports_the_full_frame():
+    detector = ChangeDetector()
+    desk = desktop()
+    detector.update(desk)
+    inverted = 255 - desk
+    assert hamming(dhash(cv2.cvtColor(desk, cv2.COLOR_RGB2GRAY)),
+                   dhash(cv2.cvtColor(inverted, cv2.COLOR_RGB2GRAY))) >= detector.full_hash_distance
+    change = detector.update(inverted)
+    assert change.kind == FULL and change.bounds() == (0, 0, 1280, 720)
+
+    # Many dirty tiles without a big hash move still count as FULL.
+    detector = ChangeDetector(full_fraction=0.5, full_hash_distance=65)
+    detector.update(desk)
+    half = desk.copy()
+    half[:, :800] = 255 - half[:, :800]
+    change = detector.update(half)
+    assert change.kind == FULL and change.changed_fraction > 0.5
+
+    # A resolution change has nothing to diff against.
+    detector.update(desk)
+    assert detector.update(cv2.resize(desk, (640, 360))).kind == FULL
+
+
+def test_screen_turns_reuse_crop_and_send_full():
+    turns = ScreenTurns()
+    desk = Frame.from_rgb(desktop(), source="screen")
+
+    reply, image, note = turns.prepare("what is on my screen", desk)
+    assert reply is None and image is desk and note == ""
+    turns.answered("what is on my screen", "A desktop with windows.")
+
+    # Same question, same pixels: no model call.
+    reply, image, _ = turns.prepare("What is on my  screen", Frame.from_rgb(desktop()))
+    assert (reply, image) == ("A desktop with windows.", None)
+
+    # A different question still needs the screenshot.
+    _, image, _ = turns.prepare("which window is focused", desk)
+    assert image is desk
+
+    # A small edit sends only the changed area.
+    edited = Frame.from_rgb(typed(desktop()), source="screen")
+    reply, image, note = turns.prepare("what changed", edited)
+    assert reply is None and image.source == "screen"
+    assert image.size[0] * image.size[1] < 0.05 * 1280 * 720
+    assert "A desktop with windows." in note
+    assert turns.counts == {"reused": 1, "cropped": 1, "full": 2}
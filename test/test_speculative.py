@@ -0,0 +1,151 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.intent import IntentRouter
+from agent.speculative import SpeculationPolicy, SpeculativeExecutor
+
+
+class Classifier:
+    """Local classifier with fixed, never-confident probabilities."""
+
+    def __init__(self, probabilities):
+        self.probs = probabilities
+
+    def probabilities(self, text):
+        return dict(self.probs)
+
+    def predict(self, text):
+        intent = max(self.probs, key=self.probs.get)
+        return intent, self.probs[intent]
+
+
+class Reply:
+    """Branch result that records whether the executor closed it."""
+
+    def __init__(self, value):
+        self.value = value
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class Branches:
+    """CHAT call and captures that count how often they really ran."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        with self._lock:
+            self.calls.append(name)
+        return Reply(name)
+
+    def chat(self, text):
+        return self._call("CHAT")
+
+    def captures(self):
+        return {"CAMERA": lambda: self._call("CAMERA"), "SCREENSHOT": lambda: self._call("SCREENSHOT")}
+
+
+UNSURE = {"CHAT": 0.4, "CAMERA": 0.35, "SCREENSHOT": 0.2, "STOP": 0.05}
+
+
+def executor_for(answer, branches, policy=None, probabilities=UNSURE):
+    router = IntentRouter(lambda text: answer, Classifier(probabilities))
+    return SpeculativeExecutor(router, branches.chat, branches.captures(), policy)
+
+
+def test_keeps_the_matching_capture_and_discards_the_rest():
+    branches = Branches()
+    executor = executor_for("CAMERA", branches)
+    try:
+        turn = executor.run("so what about this")
+        assert turn.speculated and turn.intent == "CAMERA"
+        assert turn.capture().value == "CAMERA"
+        # Each capture ran once; the wasted CHAT call ran at most once (queued calls are dropped).
+        assert sorted(c for c in branches.calls if c != "CHAT") == ["CAMERA", "SCREENSHOT"]
+        assert branches.calls.count("CHAT") <= 1
+        counts = executor.counts
+        assert (counts["capture_started"], counts["capture_used"], counts["capture_wasted"]) == (2, 1, 1)
+        assert (counts["chat_started"], counts["chat_used"], counts["chat_wasted"]) == (1, 0, 1)
+    finally:
+        executor.close()
+
+
+def test_wrong_branch_in_flight_is_closed_when_it_finishes():
+    release = threading.Event()
+    wasted = Reply("late reply")
+
+    def chat(text):
+        release.wait(5)
+        return wasted
+
+    router = IntentRouter(lambda text: "SCREENSHOT", Classifier(UNSURE))
+    executor = SpeculativeExecutor(router, chat, {"SCREENSHOT": lambda: "frame"})
+    try:
+        turn = executor.run("hmm")
+        assert turn.capture() == "frame" and not wasted.closed.is_set()
+        release.set()
+        assert wasted.closed.wait(5)
+        assert executor.counts["chat_wasted"] == 1
+    finally:
+        executor.close()
+
+
+def test_keeps_the_speculative_chat_reply():
+    branches = Branches()
+    executor = executor_for("CHAT", branches)
+    try:
+        turn = executor.run("so what about this")
+        assert turn.chat().value == "CHAT"
+        assert branches.calls.count("CHAT") == 1
+        assert executor.counts["chat_used"] == 1 and executor.counts["capture_wasted"] == 2
+    finally:
+        executor.close()
+
+
+def test_confident_turns_are_not_speculated():
+    branches = Branches()
+    executor = executor_for("CHAT", branches, probabilities={"CAMERA": 0.95, "CHAT": 0.05})
+    try:
+        turn = executor.run("what do you see")
+        assert (turn.intent, turn.routed.tier, turn.speculated) == ("CAMERA", "local", False)
+        assert branches.calls == []
+        assert turn.capture().value == "CAMERA"
+        assert executor.counts["speculative_turns"] == 0
+    finally:
+        executor.close()
+
+
+def test_waste_rate_throttles_chat_and_recovers():
+    policy = SpeculationPolicy(max_waste_rate=0.5, window=4)
+    assert policy.chat(UNSURE) and not policy.chat({"CHAT": 0.1})
+    for intent in ("CAMERA", "CAMERA", "CHAT"):
+        policy.record(UNSURE, intent)
+    assert abs(policy.waste_rate - 2 / 3) < 1e-9
+    assert not policy.chat(UNSURE)
+    # Turns below the CHAT bar do not count either way.
+    policy.record({"CHAT": 0.1}, "CHAT")
+    assert not policy.chat(UNSURE)
+    # Outcomes are still recorded while throttled, so the policy recovers.
+    policy.record(UNSURE, "CHAT")
+    policy.record(UNSURE, "CHAT")
+    assert policy.waste_rate == 0.25 and policy.chat(UNSURE)
+
+
+def test_executor_stops_speculating_chat_after_waste():
+    branches = Branches()
+    executor = executor_for("SCREENSHOT", branches, SpeculationPolicy(max_waste_rate=0.5, window=4))
+    try:
+        for _ in range(4):
+            executor.run("hmm").capture()
+        # The first turn's CHAT call is wasted (rate 1.0 > 0.5), so later turns skip it.
+        assert executor.counts["chat_started"] == 1
+        assert branches.calls.count("CHAT") <= 1
+        assert executor.report()["chat_waste_rate"] == 1.0
+    finally:
+        executor.close()
@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision.frame import Frame
+from vision.store import ImageStore
+
+
+def image(value):
+    return Image.new("RGB", (64, 48), (value, 0, 0))
+
+
+def index_lines(store):
+    with open(os.path.join(store.root, "index.jsonl"), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_recaptures_are_recorded_by_the_writer(tmp_path, monkeypatch):
+    store = ImageStore(str(tmp_path))
+    threads = []
+    append = store._append
+    monkeypatch.setattr(store, "_append", lambda *r: threads.append(threading.current_thread().name) or append(*r))
+    digest, path = store.put(image(1))
+    store.flush()
+    for _ in range(20):
+        assert store.put(image(1)) == (digest, path)
+    store.flush()
+    store.close()
+    assert threads and set(threads) == {"image-store"}
+    assert len(store) == 1 and os.path.exists(path)
+
+
+def test_index_stays_compact_under_recaptures(tmp_path):
+    store = ImageStore(str(tmp_path))
+    store.put(image(1))
+    for _ in range(100):
+        store.put(image(1))
+        store.flush()
+    assert len(index_lines(store)) <= 2
+    last = store.get(store.put(image(1))[0])["last"]
+    store.close()
+
+    reopened = ImageStore(str(tmp_path))
+    assert len(reopened) == 1 and reopened.latest()["last"] == last
+    reopened.close()
+
+
+def test_stale_entries_expire_on_put_and_on_open(tmp_path):
+    store = ImageStore(str(tmp_path), max_age=0.2)
+    old, _ = store.put(image(1))
+    kept, _ = store.put(image(2))
+    store.flush()
+    time.sleep(0.3)
+    store.put(image(2))  # a re-capture, no new write
+    store.flush()
+    assert store.get(old) is None and store.get(kept) is not None
+    store.close()
+
+    time.sleep(0.3)
+    reopened = ImageStore(str(tmp_path), max_age=0.2)
+    reopened.flush()
+    assert len(reopened) == 0
+    assert os.listdir(tmp_path) == ["index.jsonl"]
+    reopened.close()
+
+
+def test_same_pixels_share_one_entry_across_input_types(tmp_path):
+    store = ImageStore(str(tmp_path))
+    pixels = np.random.default_rng(0).integers(0, 255, (48, 64, 3), np.uint8)
+    pil = Image.fromarray(pixels)
+    assert store.put(pil)[0] == store.put(Frame.from_rgb(pixels))[0]
+    big = Frame.from_rgb(np.asarray(pil.resize((128, 96))))
+    assert store.put(big, size=(64, 48))[0] == store.put(big.pil((64, 48)))[0]
+    store.close()
+    assert len(store) == 2
@@ -0,0 +1,47 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.streaming import gemini_deltas
+
+
+class Chunk:
+    """Mimics a google.generativeai stream chunk: .text raises without text parts."""
+
+    def __init__(self, text=None, reason="STOP"):
+        self._text = text
+        self.candidates = [SimpleNamespace(finish_reason=SimpleNamespace(name=reason))]
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("The `response.text` quick accessor requires a valid `Part`")
+        return self._text
+
+
+class Model:
+    def __init__(self, *chunks):
+        self.chunks = chunks
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        return iter(self.chunks)
+
+
+def test_chunks_without_text_are_skipped(capsys):
+    model = Model(Chunk("Hello"), Chunk(None, "STOP"), Chunk(" world"), Chunk(None, "STOP"))
+    assert "".join(gemini_deltas(model, ["hi"])) == "Hello world"
+    assert capsys.readouterr().out == ""
+
+
+def test_blocked_midway_keeps_the_text_and_warns(capsys):
+    model = Model(Chunk("The answer is"), Chunk(None, "SAFETY"))
+    assert "".join(gemini_deltas(model, ["hi"])) == "The answer is"
+    assert "finish reason: SAFETY" in capsys.readouterr().out
+
+
+def test_blocked_reply_raises_with_the_finish_reason():
+    with pytest.raises(ValueError, match="SAFETY"):
+        list(gemini_deltas(Model(Chunk(None, "SAFETY")), ["hi"]))
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.tiered import RulePolicy, TieredController, needs_semantics
+
+INF = float("inf")
+
+
+class Model:
+    """The model tier: records what was escalated."""
+
+    def __init__(self, answer="right"):
+        self.answer = answer
+        self.calls = []
+
+    def __call__(self, zones, task, frame):
+        self.calls.append((tuple(zones), task))
+        return self.answer
+
+
+@pytest.mark.parametrize("zones, expected", [
+    ((59, 59, 59), "stop"),       # every zone below blocked_level
+    ((200, 110, 100), "left"),    # center free, but left is brighter by more than min_margin
+    ((130, 110, 80), "forward"),  # center free and within min_margin of the best side
+    ((160, 100, 120), "left"),    # center not free; left beats the runner-up by 40
+    ((100, 90, 140), "right"),
+])
+def test_clear_cut_scenes_are_local(zones, expected):
+    direction, _ = RulePolicy().decide(zones)
+    assert direction == expected
+
+
+@pytest.mark.parametrize("zones", [
+    (60, 60, 60),      # not all below blocked_level, nothing free
+    (130, 100, 110),   # left leads by only 20 < min_margin
+    (100, 100, 105),   # brightest side below free_level
+    (112, 100, 90),    # left free but leads the center by only 12
+])
+def test_ambiguous_scenes_escalate(zones):
+    assert RulePolicy().decide(zones)[0] is None
+    model = Model()
+    controller = TieredController(model)
+    decision = controller.decide(zones, "go to open area")
+    assert (decision.direction, decision.tier, decision.reason) == ("right", "model", "ambiguous")
+    assert model.calls == [(zones, "go to open area")]
+
+
+def test_thresholds_are_configurable():
+    zones = (130, 100, 110)
+    assert RulePolicy().decide(zones)[0] is None
+    direction, margin = RulePolicy(min_margin=15).decide(zones)
+    assert (direction, margin) == ("left", 20)
+    assert RulePolicy(free_level=140).decide((130, 130, 130))[0] is None
+
+
+def test_semantic_tasks_always_escalate():
+    assert needs_semantics("move until you see a door")
+    assert not needs_semantics("go to open area")
+    model = Model("left")
+    controller = TieredController(model)
+    decision = controller.decide((60, 200, 60), "find the red chair")
+    assert (decision.tier, decision.reason) == ("model", "semantic")
+    # An imminent collision is still handled locally first.
+    decision = controller.decide((200, 200, 60), "find the red chair", ttc=(INF, 0.5, INF))
+    assert (decision.direction, decision.tier, decision.reason) == ("left", "local", "collision")
+    assert len(model.calls) == 1
+
+
+def test_escalation_rate_counts_model_decisions():
+    controller = TieredController(Model())
+    for zones in ((59, 59, 59), (200, 200, 200), (130, 100, 110), (100, 100, 105)):
+        controller.decide(zones, "go to open area")
+    report = controller.report()
+    assert report["escalation_rate"] == 0.5
+    assert report["counts"] == {"collision": 0, "rule": 2, "ambiguous": 2, "semantic": 0}
+    assert report["model"]["count"] == 2
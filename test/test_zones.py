@@ -0,0 +1,41 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from robot.zones import ZoneAnalyzer, get_zone_brightness
+
+
+def scene(w, h, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), np.uint8), (0, 0), 8)
+    frame[:, : w // 3] //= 3  # dark obstacle on the left
+    return frame
+
+
+def test_brightness_matches_legacy_at_every_size():
+    analyzer = ZoneAnalyzer(1, 3)
+    for w, h in ((160, 120), (320, 240), (640, 480), (1280, 720)):
+        frame = scene(w, h)
+        assert np.allclose(analyzer.brightness(frame)[0], get_zone_brightness(frame), atol=1.0)
+
+
+def test_features_match_direct_computation():
+    analyzer = ZoneAnalyzer(2, 4, work_width=160, variance=True, edges=True)
+    frame = scene(160, 120, seed=1)  # at work width: no resampling
+    features = analyzer.analyze(frame)
+    assert features.shape == (2, 4, 3)
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    strong = (np.abs(gx) + np.abs(gy)) > analyzer.edge_threshold
+    for r in range(2):
+        for c in range(4):
+            cell = (slice(r * 60, (r + 1) * 60), slice(c * 40, (c + 1) * 40))
+            zone = gray[cell].astype(np.float64)
+            assert np.isclose(features[r, c, 0], zone.mean(), atol=1e-3)
+            assert np.isclose(features[r, c, 1], zone.std(), atol=1e-2)
+            assert np.isclose(features[r, c, 2], strong[cell].mean(), atol=1e-6)
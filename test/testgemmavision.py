@@ -1,18 +1,27 @@
-import pyautogui
-import requests
-import base64
-from io import BytesIO
+import os
+import sys
 import cv2
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.streaming import Stream, ollama_deltas, print_stream
+from vision.encoder import BudgetEncoder
+from vision.frame import Frame
+from vision.replay import open_screen
+
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "gemma3:4b"
 
+# pyautogui.screenshot, or a recorder/replay of it (JARVIS_RECORD / JARVIS_REPLAY).
+grab_screen = open_screen()
+
+encoders = {
+    "camera": BudgetEncoder.for_provider("ollama"),
+    "screen": BudgetEncoder.for_provider("ollama", text=True),
+}
+
 
 def take_screenshot():
-    img = pyautogui.screenshot()
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    return buffer.getvalue()
+    return Frame.from_pil(grab_screen(), source="screen")
 
 
 def take_camera_image(camera_index=0):
@@ -26,29 +35,17 @@ def take_camera_image(camera_index=0):
     if not ret:
         raise RuntimeError("Failed to capture image from camera")
 
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    success, buffer = cv2.imencode(".png", frame_rgb)
-    if not success:
-        raise RuntimeError("Failed to encode camera image")
-
-    return buffer.tobytes()
-
+    return Frame(frame, source="camera")
 
-def image_to_base64(image_bytes):
-    return base64.b64encode(image_bytes).decode("utf-8")
 
+def image_to_base64(frame):
+    return encoders[frame.source].encode(frame).base64()
 
-def ask_ollama_with_image(prompt, image_bytes):
-    payload = {
-        "model": MODEL_NAME,
-        "prompt": prompt,
-        "images": [image_to_base64(image_bytes)],
-        "stream": False
-    }
 
-    response = requests.post(OLLAMA_URL, json=payload, timeout=120)
-    response.raise_for_status()
-    return response.json()["response"]
+def ask_ollama_with_image(prompt, frame):
+    # Streamed: iterate (or print_stream) to see tokens as they arrive.
+    deltas = ollama_deltas(prompt, MODEL_NAME, images=[image_to_base64(frame)], url=OLLAMA_URL)
+    return Stream(deltas, name="ollama")
 
 
 if __name__ == "__main__":
@@ -60,17 +57,17 @@ if __name__ == "__main__":
 
     if choice == "1":
         print("📸 Taking screenshot...")
-        image_bytes = take_screenshot()
+        frame = take_screenshot()
     elif choice == "2":
         print("📷 Capturing camera image...")
-        image_bytes = take_camera_image()
+        frame = take_camera_image()
     else:
         raise ValueError("Invalid choice")
 
     user_question = input("\n❓ Ask something about the image: ")
 
     print("\n🧠 Sending image to Ollama...")
-    result = ask_ollama_with_image(user_question, image_bytes)
+    result = ask_ollama_with_image(user_question, frame)
 
     print("\n🧾 Ollama Response:\n")
-    print(result)
+    print_stream(result, prefix="")
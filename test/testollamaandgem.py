@@ -4,53 +4,88 @@
 # ============================================================
 
 import os
-import time
+import sys
+import tempfile
 import cv2
-import requests
-import pyautogui
-import numpy as np
-from PIL import Image
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.cache import DEFAULT_PATH, ResponseCache
+from agent.client import CLIENT
+from agent.intent import IntentRouter
+from agent.longterm import DEFAULT_ROOT, LongTermMemory
+from agent.memory import ConversationMemory
+from agent.providers import GeminiProvider, OllamaProvider, ProviderRouter
+from agent.speculative import SpeculationPolicy, SpeculativeExecutor
+from agent.streaming import OLLAMA_URL, Stream, cached_stream, print_stream, stream_report
+from vision.camera import CameraGrabber
+from vision.display import DisplayWorker
+from vision.encoder import BudgetEncoder
+from vision.frame import Frame
+from vision.replay import mock_model, open_input, open_screen
+from vision.screen import ScreenTurns
+from vision.store import ImageStore
+
 # ============================================================
 # 1. ENVIRONMENT SETUP
 # ============================================================
 
 load_dotenv()
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY not found in .env")
+# JARVIS_MOCK_MODEL=1 runs the loop offline: a fixed-latency stand-in
+# answers instead of Gemini, gemma3 and qwen3. JARVIS_RECORD=<dir> records
+# the camera, the screen and the typed messages; JARVIS_REPLAY=<dir> plays
+# them back (see vision/replay.py).
+mock = mock_model(reply="This is a mock reply.")
+
+if mock:
+    gemini = mock
+else:
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    if not GEMINI_API_KEY:
+        raise RuntimeError("GEMINI_API_KEY not found in .env")
 
-genai.configure(api_key=GEMINI_API_KEY)
-gemini = genai.GenerativeModel("gemini-2.5-pro")
+    genai.configure(api_key=GEMINI_API_KEY)
+    gemini = genai.GenerativeModel("gemini-2.5-pro")
 
 # ============================================================
 # 2. INITIALIZE RESOURCES
 # ============================================================
 
-cap = cv2.VideoCapture(0)
-os.makedirs("images", exist_ok=True)
+camera = CameraGrabber(0).start()
+grab_screen = open_screen()
+read_input = open_input()
+display = DisplayWorker().start()
+store = ImageStore()
+# Repeated questions (same wording, memory and picture) are answered from
+# database/cache.sqlite3 instead of calling the models again (memory only
+# in mock mode, so mock intents and replies are never served to a live run).
+cache = ResponseCache(path=None if mock else DEFAULT_PATH)
+INTENT_TTL = 24 * 3600
+RESPONSE_TTL = 600
 
 # ============================================================
 # 3. SHORT-TERM MEMORY (TOKEN SAFE)
 # ============================================================
 
-memory = []
-MAX_MEMORY_LINES = 6
+# Recent turns verbatim within a token budget; older turns are folded into
+# a running summary by qwen3 in the background, so prompts stay small.
+memory = ConversationMemory(budget=400, summary_budget=150, summarize=False if mock else None)
 
-def update_memory(user, assistant):
-    memory.append(f"U:{user}")
-    memory.append(f"A:{assistant}")
-    if len(memory) > MAX_MEMORY_LINES:
-        memory[:] = memory[-MAX_MEMORY_LINES:]
+# Every turn is also kept in database/memory/; prompts get only the past
+# turns most similar to the current message. Mock runs use a throwaway
+# directory so their turns never reach a live session.
+long_term = LongTermMemory(tempfile.mkdtemp() if mock else DEFAULT_ROOT)
 
 # ============================================================
 # 4. LOCAL OLLAMA INTENT DETECTION (CHEAP)
 # ============================================================
 
 def detect_intent_local(user_input):
+    if mock:
+        return "CHAT"
+
     # 🔹 SINGLE-LINE, PROMPT-ENGINEERED INTENT PROMPT
     prompt = (
         f"You are an intent classification system. Classify the user message "
@@ -61,14 +96,15 @@ def detect_intent_local(user_input):
     )
 
     try:
-        res = requests.post(
-            "http://localhost:11434/api/generate",
+        res = CLIENT.post(
+            OLLAMA_URL,
             json={
                 "model": "qwen3:0.6b",
                 "prompt": prompt,
                 "stream": False
             },
-            timeout=10
+            timeout=10,
+            retries=1
         ).json()
 
         text = res.get("response", "").upper()
@@ -80,75 +116,122 @@ def detect_intent_local(user_input):
 
     return "CHAT"
 
+# Clear-cut messages are classified locally (n-gram naive Bayes trained from
+# agent/intents.tsv, well under a millisecond); only low-confidence ones pay
+# for the qwen3 call.
+intent_router = IntentRouter(
+    lambda text: cache.get_or_compute("intent", text, lambda: detect_intent_local(text), ttl=INTENT_TTL)
+)
+
 # ============================================================
 # 5. IMAGE UTILITIES (COMPRESS + SAVE)
 # ============================================================
 
-def compress_and_save(pil_img, prefix):
-    pil_img = pil_img.resize((640, 360))
-    filename = f"{prefix}_{int(time.time())}.jpg"
-    path = os.path.join("images", filename)
-    pil_img.save(path, "JPEG", quality=75)
-    return pil_img, path
+encoders = {
+    "camera": BudgetEncoder.for_provider("gemini", max_bytes=60_000),
+    "screen": BudgetEncoder.for_provider("gemini", max_bytes=60_000, text=True),
+}
+
+def compress_and_save(frame, prefix):
+    encoded = encoders[prefix].encode(frame)
+    _, path = store.put(frame, prefix, quality=encoded.quality, size=encoded.size)
+    return encoded.pil(), path
 
 # ============================================================
 # 6. CAMERA CAPTURE (WITH PREVIEW)
 # ============================================================
 
-def capture_camera():
-    ret, frame = cap.read()
-    if not ret:
+def grab_camera():
+    # Side-effect free, so it can run speculatively; the encoded JPEG is
+    # memoized on the Frame and reused by compress_and_save.
+    _, frame = camera.latest()
+    if frame is None:
+        return None
+    frame = Frame(frame, source="camera")
+    encoders["camera"].encode(frame)
+    return frame
+
+def capture_camera(frame=None):
+    if frame is None:
+        frame = grab_camera()
+    if frame is None:
         return None, None
 
-    cv2.imshow("📷 Camera Capture", frame)
-    cv2.waitKey(800)
-    cv2.destroyWindow("📷 Camera Capture")
+    display.show("📷 Camera Capture", frame.bgr)
 
-    pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    return compress_and_save(pil_img, "camera")
+    return compress_and_save(frame, "camera")
 
 # ============================================================
 # 7. SCREENSHOT CAPTURE (WITH OUTLINE)
 # ============================================================
 
-def capture_screenshot():
-    screenshot = pyautogui.screenshot()
-    frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+def grab_screenshot():
+    frame = Frame.from_pil(grab_screen(), source="screen")
+    encoders["screen"].encode(frame)
+    return frame
+
+# Each screenshot is compared with the previous one: the same question on
+# an unchanged screen reuses the last answer, a partly changed screen sends
+# only the changed area.
+screen_turns = ScreenTurns()
 
-    h, w, _ = frame.shape
-    cv2.rectangle(frame, (10, 10), (w - 10, h - 10), (0, 255, 0), 3)
+def capture_screenshot(frame=None):
+    if frame is None:
+        frame = grab_screenshot()
 
-    cv2.imshow("🖥️ Screenshot", frame)
-    cv2.waitKey(800)
-    cv2.destroyWindow("🖥️ Screenshot")
+    if display.enabled:
+        outlined = frame.bgr.copy()
+        h, w, _ = outlined.shape
+        cv2.rectangle(outlined, (10, 10), (w - 10, h - 10), (0, 255, 0), 3)
+        display.show("🖥️ Screenshot", outlined)
 
-    return compress_and_save(screenshot, "screen")
+    return compress_and_save(frame, "screen")
 
 # ============================================================
 # 8. GEMINI RESPONSE (TOKEN OPTIMIZED)
 # ============================================================
 
-def gemini_respond(user_input, image=None):
-    context = "\n".join(memory)
+# Gemini first; local gemma3 takes over when Gemini fails or is slower
+# than its usual p95 to the first token.
+providers = ProviderRouter(
+    [GeminiProvider(gemini)] + ([] if mock else [OllamaProvider("gemma3:4b")]), deadline=60
+)
+
+def gemini_respond(user_input, image=None, prefetch=False, note=""):
+    # Returns a Stream: tokens are printed as Gemini produces them and the
+    # finished reply is cached. ``note`` describes a cropped screenshot.
+    context = memory.context()
+    recalled = long_term.context(user_input, skip_recent=memory.recent_turns()) or "(none)"
 
     prompt = f"""
 You are a helpful assistant.
 
+Relevant earlier conversation:
+{recalled}
+
 Recent context:
 {context}
 
 User:
 {user_input}
-
+{note}
 Reply briefly and clearly.
 """
 
-    if image:
-        response = gemini.generate_content([prompt, image])
-    else:
-        response = gemini.generate_content(prompt)
+    return cached_stream(
+        cache, "gemini", user_input, lambda: providers.deltas(prompt, image), "gemini",
+        context=[recalled, context], image=image, ttl=RESPONSE_TTL, prefetch=prefetch,
+    )
 
-    return response.text.strip()
+# While qwen3 classifies an ambiguous message, the likely captures are
+# grabbed and (if CHAT is likely and recent guesses were mostly right) the
+# CHAT reply is already requested; the branch the intent picks is kept.
+speculation = SpeculativeExecutor(
+    intent_router,
+    chat=lambda text: gemini_respond(text, prefetch=True),
+    captures={"CAMERA": grab_camera, "SCREENSHOT": grab_screenshot},
+    policy=SpeculationPolicy(min_chat_probability=0.4, max_waste_rate=0.25),
+)
 
 # ============================================================
 # 9. MAIN AGENT LOOP
@@ -159,38 +242,66 @@ print("Local Ollama (intent) + Gemini 2.5 Pro (vision/reasoning)")
 print("Type 'exit' to stop\n")
 
 while True:
-    user_input = input("You: ")
+    try:
+        user_input = read_input("You: ")
+    except EOFError:
+        break
 
-    intent = detect_intent_local(user_input)
-    print(f"[Intent → {intent}]")
+    turn = speculation.run(user_input)
+    routed = turn.routed
+    intent = turn.intent
+    print(f"[Intent → {intent} ({routed.tier}, {routed.confidence:.2f})]")
 
     if intent == "STOP":
         print("Agent: Shutting down. Goodbye 👋")
         break
 
     elif intent == "CAMERA":
-        img, path = capture_camera()
+        img, path = capture_camera(turn.capture())
         if img:
             reply = gemini_respond(user_input, img)
         else:
-            reply = "Camera not available."
+            reply = Stream.of("Camera not available.")
 
     elif intent == "SCREENSHOT":
-        img, path = capture_screenshot()
-        if img:
-            reply = gemini_respond(user_input, img)
+        frame = turn.capture()
+        img, path = capture_screenshot(frame)
+        previous, image, note = screen_turns.prepare(user_input, frame)
+        if previous is not None:
+            reply = Stream.of(previous)
+        elif img:
+            # A cropped Frame is fitted to Gemini's budget by the provider.
+            reply = gemini_respond(user_input, img if image is frame else image, note=note)
         else:
-            reply = "Screenshot failed."
+            reply = Stream.of("Screenshot failed.")
 
     else:  # CHAT
-        reply = gemini_respond(user_input)
+        reply = turn.chat()
 
-    print("Agent:", reply)
-    update_memory(user_input, reply)
+    reply = print_stream(reply)
+    if intent == "SCREENSHOT":
+        screen_turns.answered(user_input, reply)
+    memory.add(user_input, reply)
+    long_term.add(user_input, reply)
 
 # ============================================================
 # 10. CLEANUP
 # ============================================================
 
-cap.release()
+print("Intent routing:", intent_router.report())
+print("Speculation:", speculation.report())
+speculation.close()
+print("Screen turns:", screen_turns.counts)
+print("Cache:", cache.stats())
+print("Streaming:", stream_report())
+print("HTTP:", CLIENT.report())
+print("Memory:", memory.report())
+print("Long-term memory:", long_term.report())
+long_term.close()
+print("Providers:", providers.report())
+providers.close()
+cache.close()
+camera.stop()
+display.stop()
+store.close()
 cv2.destroyAllWindows()
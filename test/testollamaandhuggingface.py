@@ -1,13 +1,24 @@
 import os
-import cv2
-import base64
-import pyautogui
+import sys
+import tempfile
 import requests
-from PIL import Image
-from io import BytesIO
 
 from dotenv import load_dotenv
 load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agent.cache import DEFAULT_PATH, ResponseCache
+from agent.client import CLIENT
+from agent.intent import IntentRouter
+from agent.longterm import DEFAULT_ROOT, LongTermMemory
+from agent.memory import ConversationMemory
+from agent.providers import GeminiProvider, HFProvider, OllamaProvider, ProviderError, ProviderRouter
+from agent.streaming import OLLAMA_URL, Stream, cached_stream, print_stream, stream_report
+from vision.camera import CameraGrabber
+from vision.frame import Frame
+from vision.replay import mock_model, open_input, open_screen
+from vision.screen import ScreenTurns
+
 # ============================================================
 # 1. HF API CONFIG
 # ============================================================
@@ -21,24 +32,33 @@ HF_HEADERS = {
     "Authorization": f"Bearer {HF_TOKEN}"
 }
 
+# JARVIS_MOCK_MODEL=1 runs the loop offline: a fixed-latency stand-in
+# answers instead of the HF API, gemma3 and qwen3. JARVIS_RECORD=<dir>
+# records the camera, the screen and the typed messages; JARVIS_REPLAY=<dir>
+# plays them back (see vision/replay.py).
+mock = mock_model(reply="This is a mock reply.")
+
 # ============================================================
 # 2. SHORT-TERM MEMORY
 # ============================================================
 
-memory = []
-MAX_MEMORY_LINES = 6
+# Recent turns verbatim within a token budget; older turns are folded into
+# a running summary by qwen3 in the background, so prompts stay small.
+memory = ConversationMemory(budget=400, summary_budget=150, summarize=False if mock else None)
 
-def update_memory(user, assistant):
-    memory.append(f"U:{user}")
-    memory.append(f"A:{assistant}")
-    if len(memory) > MAX_MEMORY_LINES:
-        memory[:] = memory[-MAX_MEMORY_LINES:]
+# Every turn is also kept in database/memory/; prompts get only the past
+# turns most similar to the current message. Mock runs use a throwaway
+# directory so their turns never reach a live session.
+long_term = LongTermMemory(tempfile.mkdtemp() if mock else DEFAULT_ROOT)
 
 # ============================================================
 # 3. OLLAMA INTENT DETECTION (UNCHANGED)
 # ============================================================
 
 def detect_intent(user_input):
+    if mock:
+        return "CHAT"
+
     prompt = (
         f"You are an intent classifier. "
         f"Classify the message \"{user_input}\" into EXACTLY ONE of "
@@ -50,14 +70,15 @@ def detect_intent(user_input):
     )
 
     try:
-        res = requests.post(
-            "http://localhost:11434/api/generate",
+        res = CLIENT.post(
+            OLLAMA_URL,
             json={
                 "model": "qwen3:0.6b",
                 "prompt": prompt,
                 "stream": False
             },
-            timeout=5
+            timeout=5,
+            retries=1
         ).json()
 
         text = res.get("response", "").upper()
@@ -69,112 +90,121 @@ def detect_intent(user_input):
 
     return "CHAT"
 
+# Clear-cut messages are classified locally (n-gram naive Bayes trained from
+# agent/intents.tsv, well under a millisecond); only low-confidence ones pay
+# for the qwen3 call.
+# Repeated questions (same wording, memory and picture) are answered from
+# database/cache.sqlite3 instead of calling the models again (memory only
+# in mock mode, so mock intents and replies are never served to a live run).
+cache = ResponseCache(path=None if mock else DEFAULT_PATH)
+INTENT_TTL = 24 * 3600
+RESPONSE_TTL = 600
+
+intent_router = IntentRouter(
+    lambda text: cache.get_or_compute("intent", text, lambda: detect_intent(text), ttl=INTENT_TTL)
+)
+
 # ============================================================
 # 4. IMAGE SOURCES
 # ============================================================
 
+# Opened once on first use instead of per request.
+camera = CameraGrabber(0)
+grab_screen = open_screen()
+read_input = open_input()
+
 def capture_camera():
-    cap = cv2.VideoCapture(0)
-    ret, frame = cap.read()
-    cap.release()
-    if not ret:
+    if not camera.running:
+        camera.start()
+        camera.wait_newer_than(0, timeout=2)
+    _, frame = camera.latest()
+    if frame is None:
         return None
-    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    return image
+    return Frame(frame, source="camera")
 
 def capture_screenshot():
-    return pyautogui.screenshot().convert("RGB")
+    return Frame.from_pil(grab_screen(), source="screen")
 
-def image_to_base64(image: Image.Image):
-    buf = BytesIO()
-    image.save(buf, format="JPEG")
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
+# Each screenshot is compared with the previous one: the same question on
+# an unchanged screen reuses the last answer, a partly changed screen sends
+# only the changed area.
+screen_turns = ScreenTurns()
 
 # ============================================================
 # 5. HF API RESPONSE (TEXT + IMAGE)
 # ============================================================
 
-def hf_respond(user_prompt, image=None, debug=True):
-    context = "\n".join(memory)
+# HF first; if it errors (e.g. the model is still loading) or is slower
+# than its usual p95 to the first token, local gemma3 answers instead.
+# Images are fitted to each provider's upload budget.
+RESPONSE_DEADLINE = 60
+providers = ProviderRouter(
+    [GeminiProvider(mock, name="mock")] if mock
+    else [HFProvider(HF_URL, HF_HEADERS), OllamaProvider("gemma3:4b")],
+    deadline=RESPONSE_DEADLINE,
+)
+
+def hf_respond(user_prompt, image=None, note=""):
+    # Streams the reply as it is generated; error and "model loading"
+    # replies are not cached. ``note`` describes a cropped screenshot.
+    context = memory.context()
+    recalled = long_term.context(user_prompt, skip_recent=memory.recent_turns()) or "(none)"
+    prompt = _hf_prompt(user_prompt, context, recalled, note)
+    return cached_stream(
+        cache, "hf", user_prompt, lambda: _hf_deltas(prompt, image), "hf",
+        context=[recalled, context], image=image, ttl=RESPONSE_TTL,
+        cacheable=lambda reply: not reply.startswith("[HF "),
+    )
 
-    prompt = f"""
+def _hf_prompt(user_prompt, context, recalled, note=""):
+    return f"""
 You are a helpful assistant.
 Use the image if provided.
 
+Relevant earlier conversation:
+{recalled}
+
 Context:
 {context}
 
 User: {user_prompt}
+{note}
 """
 
-    if image:
-        payload = {
-            "inputs": {
-                "text": prompt,
-                "image": image_to_base64(image)
-            },
-            "parameters": {
-                "max_new_tokens": 200
-            }
-        }
-    else:
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 200
-            }
-        }
-
+def _hf_deltas(prompt, image=None):
     try:
-        response = requests.post(
-            HF_URL,
-            headers=HF_HEADERS,
-            json=payload,
-            timeout=120
-        )
-    except requests.exceptions.RequestException as e:
-        return f"[HF ERROR] Network error: {e}"
-
+        yield from providers.deltas(prompt, image)
+    except ProviderError as e:
+        error = e.errors.get("hf")
+        if isinstance(error, requests.HTTPError):
+            yield _hf_error(error.response)
+        elif isinstance(error, requests.exceptions.RequestException):
+            yield f"[HF ERROR] Network error: {error}"
+        elif isinstance(error, ValueError):
+            # ---------- FALLBACK WITH DETAILS ----------
+            yield f"[HF ERROR] Unable to generate response.\n{error}"
+        else:
+            yield f"[HF ERROR] No provider answered: {e}"
+
+def _hf_error(response):
     # ---------- HTTP-LEVEL ERRORS ----------
-    if response.status_code != 200:
-        try:
-            error_json = response.json()
-        except Exception:
-            return f"[HF ERROR] HTTP {response.status_code}: {response.text}"
-
-        # Hugging Face standard error formats
-        if "error" in error_json:
-            return f"[HF ERROR] {error_json['error']}"
-
-        if "estimated_time" in error_json:
-            return (
-                "[HF INFO] Model is loading on Hugging Face servers.\n"
-                f"Estimated time: {error_json['estimated_time']} seconds.\n"
-                "Please retry shortly."
-            )
-
-        return f"[HF ERROR] HTTP {response.status_code}: {error_json}"
-
-    # ---------- SUCCESS PATH ----------
     try:
-        result = response.json()
-    except Exception as e:
-        return f"[HF ERROR] Failed to parse JSON response: {e}"
-
-    if debug:
-        print("\n[HF DEBUG RESPONSE]")
-        print(result)
-
-    # ---------- EXPECTED SUCCESS FORMAT ----------
-    if isinstance(result, list) and len(result) > 0:
-        if "generated_text" in result[0]:
-            return result[0]["generated_text"].strip()
-
-    # ---------- FALLBACK WITH DETAILS ----------
-    return (
-        "[HF ERROR] Unable to generate response.\n"
-        f"Raw response: {result}"
-    )
+        error_json = response.json()
+    except Exception:
+        return f"[HF ERROR] HTTP {response.status_code}: {response.text}"
+
+    # Hugging Face standard error formats
+    if "error" in error_json:
+        return f"[HF ERROR] {error_json['error']}"
+
+    if "estimated_time" in error_json:
+        return (
+            "[HF INFO] Model is loading on Hugging Face servers.\n"
+            f"Estimated time: {error_json['estimated_time']} seconds.\n"
+            "Please retry shortly."
+        )
+
+    return f"[HF ERROR] HTTP {response.status_code}: {error_json}"
 
 
 # ============================================================
@@ -186,10 +216,14 @@ print("Ollama (intent) + HF Vision API")
 print("Type 'exit' to stop\n")
 
 while True:
-    user_input = input("You: ")
+    try:
+        user_input = read_input("You: ")
+    except EOFError:
+        break
 
-    intent = detect_intent(user_input)
-    print(f"[Intent → {intent}]")
+    routed = intent_router.route(user_input)
+    intent = routed.intent
+    print(f"[Intent → {intent} ({routed.tier}, {routed.confidence:.2f})]")
 
     if intent == "STOP":
         print("Agent: Goodbye 👋")
@@ -197,14 +231,33 @@ while True:
 
     elif intent == "CAMERA":
         image = capture_camera()
-        reply = hf_respond(user_input, image=image) if image else "Camera not available."
+        reply = hf_respond(user_input, image=image) if image else Stream.of("Camera not available.")
 
     elif intent == "SCREENSHOT":
-        image = capture_screenshot()
-        reply = hf_respond(user_input, image=image)
+        previous, image, note = screen_turns.prepare(user_input, capture_screenshot())
+        if previous is not None:
+            reply = Stream.of(previous)
+        else:
+            reply = hf_respond(user_input, image=image, note=note)
 
     else:  # CHAT
         reply = hf_respond(user_input)
 
-    print("Agent:", reply)
-    update_memory(user_input, reply)
+    reply = print_stream(reply)
+    if intent == "SCREENSHOT" and not reply.startswith("[HF "):
+        screen_turns.answered(user_input, reply)
+    memory.add(user_input, reply)
+    long_term.add(user_input, reply)
+
+print("Intent routing:", intent_router.report())
+print("Screen turns:", screen_turns.counts)
+print("Cache:", cache.stats())
+print("Streaming:", stream_report())
+print("HTTP:", CLIENT.report())
+print("Memory:", memory.report())
+print("Long-term memory:", long_term.report())
+long_term.close()
+print("Providers:", providers.report())
+providers.close()
+cache.close()
+camera.stop()
@@ -0,0 +1,293 @@
+import os
+import glob
+import time
+import threading
+from collections import deque
+
+import cv2
+
+from vision.replay import open_capture
+
+# ============================================================
+# 1. FAKE DEVICE (HEADLESS TESTING)
+# ============================================================
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FileCamera:
+    """
+    File-backed stand-in for cv2.VideoCapture.
+
+    Replays a video file, a directory of images or an explicit list of image
+    paths at a fixed frame rate so the grabber can be exercised without a
+    webcam. Only the subset of the VideoCapture API used by CameraGrabber is
+    implemented (isOpened, read, set, release).
+
+    Attributes:
+        fps (float): Frame rate the device is paced at. 0 disables pacing.
+        loop (bool): Restart from the first frame when the source runs out.
+    """
+
+    def __init__(self, source, fps=30, loop=True):
+        """
+        Args:
+            source (str | list[str]): Video file, image directory or list of images.
+            fps (float): Playback rate.
+            loop (bool): Loop the source forever.
+        """
+        self.fps = fps
+        self.loop = loop
+        self._video = None
+        self._frames = []
+        self._index = 0
+        self._next_time = None
+
+        if isinstance(source, (list, tuple)):
+            paths = list(source)
+        elif os.path.isdir(source):
+            paths = sorted(
+                p for p in glob.glob(os.path.join(source, "*"))
+                if p.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            paths = None
+            self._video = cv2.VideoCapture(source)
+
+        if paths is not None:
+            self._frames = [f for f in (cv2.imread(p) for p in paths) if f is not None]
+
+    def isOpened(self):
+        if self._video is not None:
+            return self._video.isOpened()
+        return bool(self._frames)
+
+    def set(self, prop, value):
+        return False
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.monotonic()
+        if self._next_time is None:
+            self._next_time = now
+        delay = self._next_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_time = max(self._next_time, now) + 1.0 / self.fps
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        self._pace()
+
+        if self._video is not None:
+            ret, frame = self._video.read()
+            if not ret and self.loop:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self._video.read()
+            return ret, frame
+
+        if self._index >= len(self._frames):
+            if not self.loop:
+                return False, None
+            self._index = 0
+        frame = self._frames[self._index]
+        self._index += 1
+        return True, frame.copy()
+
+    def release(self):
+        if self._video is not None:
+            self._video.release()
+        self._frames = []
+
+
+# ============================================================
+# 2. BACKGROUND GRABBER (LATEST-FRAME RING BUFFER)
+# ============================================================
+
+class CameraGrabber:
+    """
+    Long-lived capture thread that keeps the device drained.
+
+    The device is opened exactly once. A daemon thread reads frames as fast
+    as the driver delivers them and pushes them into a small ring buffer of
+    (timestamp, frame) pairs, so callers always get the freshest frame
+    instead of whatever the driver had queued. Lookups only take a lock
+    and never touch the device.
+
+    Timestamps come from time.monotonic(). stop() empties the buffer, so a
+    restarted grabber never serves frames from before the stop. A device
+    passed in by the caller stays open across stop/start and is released
+    by the caller; one the grabber opened itself is released by stop().
+
+    Attributes:
+        source (int | str): Device index, URL or file path.
+        buffer_size (int): Number of frames kept in the ring buffer.
+    """
+
+    def __init__(self, source=0, buffer_size=4, device=None):
+        """
+        Args:
+            source (int | str): Passed to cv2.VideoCapture when no device is given.
+            buffer_size (int): Ring buffer length.
+            device: Pre-built capture object (e.g. FileCamera). Takes precedence;
+                the caller keeps ownership of it.
+        """
+        self.source = source
+        self.buffer_size = buffer_size
+        self._device = device
+        self._owns_device = device is None
+        self._buffer = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.frames_read = 0
+        self.read_failures = 0
+
+    # ================= LIFECYCLE =================
+
+    def start(self):
+        """
+        Open the device (once) and start the grabber thread.
+
+        Returns:
+            CameraGrabber: self, for chaining.
+        """
+        if self._running:
+            return self
+        if self._device is None:
+            # JARVIS_RECORD / JARVIS_REPLAY can swap in a recorder or a replay.
+            self._device = open_capture(lambda: cv2.VideoCapture(self.source))
+            # Keep the driver queue short; we drain it continuously anyway.
+            self._device.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="camera-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread, drop buffered frames and release an owned device."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._device is not None and self._owns_device:
+            self._device.release()
+            self._device = None
+        with self._cond:
+            self._buffer.clear()
+            self._cond.notify_all()
+
+    @property
+    def running(self):
+        return self._running
+
+    def is_opened(self):
+        return self._device is not None and self._device.isOpened()
+
+    def _run(self):
+        while self._running:
+            ret, frame = self._device.read()
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+            stamp = time.monotonic()
+            with self._cond:
+                self._buffer.append((stamp, frame))
+                self.frames_read += 1
+                self._cond.notify_all()
+
+    # ================= LOOKUPS =================
+
+    def latest(self):
+        """
+        Return the newest buffered frame without blocking.
+
+        Returns:
+            tuple: (timestamp, frame), or (None, None) if nothing was captured yet.
+        """
+        with self._cond:
+            if not self._buffer:
+                return None, None
+            return self._buffer[-1]
+
+    def newer_than(self, t):
+        """
+        Return the newest frame captured strictly after ``t`` without blocking.
+
+        Args:
+            t (float): time.monotonic() reference.
+
+        Returns:
+            tuple: (timestamp, frame), or (None, None) if no such frame exists.
+        """
+        with self._cond:
+            if self._buffer and self._buffer[-1][0] > t:
+                return self._buffer[-1]
+            return None, None
+
+    def wait_newer_than(self, t, timeout=1.0):
+        """
+        Block until a frame newer than ``t`` arrives.
+
+        Args:
+            t (float): time.monotonic() reference.
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            tuple: (timestamp, frame), or (None, None) on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._running and not (self._buffer and self._buffer[-1][0] > t):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None, None
+                self._cond.wait(remaining)
+            if self._buffer and self._buffer[-1][0] > t:
+                return self._buffer[-1]
+            return None, None
+
+    def frames(self):
+        """
+        Snapshot of the ring buffer, oldest first.
+
+        Returns:
+            list[tuple]: (timestamp, frame) pairs.
+        """
+        with self._cond:
+            return list(self._buffer)
+
+
+if __name__ == "__main__":
+    import sys
+    import numpy as np
+
+    # Headless self-check: python -m vision.camera [video_or_image_dir]
+    if len(sys.argv) > 1:
+        device = FileCamera(sys.argv[1], fps=30)
+    else:
+        import tempfile
+        tmp = tempfile.mkdtemp()
+        for i in range(10):
+            cv2.imwrite(os.path.join(tmp, f"{i:03d}.png"), np.full((480, 640, 3), i * 20, np.uint8))
+        device = FileCamera(tmp, fps=30)
+
+    grabber = CameraGrabber(device=device).start()
+    stamp, frame = grabber.wait_newer_than(0, timeout=2)
+    print("first frame:", None if frame is None else frame.shape)
+
+    samples = []
+    for _ in range(1000):
+        t0 = time.perf_counter()
+        grabber.latest()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    print(f"latest(): p50={samples[500] * 1e6:.1f}us p99={samples[990] * 1e6:.1f}us")
+
+    time.sleep(0.5)
+    print("frames read in background:", grabber.frames_read)
+    grabber.stop()
+    device.release()
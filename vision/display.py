@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+import cv2
+
+# ============================================================
+# 1. HEADLESS DETECTION
+# ============================================================
+
+def is_headless():
+    """
+    Decide whether preview windows can be shown.
+
+    JARVIS_HEADLESS=1 forces headless mode, JARVIS_HEADLESS=0 forces a
+    display. Otherwise Linux without DISPLAY/WAYLAND_DISPLAY is headless.
+
+    Returns:
+        bool
+    """
+    flag = os.getenv("JARVIS_HEADLESS")
+    if flag is not None:
+        return flag.strip().lower() not in ("0", "false", "no", "")
+    if sys.platform.startswith("linux"):
+        return not (os.getenv("DISPLAY") or os.getenv("WAYLAND_DISPLAY"))
+    return False
+
+
+# ============================================================
+# 2. ASYNC PREVIEW WORKER
+# ============================================================
+
+class DisplayWorker:
+    """
+    Renders preview frames on a dedicated thread.
+
+    Callers hand frames over with show(), which only enqueues and returns
+    immediately. The worker owns every cv2 window: it draws new frames,
+    pumps the GUI event loop and closes each window once it has been on
+    screen for ``hold`` seconds. When the queue is full the oldest pending
+    frame is dropped, so a slow GUI can never back-pressure the capture path.
+
+    In headless mode no thread is started and show() is a no-op.
+
+    Note: macOS only allows HighGUI calls from the main thread; use
+    headless mode there or call pump() from the main loop instead of start().
+
+    Attributes:
+        hold (float): Seconds a preview stays open after its last update.
+        headless (bool): True when previews are disabled.
+    """
+
+    def __init__(self, hold=0.8, max_queue=2, headless=None):
+        """
+        Args:
+            hold (float): Preview lifetime in seconds.
+            max_queue (int): Pending frames kept before dropping the oldest.
+            headless (bool | None): Force headless on/off. None auto-detects.
+        """
+        self.hold = hold
+        self.headless = is_headless() if headless is None else headless
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._windows = {}
+        self._thread = None
+        self._running = False
+        self.dropped = 0
+
+    @property
+    def enabled(self):
+        return not self.headless
+
+    # ================= LIFECYCLE =================
+
+    def start(self):
+        """
+        Start the render thread (no-op in headless mode).
+
+        Returns:
+            DisplayWorker: self, for chaining.
+        """
+        if self.headless or self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="display-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the render thread and close all preview windows."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._windows:
+            for title in list(self._windows):
+                cv2.destroyWindow(title)
+            self._windows.clear()
+
+    # ================= PRODUCER SIDE =================
+
+    def show(self, title, frame):
+        """
+        Queue a BGR frame for display and return immediately.
+
+        Args:
+            title (str): Window title.
+            frame (numpy.ndarray): BGR image. Not copied; do not mutate afterwards.
+        """
+        if self.headless:
+            return
+        if not self._running:
+            self.start()
+        while True:
+            try:
+                self._queue.put_nowait((title, frame))
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    # ================= RENDER SIDE =================
+
+    def pump(self, wait=0.01):
+        """
+        Render pending frames, expire old windows and pump GUI events once.
+
+        Args:
+            wait (float): Seconds to wait for a new frame.
+        """
+        try:
+            title, frame = self._queue.get(timeout=wait)
+            cv2.imshow(title, frame)
+            self._windows[title] = time.monotonic() + self.hold
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        for title, expires in list(self._windows.items()):
+            if now >= expires:
+                cv2.destroyWindow(title)
+                del self._windows[title]
+
+        if self._windows:
+            cv2.waitKey(1)
+
+    def _run(self):
+        while self._running:
+            self.pump()
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    # A 30 fps capture loop with previews, inline vs through the worker, on a
+    # stand-in GUI where every imshow/waitKey costs 40 ms (a busy desktop or
+    # remote display); real windows are not needed: python -m vision.display
+    def slow_imshow(title, frame):
+        time.sleep(0.04)
+
+    def slow_wait_key(delay):
+        time.sleep(0.04)
+        return -1
+
+    cv2.imshow, cv2.waitKey, cv2.destroyWindow = slow_imshow, slow_wait_key, lambda title: None
+    frame = np.zeros((360, 640, 3), np.uint8)
+    period, frames = 1 / 30, 60
+
+    def capture_loop(preview):
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            time.sleep(period)  # camera read
+            preview(frame)
+        return frames / (time.perf_counter() - t0)
+
+    def inline(frame):
+        cv2.imshow("inline", frame)
+        cv2.waitKey(1)
+
+    worker = DisplayWorker(headless=False).start()
+    print(f"inline preview: {capture_loop(inline):5.1f} fps")
+    print(f"DisplayWorker:  {capture_loop(lambda f: worker.show('async', f)):5.1f} fps "
+          f"({worker.dropped} stale previews dropped)")
+    worker.stop()
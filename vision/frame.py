@@ -0,0 +1,201 @@
+import time
+import base64
+import hashlib
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+class Frame:
+    """
+    One captured image plus every encoding derived from it.
+
+    Wraps the raw pixel buffer and computes resized variants, JPEG/PNG bytes,
+    base64 strings, PIL images and the content hash on first request only.
+    Results are memoized per (kind, size, quality), so however many model
+    providers, stores or log sinks consume a capture, each encoding is
+    computed at most once. Safe to share between threads.
+
+    Sizes are (width, height) tuples; None means the original resolution.
+
+    Attributes:
+        bgr (numpy.ndarray): Original pixels in OpenCV (BGR) order. Treat as read-only.
+        timestamp (float): Capture time (time.time()).
+        source (str): Free-form origin tag ("camera", "screen", ...).
+        encodes (int): Number of encodings actually computed (cache misses).
+    """
+
+    def __init__(self, bgr, timestamp=None, source=None):
+        self.bgr = bgr
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.source = source
+        self.encodes = 0
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    # ================= CONSTRUCTORS =================
+
+    @classmethod
+    def from_bgr(cls, bgr, **kwargs):
+        return cls(bgr, **kwargs)
+
+    @classmethod
+    def from_rgb(cls, rgb, **kwargs):
+        return cls(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), **kwargs)
+
+    @classmethod
+    def from_pil(cls, pil_img, **kwargs):
+        frame = cls.from_rgb(np.asarray(pil_img.convert("RGB")), **kwargs)
+        frame._cache[("pil", None)] = pil_img
+        return frame
+
+    # ================= MEMOIZATION =================
+
+    def _memo(self, key, compute):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+                self.encodes += 1
+            return self._cache[key]
+
+    @property
+    def size(self):
+        h, w = self.bgr.shape[:2]
+        return w, h
+
+    # ================= PIXEL VARIANTS =================
+
+    def resized(self, size=None):
+        """
+        Args:
+            size (tuple | None): Target (width, height).
+
+        Returns:
+            numpy.ndarray: BGR pixels at ``size``.
+        """
+        if size is None or tuple(size) == self.size:
+            return self.bgr
+        size = tuple(size)
+        return self._memo(
+            ("bgr", size),
+            lambda: cv2.resize(self.bgr, size, interpolation=cv2.INTER_AREA),
+        )
+
+    def rgb(self, size=None):
+        size = tuple(size) if size else None
+        return self._memo(("rgb", size), lambda: cv2.cvtColor(self.resized(size), cv2.COLOR_BGR2RGB))
+
+    def pil(self, size=None):
+        """
+        Returns:
+            PIL.Image.Image: RGB image at ``size`` (for Gemini and friends).
+        """
+        size = tuple(size) if size else None
+        return self._memo(("pil", size), lambda: Image.fromarray(self.rgb(size)))
+
+    # ================= ENCODINGS =================
+
+    def jpeg(self, quality=80, size=None):
+        """
+        Returns:
+            bytes: JPEG at ``quality`` and ``size``.
+        """
+        size = tuple(size) if size else None
+
+        def encode():
+            ok, buf = cv2.imencode(".jpg", self.resized(size), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise RuntimeError("JPEG encoding failed")
+            return buf.tobytes()
+
+        return self._memo(("jpeg", size, quality), encode)
+
+    def png(self, size=None):
+        """
+        Returns:
+            bytes: Lossless PNG at ``size``.
+        """
+        size = tuple(size) if size else None
+
+        def encode():
+            ok, buf = cv2.imencode(".png", self.resized(size))
+            if not ok:
+                raise RuntimeError("PNG encoding failed")
+            return buf.tobytes()
+
+        return self._memo(("png", size), encode)
+
+    def base64(self, fmt="jpeg", quality=80, size=None):
+        """
+        Args:
+            fmt (str): "jpeg" or "png".
+            quality (int): JPEG quality (ignored for PNG).
+            size (tuple | None): Target (width, height).
+
+        Returns:
+            str: Base64 of the encoded bytes, ready for JSON payloads.
+        """
+        size = tuple(size) if size else None
+        if fmt == "png":
+            key, raw = ("b64", "png", size), lambda: self.png(size)
+        else:
+            key, raw = ("b64", "jpeg", size, quality), lambda: self.jpeg(quality, size)
+        return self._memo(key, lambda: base64.b64encode(raw()).decode("utf-8"))
+
+    def hash(self, size=None):
+        """
+        Returns:
+            str: Content hash of the pixels at ``size``.
+        """
+        size = tuple(size) if size else None
+
+        def digest():
+            pixels = np.ascontiguousarray(self.resized(size))
+            h = hashlib.blake2b(digest_size=16)
+            h.update(f"{pixels.shape}".encode())
+            h.update(pixels.data)
+            return h.hexdigest()
+
+        return self._memo(("hash", size), digest)
+
+    def __repr__(self):
+        return f"Frame({self.source}, {self.size[0]}x{self.size[1]}, cached={len(self._cache)})"
+
+
+if __name__ == "__main__":
+    import tracemalloc
+    from io import BytesIO
+
+    # Per-turn CPU time and peak memory: python -m vision.frame
+    rng = np.random.default_rng(0)
+    bgr = cv2.GaussianBlur(rng.integers(0, 255, (1080, 1920, 3), np.uint8), (9, 9), 0)
+    consumers = 3  # e.g. Gemini + HF + log sink all want the same upload
+
+    def old_turn():
+        pil = Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+        for _ in range(consumers):
+            small = pil.resize((800, 450))
+            buf = BytesIO()
+            small.save(buf, "JPEG", quality=80)
+            base64.b64encode(buf.getvalue()).decode("utf-8")
+            cv2.imencode(".png", cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+    def new_turn():
+        frame = Frame(bgr)
+        for _ in range(consumers):
+            frame.pil((800, 450))
+            frame.base64("jpeg", 80, (800, 450))
+            frame.png()
+
+    for name, turn in (("re-encode per consumer", old_turn), ("Frame (encode once)", new_turn)):
+        turn()
+        tracemalloc.start()
+        t0 = time.process_time()
+        for _ in range(5):
+            turn()
+        cpu = (time.process_time() - t0) / 5
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:24s} cpu={cpu * 1000:7.1f} ms/turn  peak={peak / 1e6:6.1f} MB")
@@ -1,50 +1,84 @@
 import cv2
-from PIL import Image
-import pyautogui
 import numpy as np
-import os
 import time
 
-cap = cv2.VideoCapture(0)
-os.makedirs("../database/images", exist_ok=True)
+from vision.camera import CameraGrabber
+from vision.display import DisplayWorker
+from vision.encoder import BudgetEncoder
+from vision.frame import Frame
+from vision.replay import open_screen
+from vision.screen import ScreenCapture
+from vision.store import ImageStore
 
-def compress_and_save(pil_img, prefix):
-    pil_img = pil_img.resize((800, 450))
-    filename = f"{prefix}_{int(time.time())}.jpg"
-    path = os.path.join("images", filename)
-    pil_img.save(path, "JPEG", quality=80)
-    return pil_img, path
+# Opened once and drained in the background; see vision/camera.py.
+camera = CameraGrabber(0)
+# Previews render on their own thread; captures never wait on the GUI.
+display = DisplayWorker()
+# pyautogui.screenshot, or a recorder/replay of it (JARVIS_RECORD / JARVIS_REPLAY);
+# pyautogui is only imported when the live screen is used.
+grab_screen = open_screen()
+# Remembers the last screenshot so unchanged screens can skip the model call.
+screen = ScreenCapture(grab=grab_screen)
+# database/images, keyed by content hash; JPEG writes happen in the background.
+store = ImageStore()
+# Upload size/quality is searched per capture to fit a byte budget; screenshots
+# give up JPEG quality before resolution so text stays readable.
+encoders = {
+    "camera": BudgetEncoder.for_provider("gemini", max_bytes=100_000),
+    "screen": BudgetEncoder.for_provider("gemini", max_bytes=100_000, text=True),
+}
 
+def compress_and_save(frame, prefix, encoder=None):
+    # The chosen JPEG and PIL variant are memoized on the Frame, so the store
+    # and any later consumer of the same capture reuse them.
+    encoded = (encoder or encoders[prefix]).encode(frame)
+    _, path = store.put(frame, prefix, quality=encoded.quality, size=encoded.size)
+    return encoded.pil(), path
 
-def capture_camera():
-    ret, frame = cap.read()
-    if not ret:
+
+def capture_camera(encoder=None):
+    if not camera.running:
+        camera.start()
+        camera.wait_newer_than(0, timeout=2)
+
+    _, frame = camera.latest()
+    if frame is None:
         return None, None
 
-    cv2.imshow("📷 Camera Capture", frame)
-    cv2.waitKey(800)
-    cv2.destroyWindow("📷 Camera Capture")
+    display.show("📷 Camera Capture", frame)
 
-    pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    return compress_and_save(pil_img, "camera")
+    return compress_and_save(Frame(frame, source="camera"), "camera", encoder)
 
 
-def capture_screenshot():
-    screenshot = pyautogui.screenshot()
-    frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+def capture_screenshot(encoder=None):
+    screenshot = grab_screen()
 
-    h, w, _ = frame.shape
-    cv2.rectangle(frame, (10, 10), (w - 10, h - 10), (0, 255, 0), 3)
+    if display.enabled:
+        frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        h, w, _ = frame.shape
+        cv2.rectangle(frame, (10, 10), (w - 10, h - 10), (0, 255, 0), 3)
+        display.show("🖥️ Screenshot", frame)
 
-    cv2.imshow("🖥️ Screenshot", frame)
-    cv2.waitKey(800)
-    cv2.destroyWindow("🖥️ Screenshot")
+    return compress_and_save(Frame.from_pil(screenshot, source="screen"), "screen", encoder)
 
-    return compress_and_save(screenshot, "screen")
 
+def capture_screen_change():
+    # UNCHANGED -> reuse the previous answer, REGIONS -> send change.crops(),
+    # FULL -> send the whole screenshot.
+    change = screen.capture()
+    if display.enabled and not change.unchanged:
+        frame = cv2.cvtColor(change.frame, cv2.COLOR_RGB2BGR)
+        for x, y, w, h in change.regions:
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
+        display.show("🖥️ Screen Changes", frame)
+    return change
 
 
 
 if __name__ == "__main__":
     capture_camera()
-    capture_screenshot()
\ No newline at end of file
+    capture_screenshot()
+    time.sleep(display.hold)  # let the previews render before exiting
+    camera.stop()
+    display.stop()
+    store.close()
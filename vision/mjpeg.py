@@ -0,0 +1,365 @@
+import re
+import time
+import random
+import itertools
+import threading
+
+import cv2
+import numpy as np
+import requests
+import urllib3
+
+SOI = b"\xff\xd8"
+EOI = b"\xff\xd9"
+HEADER_END = b"\r\n\r\n"
+CONTENT_LENGTH = re.compile(rb"content-length:\s*(\d+)", re.IGNORECASE)
+MAX_HEADER = 64 * 1024
+
+
+# ============================================================
+# 1. MJPEG STREAM READER
+# ============================================================
+
+class MJPEGStream:
+    """
+    Native reader for multipart MJPEG over HTTP (e.g. the IP Webcam app).
+
+    A background thread pulls the HTTP body, cuts JPEGs out of it by each
+    part's Content-Length header (falling back to start/end markers for
+    servers that send none) and keeps only the newest compressed frame;
+    nothing is decoded on that thread. Frames are decoded by read() only when a
+    consumer asks, and the decode is cached until a newer JPEG arrives.
+
+    Dropped, broken or stalled connections (read timeouts) are retried
+    forever with exponential backoff plus jitter (``backoff`` doubling up to ``max_backoff``), instead of ending
+    the robot loop on the first failed read.
+
+    Mirrors the cv2.VideoCapture subset used in this repo (isOpened, read,
+    release), so it can be passed anywhere a capture is expected.
+
+    Attributes:
+        url (str): Stream URL.
+        frames_received (int): JPEGs parsed from the stream.
+        reconnects (int): Connection attempts after the first.
+    """
+
+    def __init__(self, url, timeout=5.0, backoff=0.5, max_backoff=10.0):
+        """
+        Args:
+            url (str): MJPEG endpoint.
+            timeout (float): Connect/read timeout in seconds.
+            backoff (float): First reconnect delay.
+            max_backoff (float): Reconnect delay cap.
+        """
+        self.url = url
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._jpeg = None
+        self._stamp = None
+        self._seq = 0
+        self._read_seq = 0
+        self._decoded = (0, None)
+        self._connected = False
+        self._running = True
+        self.frames_received = 0
+        self.reconnects = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="mjpeg-reader", daemon=True)
+        self._thread.start()
+
+    # ================= NETWORK SIDE =================
+
+    def _run(self):
+        delay = self.backoff
+        first = True
+        while self._running:
+            if not first:
+                self.reconnects += 1
+            first = False
+            try:
+                with requests.get(self.url, stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    self._connected = True
+                    delay = self.backoff
+                    self._consume(self._chunks(response.raw))
+            except (requests.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+                # urllib3 errors (ReadTimeoutError, ProtocolError) come straight
+                # from response.raw and are not wrapped by requests.
+                self.last_error = e
+            self._connected = False
+            if self._running:
+                time.sleep(delay * (0.5 + random.random()))
+                delay = min(delay * 2, self.max_backoff)
+
+    def _chunks(self, raw):
+        # read1() returns whatever has arrived (up to 64 KB) instead of
+        # blocking until a fixed-size chunk fills; older urllib3 lacks it.
+        read = getattr(raw, "read1", None) or raw.read
+        while True:
+            chunk = read(64 * 1024)
+            if not chunk:
+                return
+            yield chunk
+
+    def _consume(self, chunks):
+        # Multipart parts: headers, blank line, then exactly Content-Length
+        # bytes. Length framing keeps JPEGs whose EXIF thumbnail carries its
+        # own SOI/EOI in one piece.
+        chunks = iter(chunks)
+        buf = bytearray()
+        for chunk in chunks:
+            if not self._running:
+                return
+            buf += chunk
+            while True:
+                end = buf.find(HEADER_END)
+                if end < 0:
+                    if len(buf) > MAX_HEADER:
+                        return self._scan(itertools.chain([bytes(buf)], chunks))
+                    break
+                match = CONTENT_LENGTH.search(buf, 0, end)
+                if match is None:
+                    return self._scan(itertools.chain([bytes(buf)], chunks))
+                start = end + len(HEADER_END)
+                stop = start + int(match.group(1))
+                if len(buf) < stop:
+                    break
+                self._publish(bytes(buf[start:stop]))
+                del buf[:stop]
+
+    def _scan(self, chunks):
+        # Fallback for streams without Content-Length: cut at SOI/EOI markers.
+        buf = bytearray()
+        start = -1
+        scan_from = 0
+        for chunk in chunks:
+            if not self._running:
+                return
+            buf += chunk
+
+            while True:
+                if start < 0:
+                    start = buf.find(SOI, scan_from)
+                    if start < 0:
+                        # Keep one byte in case a marker straddles chunks.
+                        del buf[:max(0, len(buf) - 1)]
+                        scan_from = 0
+                        break
+                    scan_from = start + 2
+                end = buf.find(EOI, scan_from)
+                if end < 0:
+                    scan_from = max(start + 2, len(buf) - 1)
+                    break
+                self._publish(bytes(buf[start:end + 2]))
+                del buf[:end + 2]
+                start, scan_from = -1, 0
+
+    def _publish(self, jpeg):
+        with self._cond:
+            self._jpeg = jpeg
+            self._stamp = time.monotonic()
+            self._seq += 1
+            self.frames_received += 1
+            self._cond.notify_all()
+
+    # ================= CONSUMER SIDE =================
+
+    def isOpened(self):
+        return self._running
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def latest_jpeg(self):
+        """
+        Newest compressed frame, without decoding.
+
+        Returns:
+            tuple: (timestamp, jpeg bytes) or (None, None).
+        """
+        with self._cond:
+            return self._stamp, self._jpeg
+
+    def read(self, timeout=None):
+        """
+        Decode and return the newest frame not yet returned by read().
+
+        Blocks until a new JPEG arrives (or ``timeout`` elapses), so a
+        consumer loop never re-decodes the same frame.
+
+        Args:
+            timeout (float | None): Seconds to wait; defaults to ``self.timeout``.
+
+        Returns:
+            tuple: (ok, BGR frame).
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            while self._running and self._seq == self._read_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, None
+                self._cond.wait(remaining)
+            seq, jpeg = self._seq, self._jpeg
+            self._read_seq = seq
+
+        if jpeg is None:
+            return False, None
+        if self._decoded[0] != seq:
+            frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                return False, None
+            self._decoded = (seq, frame)
+        return True, self._decoded[1]
+
+    def release(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=self.timeout + 1)
+
+
+# ============================================================
+# 2. LOCAL STAND-IN SERVER (TESTS / BENCHMARKS)
+# ============================================================
+
+class MJPEGTestServer:
+    """
+    Minimal multipart/x-mixed-replace server on localhost.
+
+    Streams the given JPEG frames in a loop at ``fps``, the way the IP
+    Webcam app does, and records when each frame index was sent so lag can
+    be measured on the client side. With ``stall_after`` the first
+    connection sends that many frames, then half of the next one, and goes
+    silent with the socket still open (a hung phone or Wi-Fi drop).
+
+    Attributes:
+        url (str): http://127.0.0.1:<port>/video
+        sent (dict[int, float]): Frame counter -> time.monotonic() when sent.
+        connections (int): Connections accepted.
+    """
+
+    BOUNDARY = "jarvisframe"
+
+    def __init__(self, frames, fps=30, port=0, stall_after=None):
+        """
+        Args:
+            frames (list[bytes]): JPEG payloads.
+            fps (float): Send rate.
+            port (int): 0 picks a free port.
+            stall_after (int | None): Frames before the first connection stalls.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={server.BOUNDARY}")
+                self.end_headers()
+                server.connections += 1
+                stall = server.stall_after if server.connections == 1 else None
+                try:
+                    server._stream(self.wfile, stall)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self.frames = frames
+        self.fps = fps
+        self.stall_after = stall_after
+        self.connections = 0
+        self.sent = {}
+        self._counter = 0
+        self._running = True
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/video"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _stream(self, wfile, stall_after=None):
+        next_time = time.monotonic()
+        sent = 0
+        while self._running:
+            if sent == stall_after:
+                jpeg = self.frames[0]
+                wfile.write(f"--{self.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                            f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg[:len(jpeg) // 2])
+                wfile.flush()
+                while self._running:
+                    time.sleep(0.05)
+                return
+            sent += 1
+            index = self._counter
+            self._counter += 1
+            jpeg = self.frames[index % len(self.frames)]
+            wfile.write(
+                f"--{self.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n"
+            )
+            wfile.flush()
+            self.sent[index] = time.monotonic()
+            next_time += 1.0 / self.fps
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def close(self):
+        self._running = False
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def stamp_index(frame, index, bits=16, cell=24):
+    """Draw ``index`` as a row of black/white cells (survives JPEG)."""
+    for bit in range(bits):
+        value = 255 if (index >> bit) & 1 else 0
+        frame[:cell, bit * cell:(bit + 1) * cell] = value
+    return frame
+
+
+def read_index(frame, bits=16, cell=24):
+    cells = frame[cell // 4:cell * 3 // 4, :bits * cell].reshape(cell // 2, bits, cell, -1)
+    on = cells[:, :, cell // 4:cell * 3 // 4].mean(axis=(0, 2, 3)) > 127
+    return int(sum(1 << bit for bit in range(bits) if on[bit]))
+
+
+if __name__ == "__main__":
+    # CPU and end-to-end lag, native reader vs cv2.VideoCapture: python -m vision.mjpeg
+    base = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 255, (720, 1280, 3), np.uint8), (0, 0), 3)
+    frames = []
+    for i in range(300):
+        frame = stamp_index(base.copy(), i)
+        frames.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes())
+
+    def run(label, open_capture, seconds=6, consumer_period=0.2):
+        server = MJPEGTestServer(frames, fps=30)
+        cap = open_capture(server.url)
+        lags = []
+        cpu0, t_end = time.process_time(), time.monotonic() + seconds
+        while time.monotonic() < t_end:
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            counter = read_index(frame)
+            # The server loops over 300 frames; map back to the newest matching send.
+            sends = [t for i, t in server.sent.items() if i % len(frames) == counter]
+            if sends:
+                lags.append(time.monotonic() - max(sends))
+            time.sleep(consumer_period)  # a slow model between reads
+        cpu = (time.process_time() - cpu0) / seconds
+        cap.release()
+        server.close()
+        lags.sort()
+        print(f"{label:18s} cpu={cpu * 100:5.1f}%  lag p50={lags[len(lags) // 2] * 1000:7.1f} ms  "
+              f"max={lags[-1] * 1000:7.1f} ms  reads={len(lags)}")
+
+    run("MJPEGStream", MJPEGStream)
+    run("cv2.VideoCapture", cv2.VideoCapture)
@@ -0,0 +1,528 @@
+import os
+import time
+import random
+import struct
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# ============================================================
+# 1. RECORDING FORMAT
+# ============================================================
+#
+# One file per source:
+#
+#     MAGIC
+#     repeated: <float64 seconds since recording start> <uint32 n> <n bytes JPEG/PNG>
+#
+# Frames are stored encoded (JPEG for cameras, PNG for screens so text stays
+# sharp), which keeps a minute of 640x480 video in a few MB and lets replay
+# decode one frame at a time.
+
+MAGIC = b"JARVISREC1\n"
+RECORD_HEADER = struct.Struct("<dI")
+
+REPLAY_ENV = "JARVIS_REPLAY"
+RECORD_ENV = "JARVIS_RECORD"
+REPLAY_SPEED_ENV = "JARVIS_REPLAY_SPEED"
+MOCK_ENV = "JARVIS_MOCK_MODEL"
+MOCK_LATENCY_ENV = "JARVIS_MOCK_LATENCY"
+
+
+class Recorder:
+    """
+    Appends timestamped frames to a recording file.
+
+    Attributes:
+        path (str): Output file.
+        ext (str): ".jpg" or ".png".
+        quality (int): JPEG quality.
+        frames (int): Frames written.
+    """
+
+    def __init__(self, path, ext=".jpg", quality=90):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ext = ext
+        self.quality = quality
+        self.frames = 0
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext == ".jpg" else []
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._start = None
+        self._lock = threading.Lock()
+
+    def write(self, frame, timestamp=None):
+        """
+        Args:
+            frame (numpy.ndarray): BGR frame.
+            timestamp (float | None): Capture time (defaults to time.monotonic()).
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        ok, buf = cv2.imencode(self.ext, frame, self._params)
+        if not ok:
+            return
+        with self._lock:
+            if self._file is None:
+                return
+            if self._start is None:
+                self._start = timestamp
+            data = buf.tobytes()
+            self._file.write(RECORD_HEADER.pack(timestamp - self._start, len(data)))
+            self._file.write(data)
+            self.frames += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_recording(path):
+    """
+    Iterate over a recording without pacing.
+
+    Yields:
+        tuple: (seconds since recording start, BGR frame).
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a JARVIS recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp, size = RECORD_HEADER.unpack(header)
+            data = f.read(size)
+            if len(data) < size:
+                return
+            yield timestamp, cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+# ============================================================
+# 2. RECORDING WRAPPERS
+# ============================================================
+
+class RecordingCamera:
+    """
+    Wraps a cv2.VideoCapture-like device and records every frame it returns.
+
+    Everything except read() and release() is passed through to the device.
+    """
+
+    def __init__(self, device, recorder):
+        self._device = device
+        self.recorder = recorder
+
+    def read(self):
+        ok, frame = self._device.read()
+        if ok:
+            self.recorder.write(frame)
+        return ok, frame
+
+    def release(self):
+        self._device.release()
+        self.recorder.close()
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+
+class RecordingScreen:
+    """
+    Wraps a screenshot function (e.g. pyautogui.screenshot) and records every
+    screenshot as a lossless frame.
+    """
+
+    def __init__(self, grab, recorder):
+        self._grab = grab
+        self.recorder = recorder
+
+    def __call__(self, *args, **kwargs):
+        image = self._grab(*args, **kwargs)
+        self.recorder.write(cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR))
+        return image
+
+
+# ============================================================
+# 3. REPLAY SOURCE
+# ============================================================
+
+class ReplayCamera:
+    """
+    Plays a recording back through the cv2.VideoCapture API.
+
+    With ``speed`` > 0 frames are released on the recorded timeline (scaled
+    by ``speed``), so loops see the same frame rate and gaps as the live
+    source. ``speed=0`` returns frames as fast as they are read, for
+    benchmarks. screenshot() serves the same frames as PIL images, so a
+    replay can stand in for pyautogui.screenshot as well; unlike read() it
+    raises EOFError when the recording has run out.
+
+    Attributes:
+        path (str): Recording file.
+        speed (float): Playback speed; 0 = as fast as possible.
+        loop (bool): Start over at the end instead of reporting failure.
+        frames_read (int): Frames returned so far.
+        exhausted (bool): True once a non-looping replay has run out.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.frames_read = 0
+        self.exhausted = False
+        self._frames = None
+        self._origin = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._frames = read_recording(self.path)
+        self._origin = None
+
+    def isOpened(self):
+        return self._frames is not None
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def read(self):
+        with self._lock:
+            if self._frames is None:
+                return False, None
+            item = next(self._frames, None)
+            if item is None and self.loop and self.frames_read:
+                self._open()
+                item = next(self._frames, None)
+            if item is None:
+                self.exhausted = True
+                return False, None
+
+            timestamp, frame = item
+            if self.speed:
+                now = time.monotonic()
+                if self._origin is None:
+                    self._origin = now - timestamp / self.speed
+                delay = self._origin + timestamp / self.speed - now
+                if delay > 0:
+                    time.sleep(delay)
+            self.frames_read += 1
+            return True, frame
+
+    def screenshot(self, *args, **kwargs):
+        ok, frame = self.read()
+        if not ok:
+            raise EOFError(f"{self.path}: no more recorded screenshots")
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def release(self):
+        with self._lock:
+            if self._frames is not None:
+                self._frames.close()
+            self._frames = None
+
+
+def _replay_speed():
+    value = os.getenv(REPLAY_SPEED_ENV)
+    return float(value) if value else 1.0
+
+
+def open_capture(factory, name="camera"):
+    """
+    Open a capture device, honouring the record/replay environment.
+
+    JARVIS_REPLAY=<dir> replays <dir>/<name>.rec instead of opening the
+    device (JARVIS_REPLAY_SPEED=0 for max speed). JARVIS_RECORD=<dir>
+    records the live device to <dir>/<name>.rec while it is used.
+
+    Args:
+        factory (callable): () -> device, e.g. lambda: cv2.VideoCapture(0).
+        name (str): Recording name.
+
+    Returns:
+        cv2.VideoCapture-like object.
+    """
+    replay_dir = os.getenv(REPLAY_ENV)
+    if replay_dir:
+        return ReplayCamera(os.path.join(replay_dir, f"{name}.rec"), speed=_replay_speed())
+    device = factory()
+    record_dir = os.getenv(RECORD_ENV)
+    if record_dir:
+        return RecordingCamera(device, Recorder(os.path.join(record_dir, f"{name}.rec")))
+    return device
+
+
+def open_screen(grab=None, name="screen"):
+    """
+    Screenshot function honouring the record/replay environment (see open_capture).
+
+    Screenshots are taken once per request rather than at a frame rate, so a
+    replay is not paced and loops over the recording instead of running out
+    mid-session.
+
+    Args:
+        grab (callable | None): () -> PIL.Image. Defaults to
+            pyautogui.screenshot, imported only when the live screen is used.
+        name (str): Recording name.
+
+    Returns:
+        callable: () -> PIL.Image
+    """
+    replay_dir = os.getenv(REPLAY_ENV)
+    if replay_dir:
+        return ReplayCamera(os.path.join(replay_dir, f"{name}.rec"), speed=0, loop=True).screenshot
+    if grab is None:
+        import pyautogui
+        grab = pyautogui.screenshot
+    record_dir = os.getenv(RECORD_ENV)
+    if record_dir:
+        return RecordingScreen(grab, Recorder(os.path.join(record_dir, f"{name}.rec"), ext=".png"))
+    return grab
+
+
+class _InputRecorder:
+    def __init__(self, read, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._read = read
+        self._file = open(path, "w", encoding="utf-8")
+
+    def __call__(self, prompt=""):
+        line = self._read(prompt)
+        self._file.write(line.replace("\n", " ") + "\n")
+        self._file.flush()
+        return line
+
+
+class _InputReplay:
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            self._lines = iter(f.read().splitlines())
+
+    def __call__(self, prompt=""):
+        line = next(self._lines, None)
+        if line is None:
+            raise EOFError("end of recorded input")
+        print(prompt + line)
+        return line
+
+
+def open_input(read=input, name="input"):
+    """
+    Line reader honouring the record/replay environment (see open_capture).
+
+    JARVIS_RECORD writes every typed line to <dir>/<name>.txt and
+    JARVIS_REPLAY types them back, echoing each after the prompt, so an
+    agent session can be re-run unattended. Like input(), the reader raises
+    EOFError when there is nothing left to read.
+
+    Args:
+        read (callable): (prompt) -> str, e.g. input.
+        name (str): Recording name.
+
+    Returns:
+        callable: (prompt) -> str
+    """
+    replay_dir = os.getenv(REPLAY_ENV)
+    if replay_dir:
+        return _InputReplay(os.path.join(replay_dir, f"{name}.txt"))
+    record_dir = os.getenv(RECORD_ENV)
+    if record_dir:
+        return _InputRecorder(read, os.path.join(record_dir, f"{name}.txt"))
+    return read
+
+
+# ============================================================
+# 4. MOCK MODEL BACKEND
+# ============================================================
+
+class _MockResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class MockModel:
+    """
+    Offline stand-in for the model backends with a configurable latency.
+
+    Speaks just enough of each client API for the loops in test/:
+
+    * HF pipeline:   model(prompt, ...) -> [{"generated_text": reply}]
+    * Gemini:        model.generate_content(parts) -> object with .text
+                     (a one-chunk list of them with stream=True)
+    * Ollama:        model.chat(model=..., messages=...) -> {"message": {"content": reply}}
+
+    Attributes:
+        latency (float): Seconds each call sleeps.
+        jitter (float): Extra uniform random delay, 0..jitter seconds.
+        reply (str | callable): Fixed reply, or (prompt) -> reply.
+        calls (int): Calls served.
+    """
+
+    def __init__(self, reply="Objects: none\nDirection: forward", latency=0.05, jitter=0.0, seed=0):
+        self.reply = reply
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, prompt=""):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        time.sleep(delay)
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+    def __call__(self, prompt, **kwargs):
+        return [{"generated_text": self.respond(prompt)}]
+
+    def generate_content(self, parts, stream=False, **kwargs):
+        prompt = next((p for p in (parts if isinstance(parts, list) else [parts]) if isinstance(p, str)), "")
+        response = _MockResponse(self.respond(prompt))
+        return [response] if stream else response
+
+    def chat(self, model=None, messages=None, **kwargs):
+        prompt = messages[-1]["content"] if messages else ""
+        return {"message": {"role": "assistant", "content": self.respond(prompt)}}
+
+
+def mock_model(reply, latency=0.3):
+    """
+    The offline stand-in requested by JARVIS_MOCK_MODEL, if any.
+
+    Args:
+        reply (str | callable): See MockModel.
+        latency (float): Default for JARVIS_MOCK_LATENCY.
+
+    Returns:
+        MockModel | None: None when the real models should be used.
+    """
+    if not os.getenv(MOCK_ENV):
+        return None
+    return MockModel(reply=reply, latency=float(os.getenv(MOCK_LATENCY_ENV, str(latency))))
+
+
+# ============================================================
+# 5. BENCHMARK
+# ============================================================
+
+def benchmark(capture, infer, actuate=None, seconds=10.0, lockstep=False, drain=1.0, **pipeline_options):
+    """
+    Run a decision loop on a (replayed) source and measure it.
+
+    By default the loop runs on robot.pipeline.RobotPipeline, exactly like
+    the robot scripts, so slow inference drops frames. ``lockstep=True``
+    decides every frame in order on the calling thread instead, which makes
+    results repeatable run to run (use it with ReplayCamera(speed=0)).
+
+    Stops after ``seconds``, when ``actuate`` returns False or when a
+    non-looping replay runs out (pipelined runs get ``drain`` more seconds to
+    finish the frame in flight).
+
+    Args:
+        capture: cv2.VideoCapture-like source, usually a ReplayCamera.
+        infer (callable): frame -> decision.
+        actuate (callable | None): Decision -> bool; defaults to accepting everything.
+        seconds (float): Wall-clock limit.
+        lockstep (bool): Decide every frame sequentially.
+        drain (float): Seconds to wait for in-flight decisions at end of replay.
+        **pipeline_options: Passed to RobotPipeline.
+
+    Returns:
+        dict: fps (frames read per second), decisions, decisions_per_second,
+            elapsed and the per-stage latency report.
+    """
+    from robot.pipeline import Decision, RobotPipeline
+    from stats import LatencyStats
+
+    counts = {"frames": 0, "decisions": 0}
+
+    def read_frame():
+        ok, frame = capture.read()
+        counts["frames"] += ok
+        return ok, frame
+
+    def act(decision):
+        counts["decisions"] += 1
+        return actuate(decision) if actuate else True
+
+    start = time.monotonic()
+    if lockstep:
+        stats = {name: LatencyStats(name) for name in ("inference", "end_to_end")}
+        while time.monotonic() - start < seconds:
+            stamp = time.monotonic()
+            ok, frame = read_frame()
+            if not ok:
+                break
+            t0 = time.monotonic()
+            value = infer(frame)
+            done = time.monotonic()
+            stats["inference"].record(done - t0)
+            keep_going = act(Decision(value, stamp, done))
+            stats["end_to_end"].record(time.monotonic() - stamp)
+            if keep_going is False:
+                break
+        report = {name: s.summary() for name, s in stats.items()}
+    else:
+        loop = RobotPipeline(read_frame, infer, act, **pipeline_options).start()
+        while loop.running and time.monotonic() - start < seconds:
+            if getattr(capture, "exhausted", False):
+                loop.wait(drain)
+                break
+            time.sleep(0.02)
+        loop.stop()
+        report = loop.report()
+
+    elapsed = time.monotonic() - start
+    return {
+        "fps": counts["frames"] / elapsed,
+        "decisions": counts["decisions"],
+        "decisions_per_second": counts["decisions"] / elapsed,
+        "elapsed": elapsed,
+        "pipeline": report,
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from robot.tiered import TieredController
+    from robot.zones import ZoneAnalyzer
+
+    # Record 3 s of a synthetic 30 fps camera, then benchmark the tiered
+    # robot loop on it with a 50 ms mock model: python -m vision.replay
+    path = os.path.join(tempfile.mkdtemp(), "camera.rec")
+    rng = np.random.default_rng(0)
+    scene = cv2.GaussianBlur(rng.integers(0, 255, (480, 640, 3), np.uint8), (0, 0), 3)
+    with Recorder(path) as recorder:
+        for i in range(90):
+            recorder.write(np.roll(scene, i * 4, axis=1), timestamp=i / 30)
+    print(f"recorded {recorder.frames} frames, {os.path.getsize(path) / 1e6:.2f} MB")
+
+    model = MockModel(reply="left", latency=0.05)
+    zones = ZoneAnalyzer(rows=1, cols=3)
+    controller = TieredController(lambda z, task, frame: model.respond(task))
+
+    def decide(frame):
+        return controller.decide(zones.brightness(frame)[0], "find the door", frame).direction
+
+    runs = (("real time, pipelined", 1.0, False), ("max speed, lockstep", 0, True))
+    for label, speed, lockstep in runs:
+        result = benchmark(ReplayCamera(path, speed=speed), decide, seconds=10, lockstep=lockstep)
+        e2e = result["pipeline"]["end_to_end"]
+        print(f"{label:20s}: {result['fps']:6.1f} fps read, {result['decisions']:3d} decisions, "
+              f"end-to-end p50 {e2e.get('p50_ms', 0):.0f} ms")
@@ -0,0 +1,323 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+from vision.frame import Frame
+
+# ============================================================
+# 1. RESULT TYPE
+# ============================================================
+
+UNCHANGED = "unchanged"
+REGIONS = "regions"
+FULL = "full"
+
+
+class ScreenChange:
+    """
+    Outcome of comparing a screenshot with the previous one.
+
+    Attributes:
+        kind (str): UNCHANGED, REGIONS or FULL.
+        frame (numpy.ndarray): Current RGB screenshot.
+        regions (list[tuple]): Dirty (x, y, w, h) boxes, only set for REGIONS.
+        hash (int): 64-bit perceptual hash of the frame.
+        changed_fraction (float): Share of tiles that changed.
+    """
+
+    def __init__(self, kind, frame, regions=None, hash=0, changed_fraction=0.0):
+        self.kind = kind
+        self.frame = frame
+        self.regions = regions or []
+        self.hash = hash
+        self.changed_fraction = changed_fraction
+
+    @property
+    def unchanged(self):
+        return self.kind == UNCHANGED
+
+    def crops(self):
+        """
+        Images worth sending to a model.
+
+        Returns:
+            list[PIL.Image.Image]: Dirty crops for REGIONS, the full frame for
+            FULL and nothing for UNCHANGED.
+        """
+        if self.kind == UNCHANGED:
+            return []
+        if self.kind == FULL:
+            return [Image.fromarray(self.frame)]
+        return [Image.fromarray(self.frame[y:y + h, x:x + w]) for x, y, w, h in self.regions]
+
+    def bounds(self):
+        """
+        Returns:
+            tuple: (x, y, w, h) covering every dirty region; the whole frame
+                unless the kind is REGIONS.
+        """
+        if self.kind != REGIONS:
+            h, w = self.frame.shape[:2]
+            return 0, 0, w, h
+        x0 = min(x for x, _, _, _ in self.regions)
+        y0 = min(y for _, y, _, _ in self.regions)
+        x1 = max(x + w for x, _, w, _ in self.regions)
+        y1 = max(y + h for _, y, _, h in self.regions)
+        return x0, y0, x1 - x0, y1 - y0
+
+    def __repr__(self):
+        return f"ScreenChange({self.kind}, regions={self.regions}, changed={self.changed_fraction:.3f})"
+
+
+# ============================================================
+# 2. PERCEPTUAL HASH
+# ============================================================
+
+def dhash(gray, size=8):
+    """
+    Difference hash: sign of horizontal gradients on a (size+1)x(size) thumbnail.
+
+    Args:
+        gray (numpy.ndarray): Single-channel image.
+        size (int): Hash side; 8 gives a 64-bit hash.
+
+    Returns:
+        int
+    """
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ============================================================
+# 3. CHANGE DETECTOR
+# ============================================================
+
+class ChangeDetector:
+    """
+    Keeps the previous screenshot and classifies each new one.
+
+    The frame is split into ``tile`` x ``tile`` blocks. A pixel counts as
+    changed when its gray level moved by more than ``pixel_threshold``; a
+    tile is dirty when more than ``tile_fraction`` of its pixels changed.
+    Everything is done with whole-array NumPy ops on a tile-shaped view, so
+    a 1080p frame is classified in around ten milliseconds on one core.
+
+    Dirty tiles are grouped into bounding boxes (padded by one tile so
+    nearby edits merge). When more than ``full_fraction`` of tiles are dirty,
+    or the perceptual hash moved by ``full_hash_distance`` bits or more, the
+    whole frame is reported instead.
+
+    Attributes:
+        tile (int): Tile side in pixels.
+        pixel_threshold (int): Gray-level delta considered a change.
+        tile_fraction (float): Changed-pixel share that marks a tile dirty.
+        full_fraction (float): Dirty-tile share that triggers FULL.
+        full_hash_distance (int): dhash distance that triggers FULL.
+    """
+
+    def __init__(self, tile=32, pixel_threshold=12, tile_fraction=0.01,
+                 full_fraction=0.5, full_hash_distance=20):
+        self.tile = tile
+        self.pixel_threshold = pixel_threshold
+        self.tile_fraction = tile_fraction
+        self.full_fraction = full_fraction
+        self.full_hash_distance = full_hash_distance
+        self._prev_gray = None
+        self._prev_hash = None
+        self.stats = {UNCHANGED: 0, REGIONS: 0, FULL: 0}
+
+    def reset(self):
+        self._prev_gray = None
+        self._prev_hash = None
+
+    def _dirty_tiles(self, gray):
+        t = self.tile
+        h, w = gray.shape
+        diff = cv2.absdiff(gray, self._prev_gray) > self.pixel_threshold
+
+        ph, pw = -h % t, -w % t
+        if ph or pw:
+            diff = np.pad(diff, ((0, ph), (0, pw)))
+        th, tw = diff.shape[0] // t, diff.shape[1] // t
+        counts = diff.view(np.uint8).reshape(th, t, tw, t).sum(axis=(1, 3), dtype=np.uint32)
+        return counts > self.tile_fraction * t * t
+
+    def _regions(self, mask, shape):
+        t = self.tile
+        h, w = shape
+        grown = cv2.dilate(mask.astype(np.uint8), np.ones((3, 3), np.uint8))
+        n, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+
+        regions = []
+        for x, y, bw, bh, _ in stats[1:n]:
+            x0, y0 = x * t, y * t
+            x1, y1 = min((x + bw) * t, w), min((y + bh) * t, h)
+            regions.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+        return regions
+
+    def update(self, frame):
+        """
+        Compare ``frame`` with the previous call and remember it.
+
+        Args:
+            frame (numpy.ndarray): RGB screenshot.
+
+        Returns:
+            ScreenChange
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY) if frame.ndim == 3 else frame
+        phash = dhash(gray)
+        prev_gray, prev_hash = self._prev_gray, self._prev_hash
+
+        if prev_gray is None or prev_gray.shape != gray.shape:
+            change = ScreenChange(FULL, frame, hash=phash, changed_fraction=1.0)
+        elif hamming(phash, prev_hash) >= self.full_hash_distance:
+            change = ScreenChange(FULL, frame, hash=phash, changed_fraction=1.0)
+        else:
+            mask = self._dirty_tiles(gray)
+            fraction = float(mask.mean())
+            if not mask.any():
+                change = ScreenChange(UNCHANGED, frame, hash=phash)
+            elif fraction > self.full_fraction:
+                change = ScreenChange(FULL, frame, hash=phash, changed_fraction=fraction)
+            else:
+                regions = self._regions(mask, gray.shape)
+                change = ScreenChange(REGIONS, frame, regions, phash, fraction)
+
+        self._prev_gray, self._prev_hash = gray, phash
+        self.stats[change.kind] += 1
+        return change
+
+
+# ============================================================
+# 4. SCREENSHOT ENGINE
+# ============================================================
+
+class ScreenCapture:
+    """
+    Change-aware wrapper around pyautogui.screenshot().
+
+    Attributes:
+        detector (ChangeDetector): Holds the previous frame.
+    """
+
+    def __init__(self, grab=None, detector=None):
+        """
+        Args:
+            grab (callable | None): Returns a PIL image. Defaults to
+                pyautogui.screenshot via vision.replay.open_screen, so
+                JARVIS_RECORD / JARVIS_REPLAY apply.
+            detector (ChangeDetector | None): Custom thresholds.
+        """
+        if grab is None:
+            from vision.replay import open_screen
+            grab = open_screen()
+        self._grab = grab
+        self.detector = detector or ChangeDetector()
+
+    def capture(self):
+        """
+        Grab the screen and classify it against the previous grab.
+
+        Returns:
+            ScreenChange
+        """
+        image = self._grab().convert("RGB")
+        return self.detector.update(np.asarray(image))
+
+
+# ============================================================
+# 5. SCREENSHOT TURNS
+# ============================================================
+
+class ScreenTurns:
+    """
+    Decides what a SCREENSHOT turn sends to the model.
+
+    Each screenshot is compared with the one from the previous turn:
+
+    - UNCHANGED and the same question: the previous answer is reused and the
+      model is not called.
+    - REGIONS: only the area covering the changes is uploaded, with the
+      previous answer as context for the rest of the screen.
+    - FULL (or nothing answered yet): the whole screenshot is sent.
+
+    Attributes:
+        detector (ChangeDetector): Holds the previous screenshot.
+        counts (dict[str, int]): Turns per outcome ("reused", "cropped", "full").
+    """
+
+    def __init__(self, detector=None):
+        self.detector = detector or ChangeDetector()
+        self.counts = {"reused": 0, "cropped": 0, "full": 0}
+        self._question = None
+        self._reply = None
+
+    @staticmethod
+    def _normalize(question):
+        return " ".join(question.lower().split())
+
+    def prepare(self, question, frame):
+        """
+        Args:
+            question (str): User message.
+            frame (Frame): Current screenshot.
+
+        Returns:
+            tuple: (reply, image, note). ``reply`` is the previous answer when
+                it can be reused (skip the model call); otherwise it is None,
+                ``image`` is the Frame to send and ``note`` a line for the
+                prompt ("" for a full screenshot).
+        """
+        change = self.detector.update(frame.rgb())
+        previous = self._reply
+        if previous is not None and change.unchanged and self._normalize(question) == self._question:
+            self.counts["reused"] += 1
+            return previous, None, ""
+
+        if previous is not None and change.kind == REGIONS:
+            x, y, w, h = change.bounds()
+            width, height = frame.size
+            crop = Frame.from_rgb(np.ascontiguousarray(change.frame[y:y + h, x:x + w]),
+                                  timestamp=frame.timestamp, source=frame.source)
+            self.counts["cropped"] += 1
+            note = (f"Only the part of the screen that changed since the previous screenshot is attached "
+                    f"(x={x}, y={y}, {w}x{h} of {width}x{height}). "
+                    f"The previous answer about the screen was: {previous}")
+            return None, crop, note
+
+        self.counts["full"] += 1
+        return None, frame, ""
+
+    def answered(self, question, reply):
+        """Remember the answer given for the current screenshot."""
+        self._question = self._normalize(question)
+        self._reply = reply
+
+
+if __name__ == "__main__":
+    import time
+
+    # Synthetic desktop: python -m vision.screen
+    desk = np.full((1080, 1920, 3), 240, np.uint8)
+    detector = ChangeDetector()
+
+    print(detector.update(desk))
+    print(detector.update(desk.copy()))
+
+    edited = desk.copy()
+    cv2.putText(edited, "hello", (400, 300), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    change = detector.update(edited)
+    print(change, [c.size for c in change.crops()])
+
+    print(detector.update(255 - edited))
+
+    t0 = time.perf_counter()
+    for _ in range(50):
+        detector.update(edited)
+    print(f"1080p update: {(time.perf_counter() - t0) / 50 * 1000:.2f} ms")
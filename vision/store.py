@@ -0,0 +1,334 @@
+import os
+import json
+import time
+import queue
+import threading
+
+from vision.frame import Frame
+
+DEFAULT_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "images"
+)
+
+
+# Queue item asking the writer to record re-captures and apply retention.
+_SWEEP = "sweep"
+
+
+def as_frame(image):
+    """
+    Args:
+        image (PIL.Image.Image | Frame): Image to store.
+
+    Returns:
+        Frame: ``image`` itself, or a Frame over its RGB pixels.
+    """
+    return image if isinstance(image, Frame) else Frame.from_pil(image)
+
+
+def content_hash(image, size=None):
+    """
+    Hash of the pixels that get stored, whatever the input type.
+
+    The same pixels passed as a PIL image or as a Frame hash the same, so
+    they share one entry.
+
+    Args:
+        image (PIL.Image.Image | Frame): Image to hash.
+        size (tuple | None): (width, height) it will be stored at.
+
+    Returns:
+        str: 32-char hex digest.
+    """
+    return as_frame(image).hash(size)
+
+
+class ImageStore:
+    """
+    Content-addressed capture store with a background writer.
+
+    Every image is keyed by the hash of its pixels, so a frame identical to
+    one already on disk is never encoded or written twice; the existing
+    entry just gets its ``last`` timestamp refreshed.
+
+    JPEG encoding and all disk I/O, index updates for re-captures included,
+    happen on a writer thread fed by a bounded queue. put() returns the
+    final path straight away; the file appears once the writer gets to it
+    (call flush() to wait).
+
+    An append-only ``index.jsonl`` records writes, re-captures and
+    evictions, and is replayed on startup so lookups by hash or time never
+    list the directory. It is compacted whenever dead lines outnumber live
+    ones.
+
+    Retention runs on open and after every put: entries not seen for
+    ``max_age`` seconds are evicted, then the least recently seen entries
+    until the store fits in ``max_bytes``.
+
+    Attributes:
+        root (str): Directory holding the images and index.
+        max_bytes (int | None): Disk budget for image files.
+        max_age (float | None): Seconds an unseen entry is kept.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=200 * 1024 * 1024,
+                 max_age=7 * 24 * 3600, max_pending=16):
+        """
+        Args:
+            root (str): Storage directory (created if missing).
+            max_bytes (int | None): Size budget; None disables it.
+            max_age (float | None): Age budget in seconds; None disables it.
+            max_pending (int): Writes queued before put() blocks.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(root, exist_ok=True)
+
+        self._index_path = os.path.join(root, "index.jsonl")
+        self._entries = {}
+        self._log_lines = 0
+        self._total_bytes = 0
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._load_index()
+
+        self._thread = threading.Thread(target=self._writer, name="image-store", daemon=True)
+        self._thread.start()
+        self._queue.put(_SWEEP)  # age out entries left from earlier runs
+
+    # ================= INDEX =================
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._log_lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                digest = record["hash"]
+                if record.get("evicted"):
+                    self._entries.pop(digest, None)
+                elif "path" in record:
+                    self._entries[digest] = record
+                elif digest in self._entries:
+                    self._entries[digest]["last"] = record["last"]
+
+        # Drop entries whose file never made it to disk (crash mid-write).
+        for digest, entry in list(self._entries.items()):
+            if not os.path.exists(self._abspath(entry)):
+                del self._entries[digest]
+        self._total_bytes = sum(e["bytes"] for e in self._entries.values())
+
+    def _append(self, *records):
+        with open(self._index_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        self._log_lines += len(records)
+
+    def _compact(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self._index_path)
+        self._log_lines = len(self._entries)
+
+    def _abspath(self, entry):
+        return os.path.join(self.root, entry["path"])
+
+    # ================= WRITES =================
+
+    def put(self, image, prefix="capture", quality=80, size=None):
+        """
+        Store an image, deduplicating by content.
+
+        Args:
+            image (PIL.Image.Image | Frame): Image to store. Must not be mutated afterwards.
+            prefix (str): Source tag (e.g. "camera", "screen").
+            quality (int): JPEG quality.
+            size (tuple | None): (width, height) to store the image at; a
+                Frame's cached hash and JPEG bytes are reused.
+
+        Returns:
+            tuple: (hash, absolute path).
+        """
+        frame = as_frame(image)
+        digest = content_hash(frame, size)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                entry = {
+                    "hash": digest,
+                    "path": f"{prefix}_{digest}.jpg",
+                    "prefix": prefix,
+                    "first": now,
+                    "last": now,
+                    "bytes": 0,
+                }
+                self._entries[digest] = entry
+                item = (entry, frame, quality, size)
+            else:
+                # Re-capture: the writer records it with the next sweep.
+                entry["last"] = now
+                item = None if self._touched else _SWEEP
+                self._touched[digest] = now
+
+        if item is _SWEEP:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                pass  # the writer is busy and sweeps after every write
+        elif item is not None:
+            self._queue.put(item)
+        return digest, self._abspath(entry)
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is not None and item is not _SWEEP:
+                    self._write(*item)
+                with self._lock:
+                    self._sweep()
+            except OSError as e:
+                print("[WARN] Image store index update failed:", e)
+            finally:
+                self._queue.task_done()
+            if item is None:
+                return
+
+    def _write(self, entry, frame, quality, size):
+        path = self._abspath(entry)
+        try:
+            tmp = path + ".part"
+            with open(tmp, "wb") as f:
+                f.write(frame.jpeg(quality, size))
+            os.replace(tmp, path)
+            with self._lock:
+                entry["bytes"] = os.path.getsize(path)
+                self._total_bytes += entry["bytes"]
+                self._append(entry)
+        except OSError as e:
+            print("[WARN] Image store write failed:", e)
+            with self._lock:
+                self._entries.pop(entry["hash"], None)
+
+    def flush(self):
+        """Block until every queued write is on disk."""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    # ================= RETENTION =================
+
+    def _sweep(self):
+        # Caller holds the lock (writer thread only): record re-captures,
+        # apply retention and compact the index once it is mostly dead lines.
+        if self._touched:
+            # Entries still waiting for their first write are skipped: that
+            # write records the entry with its latest ``last``.
+            touched, self._touched = self._touched, {}
+            records = [{"hash": d, "last": last} for d, last in touched.items()
+                       if d in self._entries and self._entries[d]["bytes"]]
+            if records:
+                self._append(*records)
+        self._evict()
+        if self._log_lines > 2 * max(len(self._entries), 1):
+            self._compact()
+
+    def _evict(self):
+        # Caller holds the lock. Only entries already on disk are candidates.
+        written = [e for e in self._entries.values() if e["bytes"]]
+        written.sort(key=lambda e: e["last"])
+        cutoff = time.time() - self.max_age if self.max_age else None
+
+        for entry in written:
+            too_old = cutoff is not None and entry["last"] < cutoff
+            too_big = self.max_bytes is not None and self._total_bytes > self.max_bytes
+            if not (too_old or too_big):
+                break
+            try:
+                os.remove(self._abspath(entry))
+            except FileNotFoundError:
+                pass
+            self._total_bytes -= entry["bytes"]
+            del self._entries[entry["hash"]]
+            self._append({"hash": entry["hash"], "evicted": True})
+
+    # ================= LOOKUPS =================
+
+    def get(self, digest):
+        """
+        Args:
+            digest (str): Content hash.
+
+        Returns:
+            dict | None: Index entry (hash, path, prefix, first, last, bytes).
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            return dict(entry, path=self._abspath(entry)) if entry else None
+
+    def find(self, since=None, until=None, prefix=None):
+        """
+        Entries last seen within [since, until], newest first.
+
+        Args:
+            since (float | None): Unix time lower bound.
+            until (float | None): Unix time upper bound.
+            prefix (str | None): Restrict to one source tag.
+
+        Returns:
+            list[dict]
+        """
+        with self._lock:
+            hits = [
+                dict(e, path=self._abspath(e)) for e in self._entries.values()
+                if (since is None or e["last"] >= since)
+                and (until is None or e["last"] <= until)
+                and (prefix is None or e["prefix"] == prefix)
+            ]
+        hits.sort(key=lambda e: e["last"], reverse=True)
+        return hits
+
+    def latest(self, prefix=None):
+        hits = self.find(prefix=prefix)
+        return hits[0] if hits else None
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from PIL import Image
+
+    # python -m vision.store
+    store = ImageStore(tempfile.mkdtemp(), max_bytes=40_000)
+    t0 = time.perf_counter()
+    for i in range(20):
+        img = Image.new("RGB", (800, 450), (i * 10, 0, 0))
+        store.put(img, "demo")
+        store.put(img, "demo")  # duplicate, no second write
+    print(f"20 unique + 20 duplicate puts: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    store.flush()
+    print("entries:", len(store), "bytes:", store.total_bytes)
+    print("latest:", store.latest()["path"])
+    store.close()
+
+    reopened = ImageStore(store.root, max_bytes=40_000)
+    print("entries after reload:", len(reopened))
+    reopened.close()